@@ -0,0 +1,159 @@
+# benchmarks/bench_startup.py
+# Замер времени запуска приложения: импорт (python -X importtime)
+# и инициализация БД (ml.auth.init_system) на временной базе.
+#
+# Запуск:
+#   python benchmarks/bench_startup.py [--runs 5] [--budget-ms 500]
+#
+# Код возврата 1, если при запуске импортируются тяжёлые модули
+# (pandas, sklearn, joblib, ...), время импорта превышает бюджет
+# или повторный init_system на готовой БД дольше --init-budget-ms.
+
+import os
+import re
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+import time
+from pathlib import Path
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+# Модули, которые должны загружаться лениво или в фоне
+HEAVY_MODULES = ("pandas", "numpy", "scipy", "sklearn", "joblib")
+
+LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def parse_importtime(stderr: str) -> list:
+    """
+    Разбирает вывод -X importtime в список
+    (модуль, собственное время, накопленное время) в микросекундах.
+    """
+    entries = []
+    for line in stderr.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            entries.append((
+                match.group(4),
+                int(match.group(1)),
+                int(match.group(2))
+            ))
+    return entries
+
+
+def measure_imports(module: str = "main", runs: int = 5) -> dict:
+    totals = []
+    entries = []
+
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        entries = parse_importtime(proc.stderr)
+        totals.append(next(
+            cumulative for name, _, cumulative in entries if name == module
+        ))
+
+    imported = {name for name, _, _ in entries}
+    heavy = sorted(
+        m for m in HEAVY_MODULES
+        if m in imported or any(n.startswith(m + ".") for n in imported)
+    )
+    top = sorted(entries, key=lambda e: e[1], reverse=True)[:10]
+
+    return {
+        "module": module,
+        "runs": runs,
+        "best_ms": min(totals) / 1000,
+        "median_ms": statistics.median(totals) / 1000,
+        "heavy_modules": heavy,
+        "top_self_ms": [(name, own / 1000) for name, own, _ in top]
+    }
+
+
+def measure_init_system(runs: int = 5) -> dict:
+    """
+    Первый запуск init_system на пустой БД и повторные —
+    на уже инициализированной.
+    """
+    import ml.database as database
+    from ml.auth import init_system
+
+    original_path = database.DB_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = Path(tmp) / "system.db"
+        try:
+            started = time.perf_counter()
+            init_system()
+            cold = time.perf_counter() - started
+
+            warm = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                init_system()
+                warm.append(time.perf_counter() - started)
+        finally:
+            database.DB_PATH = original_path
+
+    return {
+        "cold_ms": cold * 1000,
+        "warm_best_ms": min(warm) * 1000,
+        "warm_median_ms": statistics.median(warm) * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Время импорта при запуске")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=500.0)
+    parser.add_argument("--init-budget-ms", type=float, default=5.0)
+    parser.add_argument("--json", action="store_true", help="вывод в JSON")
+    args = parser.parse_args()
+
+    result = measure_imports(args.module, args.runs)
+    init = measure_init_system(args.runs)
+
+    if args.json:
+        print(json.dumps(
+            {"imports": result, "init_system": init},
+            indent=4,
+            ensure_ascii=False
+        ))
+    else:
+        print(f"Импорт {result['module']}: лучшее {result['best_ms']:.1f} мс, "
+              f"медиана {result['median_ms']:.1f} мс ({result['runs']} запусков)")
+        print("Самые долгие модули (собственное время):")
+        for name, ms in result["top_self_ms"]:
+            print(f"  {ms:8.1f} мс  {name}")
+        print(f"init_system: первый запуск {init['cold_ms']:.2f} мс, "
+              f"повторный {init['warm_best_ms']:.2f} мс")
+
+    failed = False
+    if result["heavy_modules"]:
+        print("ОШИБКА: при запуске импортируются тяжёлые модули: "
+              + ", ".join(result["heavy_modules"]))
+        failed = True
+    if result["best_ms"] > args.budget_ms:
+        print(f"ОШИБКА: время импорта превышает бюджет {args.budget_ms:.0f} мс")
+        failed = True
+
+    if init["warm_best_ms"] > args.init_budget_ms:
+        print(f"ОШИБКА: повторный init_system дольше "
+              f"{args.init_budget_ms:.0f} мс")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
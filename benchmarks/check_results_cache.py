@@ -0,0 +1,142 @@
+# benchmarks/check_results_cache.py
+# Проверка согласованности кэша истории результатов
+# (ml/results_cache.py) с БД и замер повторного обновления.
+#
+# Запуск:
+#   python benchmarks/check_results_cache.py [--steps 5000] [--seed 1]
+#
+# На временной базе случайно чередуются: save_result этого
+# процесса, вставка «другим процессом» (отдельное соединение,
+# мимо кэша), чтение полной истории и чтение «с id N». Бюджет
+# памяти занижен, чтобы вытеснение тоже проверялось. После каждого
+# чтения ответ кэша сравнивается с запросом к БД.
+# Код возврата 1 при расхождении.
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+import ml.database as database  # noqa: E402
+from ml import results_cache  # noqa: E402
+
+USERS = [f"student{i}" for i in range(8)]
+
+
+def _external_insert(username: str):
+    """
+    Запись мимо кэша — как из другого процесса.
+    """
+    conn = database.get_connection()
+    database.insert_result(
+        conn.cursor(), username, "задание", "list_sum",
+        "result = 0", random.random() < 0.5, "внешняя запись"
+    )
+    conn.commit()
+    conn.close()
+
+
+def check_consistency(steps: int) -> int:
+    mismatches = 0
+    since = {u: 0 for u in USERS}
+
+    for step in range(steps):
+        username = random.choice(USERS)
+        op = random.random()
+
+        if op < 0.35:
+            database.save_result(
+                username, "задание", "list_sum",
+                "result = sum(data)", random.random() < 0.5, "ok"
+            )
+        elif op < 0.5:
+            _external_insert(username)
+        elif op < 0.75:
+            if results_cache.get_results(username) != \
+                    database.get_results_by_user(username):
+                print(f"шаг {step}: расхождение полной истории {username}")
+                mismatches += 1
+        else:
+            # клиент, получающий только новые записи
+            new_rows = results_cache.get_results_since(username, since[username])
+            expected = database.get_results_since(username, since[username])
+            if new_rows != expected:
+                print(f"шаг {step}: расхождение since={since[username]} "
+                      f"для {username}")
+                mismatches += 1
+            if new_rows:
+                since[username] = new_rows[-1]["id"]
+
+    return mismatches
+
+
+def measure_refresh(rows: int = 20000, runs: int = 20) -> dict:
+    username = "bench"
+    conn = database.get_connection()
+    cur = conn.cursor()
+    for _ in range(rows):
+        database.insert_result(
+            cur, username, "задание", "list_sum", "result = 0", True, "ok"
+        )
+    conn.commit()
+    conn.close()
+
+    results_cache.invalidate()
+    results_cache.configure(memory_budget=results_cache.MEMORY_BUDGET)
+
+    def best(fn):
+        times = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - started)
+        return min(times) * 1000
+
+    last_id = results_cache.get_results_since(username)[-1]["id"]
+    return {
+        "rows": rows,
+        "db_full_ms": best(lambda: database.get_results_by_user(username)),
+        "cache_full_ms": best(lambda: results_cache.get_results(username)),
+        "cache_since_ms": best(
+            lambda: results_cache.get_results_since(username, last_id)
+        )
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Согласованность кэша истории")
+    parser.add_argument("--steps", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = Path(tmp) / "system.db"
+        database.init_db()
+
+        # бюджет на несколько сотен записей — к концу прогона
+        # в кэше помещаются не все пользователи
+        results_cache.configure(memory_budget=256 * 1024)
+        mismatches = check_consistency(args.steps)
+        stats = results_cache.stats()
+        print(f"Шагов: {args.steps}, расхождений: {mismatches}, "
+              f"в кэше пользователей: {stats['users']}, "
+              f"записей: {stats['rows']}")
+
+        timing = measure_refresh()
+        print(f"История из {timing['rows']} записей: БД "
+              f"{timing['db_full_ms']:.1f} мс, кэш {timing['cache_full_ms']:.1f} мс, "
+              f"новые с id N {timing['cache_since_ms']:.3f} мс")
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
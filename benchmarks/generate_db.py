@@ -0,0 +1,373 @@
+# benchmarks/generate_db.py
+# Генератор синтетической базы (схема ml/database.py) для замеров
+# на реалистичных объёмах: студенты, их решения с заданной смесью
+# типов заданий, долей верных решений и интервалом времени.
+#
+# Запуск:
+#   python benchmarks/generate_db.py --output data/synthetic.db \
+#       [--students 2000] [--per-student 500] [--days 365] \
+#       [--mix list_sum=3,list_sort=1,text_words=1] [--correct-rate 0.6] \
+#       [--seed 1] [--force | --append]
+#
+# Чтобы работать с полученной базой, укажите её в ml.database.DB_PATH
+# (бенчмарки делают это сами, см. run_benchmarks.py).
+#
+# Скорость: строки вставляются executemany пакетами по BATCH_SIZE
+# в транзакции; на время загрузки новой базы отключены журнал
+# и синхронизация (потерять при сбое нечего). Индекс по результатам
+# и индекс полнотекстового поиска удаляются и строятся один раз
+# в конце. Время вставки и построения индексов выводится отдельно:
+# строки/с считаются по вставке. Построение индексов занимает
+# больше половины общего времени.
+#
+# С --append индекс поиска перестраивается целиком, по всей базе,
+# только если добавляется не меньше SEARCH_REBUILD_SHARE от уже
+# имеющихся решений. Меньшее добавление идёт через триггер индекса
+# (обновление на каждую строку, в несколько раз медленнее вставки
+# без индекса), потому что полное перестроение большой базы
+# обошлось бы дороже.
+#
+# Отзывы о неверных решениях получены настоящей проверкой
+# (check_solution) на случайных данных.
+
+import os
+import sys
+import csv
+import time
+import random
+import argparse
+from pathlib import Path
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+import ml.database as database  # noqa: E402
+from ml import feedback, passwords  # noqa: E402
+
+DATASET_PATH = os.path.join(PROJECT_ROOT, "data", "tasks_dataset.csv")
+
+BATCH_SIZE = 50_000
+
+# Доля от имеющихся решений, начиная с которой при --append
+# индекс поиска перестраивается, а не обновляется триггером
+SEARCH_REBUILD_SHARE = 0.1
+
+DEFAULT_PASSWORD = "student123"
+
+# Решения по типам заданий: (верные, неверные)
+SOLUTIONS = {
+    "list_sum": (
+        ["result = sum(data)",
+         "result = 0\nfor x in data:\n    result += x"],
+        ["result = max(data)", "result = len(data)"]
+    ),
+    "list_even": (
+        ["result = len([x for x in data if x % 2 == 0])",
+         "result = sum(1 for x in data if x % 2 == 0)"],
+        ["result = len(data)", "result = [x for x in data if x % 2 == 0]"]
+    ),
+    "list_sort": (
+        ["result = sorted(data)", "data.sort()\nresult = data"],
+        ["result = data", "result = sorted(data, reverse=True)"]
+    ),
+    "text_chars": (
+        ["result = len(text.replace(' ', ''))",
+         "result = len(''.join(text.split()))"],
+        ["result = len(text)", "result = text.count(' ')"]
+    ),
+    "text_words": (
+        ["result = len(text.split())"],
+        ["result = len(text)", "result = text.split()"]
+    )
+}
+
+# Сколько разных входных данных (и отзывов «Неверный результат»)
+# приходится на одно неверное решение
+WRONG_VARIANTS = 20
+
+TEXT_INPUTS = [
+    "Анализ данных и машинное обучение",
+    "Python для начинающих",
+    "Сумма элементов списка",
+    "Тестовая строка из нескольких слов"
+]
+
+
+def parse_mix(text: str) -> dict:
+    """
+    "list_sum=3,text_words=1" -> {"list_sum": 3.0, "text_words": 1.0}
+    """
+    mix = {}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        task_type, _, weight = part.partition("=")
+        if task_type not in SOLUTIONS:
+            raise ValueError(f"Неизвестный тип задания: {task_type}")
+        mix[task_type] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("Смесь типов заданий пуста")
+    return mix
+
+
+def _task_texts() -> dict:
+    """
+    Тексты заданий по типам из датасета; для типов,
+    которых там нет, — описание из ml.task_generator.
+    """
+    texts = {}
+    if os.path.exists(DATASET_PATH):
+        with open(DATASET_PATH, encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                if row["task_type"] in SOLUTIONS:
+                    texts.setdefault(row["task_type"], []).append(
+                        row["task_text"]
+                    )
+
+    from ml.task_generator import TASKS
+    for task_type in SOLUTIONS:
+        if not texts.get(task_type):
+            texts[task_type] = [TASKS[task_type]["description"]]
+    return texts
+
+
+def _wrong_feedback(rng, task_type: str, code: str) -> list:
+    """
+    Отзывы проверки неверного решения на WRONG_VARIANTS случайных
+    входных данных: [(шаблон, аргументы)], как в results.
+    """
+    from ml.checkers import check_solution
+    from ml.feedback import encode
+    from ml.task_generator import TASKS
+
+    variants = []
+    for _ in range(WRONG_VARIANTS):
+        if task_type.startswith("text_"):
+            data = rng.choice(TEXT_INPUTS)
+            input_data = f'text = Строка текста: "{data}"'
+        else:
+            data = [rng.randint(1, 50) for _ in range(rng.randint(5, 9))]
+            input_data = f"data = Список: {data}"
+        _, message = check_solution(
+            task_type, code, input_data, TASKS[task_type]["solve"](data)
+        )
+        variants.append(encode(message))
+    return variants
+
+
+# ======================================================
+# ГЕНЕРАЦИЯ
+# ======================================================
+
+def generate(db_path, students: int = 2000, per_student: int = 500,
+             days: int = 365, mix: dict = None, correct_rate: float = 0.6,
+             seed: int = 1, append: bool = False,
+             batch_size: int = BATCH_SIZE) -> dict:
+    """
+    Заполняет базу db_path. Возвращает {"rows", "students",
+    "insert_seconds", "index_seconds", "seconds", "rows_per_s"};
+    rows_per_s — скорость вставки (без построения индексов).
+    """
+    if students <= 0 or per_student <= 0:
+        raise ValueError("Число студентов и решений должно быть положительным")
+
+    rng = random.Random(seed)
+    mix = mix or {task_type: 1.0 for task_type in SOLUTIONS}
+    task_types = list(mix)
+    weights = list(mix.values())
+    texts = _task_texts()
+    rows = students * per_student
+
+    original_path = database.DB_PATH
+    database.DB_PATH = Path(db_path)
+    try:
+        database.init_db()
+        conn = database.get_connection()
+    finally:
+        database.DB_PATH = original_path
+
+    started = time.perf_counter()
+    cur = conn.cursor()
+
+    if not append:
+        cur.execute("PRAGMA journal_mode = OFF")
+        cur.execute("PRAGMA synchronous = OFF")
+    cur.execute("SELECT COUNT(*) FROM results")
+    if rows >= cur.fetchone()[0] * SEARCH_REBUILD_SHARE:
+        database.drop_search_index(cur)
+    cur.execute("DROP INDEX IF EXISTS idx_results_user_created")
+
+    # --- Пользователи: один хеш на всех — расчёт KDF на каждого
+    # студента занял бы минуты (у настоящих пользователей соль своя)
+    password_hash = passwords.hash_password(DEFAULT_PASSWORD)
+    usernames = [f"student{i:05d}" for i in range(students)]
+    cur.executemany("""
+        INSERT OR IGNORE INTO users (username, password_hash, role, is_active)
+        VALUES (?, ?, 'student', 1)
+    """, ((u, password_hash) for u in usernames))
+    user_ids = dict(cur.execute("SELECT username, id FROM users"))
+    user_ids = [user_ids[u] for u in usernames]
+
+    # --- Справочники
+    def lookup_ids(table, column, values):
+        cur.executemany(
+            f"INSERT OR IGNORE INTO {table} ({column}) VALUES (?)",
+            ((v,) for v in values)
+        )
+        return dict(cur.execute(f"SELECT {column}, id FROM {table}"))
+
+    type_ids = lookup_ids("task_types", "name", task_types)
+
+    # --- Отзывы о неверных решениях: {(тип, код): [(шаблон, аргументы)]}
+    wrong_feedback = {
+        (task_type, code): _wrong_feedback(rng, task_type, code)
+        for task_type in task_types
+        for code in SOLUTIONS[task_type][1]
+    }
+    feedback_ids = lookup_ids("feedback_texts", "text", {feedback.CORRECT} | {
+        template
+        for variants in wrong_feedback.values()
+        for template, _ in variants
+    })
+    correct_feedback = (feedback_ids[feedback.CORRECT], None)
+
+    # --- Тексты решений по типам:
+    # (id верных, [(id неверного, [(id шаблона, аргументы)])])
+    codes = {}
+    for task_type in task_types:
+        correct, wrong = SOLUTIONS[task_type]
+        codes[task_type] = (
+            [database.insert_code_blob(cur, c) for c in correct],
+            [(database.insert_code_blob(cur, c), [
+                (feedback_ids[template], args)
+                for template, args in wrong_feedback[task_type, c]
+            ]) for c in wrong]
+        )
+    conn.commit()
+
+    # --- Результаты: по времени от (сейчас - days) до сейчас;
+    # id растут вместе со временем, как при реальной работе
+    end = int(time.time())
+    start = end - days * 86400
+    step = days * 86400 / rows
+
+    # случайные значения выбираются заранее целыми списками
+    # или через random() с индексом: это в несколько раз
+    # быстрее rng.choice в цикле
+    row_types = rng.choices(task_types, weights, k=rows)
+    row_users = rng.choices(user_ids, k=rows)
+    rand = rng.random
+
+    inserted = 0
+
+    while inserted < rows:
+        count = min(batch_size, rows - inserted)
+        batch = []
+        for i in range(inserted, inserted + count):
+            task_type = row_types[i]
+            correct_codes, wrong_codes = codes[task_type]
+            task_texts = texts[task_type]
+
+            if rand() < correct_rate:
+                is_correct = 1
+                code_id = correct_codes[int(rand() * len(correct_codes))]
+                feedback_id, args = correct_feedback
+            else:
+                is_correct = 0
+                code_id, variants = wrong_codes[int(rand() * len(wrong_codes))]
+                feedback_id, args = variants[int(rand() * len(variants))]
+
+            batch.append((
+                row_users[i],
+                task_texts[int(rand() * len(task_texts))],
+                type_ids[task_type],
+                code_id,
+                is_correct,
+                feedback_id,
+                args,
+                start + int(i * step)
+            ))
+
+        cur.executemany("""
+            INSERT INTO results (
+                user_id, task_text, task_type_id, code_id,
+                is_correct, feedback_id, feedback_args, created_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, batch)
+        conn.commit()
+        inserted += count
+
+    inserted_at = time.perf_counter()
+
+    database.create_schema(cur)  # индексы, поиск
+    conn.commit()
+    cur.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+
+    finished = time.perf_counter()
+    insert_seconds = inserted_at - started
+    return {
+        "rows": rows,
+        "students": students,
+        "insert_seconds": insert_seconds,
+        "index_seconds": finished - inserted_at,
+        "seconds": finished - started,
+        "rows_per_s": rows / insert_seconds
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Синтетическая база результатов")
+    parser.add_argument("--output", default=os.path.join(
+        PROJECT_ROOT, "data", "synthetic.db"
+    ))
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--per-student", type=int, default=500,
+                        help="решений на студента (в среднем)")
+    parser.add_argument("--days", type=int, default=365,
+                        help="за сколько дней распределить решения")
+    parser.add_argument("--mix", default="",
+                        help="веса типов заданий: list_sum=3,text_words=1 "
+                             "(по умолчанию — поровну)")
+    parser.add_argument("--correct-rate", type=float, default=0.6)
+    parser.add_argument("--seed", type=int, default=1)
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--force", action="store_true",
+                       help="перезаписать существующий файл")
+    group.add_argument("--append", action="store_true",
+                       help="дописать в существующую базу")
+    args = parser.parse_args()
+
+    output = Path(args.output)
+    if output.exists() and not args.append:
+        if not args.force:
+            print(f"Файл {output} уже существует (--force или --append)")
+            sys.exit(1)
+        output.unlink()
+
+    try:
+        mix = parse_mix(args.mix) if args.mix else None
+    except ValueError as e:
+        print(f"Ошибка: {e}")
+        sys.exit(1)
+
+    stats = generate(
+        output,
+        students=args.students,
+        per_student=args.per_student,
+        days=args.days,
+        mix=mix,
+        correct_rate=args.correct_rate,
+        seed=args.seed,
+        append=args.append
+    )
+
+    print(f"{output}: {stats['rows']} решений, {stats['students']} студентов, "
+          f"{stats['seconds']:.1f} с")
+    print(f"  вставка: {stats['insert_seconds']:.1f} с "
+          f"({stats['rows_per_s']:,.0f} строк/с)")
+    print(f"  индексы и поиск: {stats['index_seconds']:.1f} с")
+
+
+if __name__ == "__main__":
+    main()
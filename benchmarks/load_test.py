@@ -0,0 +1,241 @@
+# benchmarks/load_test.py
+# Нагрузочный тест HTTP-сервиса (server.py).
+#
+# Запуск:
+#   python benchmarks/load_test.py --spawn [--endpoint check]
+#       [--clients 32] [--duration 10]
+#   python benchmarks/load_test.py --port 8080 --endpoint mix
+#
+# Каждый клиент держит одно keep-alive соединение и отправляет
+# запросы подряд. В конце выводятся запросов/с, перцентили
+# задержки и распределение кодов ответа. С --spawn сервис
+# запускается на свободном порту и останавливается после теста.
+# Для /check и /statistics клиент сначала входит (--username/--password)
+# и передаёт токен сессии в каждом запросе.
+
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import statistics
+import subprocess
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+CHECK_PAYLOADS = [
+    {
+        "task_type": "list_sum",
+        "user_code": "result = sum(data)",
+        "input_data": "data = Список: [1, 2, 3, 4, 5, 6]",
+        "expected_result": 21
+    },
+    # неверное решение — проверяется и путь с отказом
+    {
+        "task_type": "list_sort",
+        "user_code": "result = sorted(data, reverse=True)",
+        "input_data": "data = Список: [5, 3, 9, 1]",
+        "expected_result": [1, 3, 5, 9]
+    },
+    {
+        "task_type": "text_words",
+        "user_code": "result = len(text.split())",
+        "input_data": 'data = Строка текста: "Анализ данных и машинное обучение"',
+        "expected_result": 5
+    }
+]
+
+PREDICT_PAYLOADS = [
+    {"task_text": "Посчитайте сумму всех элементов в списке."},
+    {"task_text": "Подсчитайте количество слов в предложении."},
+    {"task_text": "Отсортируйте список по возрастанию."}
+]
+
+ENDPOINTS = {
+    "health": lambda: ("GET", "/health", None),
+    "generate": lambda: ("GET", "/generate", None),
+    "predict": lambda: ("POST", "/predict", random.choice(PREDICT_PAYLOADS)),
+    "check": lambda: ("POST", "/check", random.choice(CHECK_PAYLOADS)),
+    "statistics": lambda: ("GET", "/statistics", None)
+}
+
+# Смесь запросов, близкая к работе студента:
+# на одно сгенерированное задание — несколько попыток проверки
+MIX = ["generate"] + ["check"] * 3 + ["predict"]
+
+# Эндпоинты, требующие входа
+AUTH_ENDPOINTS = ("check", "statistics", "mix")
+
+
+async def _request(reader, writer, host, method, path, payload, token=None):
+    body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+    auth = f"Authorization: Bearer {token}\r\n" if token else ""
+    writer.write((
+        f"{method} {path} HTTP/1.1\r\n"
+        f"Host: {host}\r\n"
+        f"{auth}"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n"
+    ).encode("latin-1") + body)
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    data = await reader.readexactly(length)
+    return status, data
+
+
+async def login(host, port, username, password) -> str:
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        status, data = await _request(
+            reader, writer, host, "POST", "/login",
+            {"username": username, "password": password}
+        )
+    finally:
+        writer.close()
+
+    if status != 200:
+        raise RuntimeError(f"Вход не выполнен: {data.decode('utf-8')}")
+    return json.loads(data)["token"]
+
+
+async def _client(host, port, endpoint, deadline, latencies, statuses,
+                  token):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            name = random.choice(MIX) if endpoint == "mix" else endpoint
+            method, path, payload = ENDPOINTS[name]()
+
+            started = time.perf_counter()
+            status, _ = await _request(
+                reader, writer, host, method, path, payload, token
+            )
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, endpoint, clients, duration,
+                   username=None, password=None) -> dict:
+    latencies, statuses = [], {}
+
+    token = None
+    if endpoint in AUTH_ENDPOINTS:
+        token = await login(host, port, username, password)
+
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _client(host, port, endpoint, deadline, latencies, statuses, token)
+        for _ in range(clients)
+    ))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    return {
+        "endpoint": endpoint,
+        "clients": clients,
+        "requests": len(latencies),
+        "seconds": elapsed,
+        "rps": len(latencies) / elapsed,
+        "mean_ms": statistics.mean(latencies) * 1000 if latencies else 0.0,
+        "p50_ms": percentile(0.50) if latencies else 0.0,
+        "p95_ms": percentile(0.95) if latencies else 0.0,
+        "p99_ms": percentile(0.99) if latencies else 0.0,
+        "statuses": {str(k): v for k, v in sorted(statuses.items())}
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn_server(port: int, workers: int = None) -> subprocess.Popen:
+    cmd = [sys.executable, "server.py", "--port", str(port)]
+    if workers:
+        cmd += ["--workers", str(workers)]
+    proc = subprocess.Popen(cmd, cwd=PROJECT_ROOT)
+
+    # ждём, пока сервис начнёт принимать соединения
+    for _ in range(300):
+        if proc.poll() is not None:
+            raise RuntimeError("Сервис завершился при запуске")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+
+    proc.terminate()
+    raise RuntimeError("Сервис не запустился за 30 секунд")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест HTTP-сервиса")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--endpoint", default="check",
+                        choices=sorted(ENDPOINTS) + ["mix"])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--spawn", action="store_true",
+                        help="запустить сервис на свободном порту")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="процессов проверки для --spawn")
+    parser.add_argument("--username", default="teacher",
+                        help="пользователь для эндпоинтов со входом")
+    parser.add_argument("--password", default="teacher123")
+    parser.add_argument("--json", action="store_true", help="вывод в JSON")
+    args = parser.parse_args()
+
+    proc = None
+    if args.spawn:
+        args.host, args.port = "127.0.0.1", _free_port()
+        proc = spawn_server(args.port, args.workers)
+
+    try:
+        result = asyncio.run(run_load(
+            args.host, args.port, args.endpoint, args.clients, args.duration,
+            args.username, args.password
+        ))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    if args.json:
+        print(json.dumps(result, indent=4, ensure_ascii=False))
+        return
+
+    print(f"{result['endpoint']}: {result['requests']} запросов за "
+          f"{result['seconds']:.1f} с, {result['rps']:.0f} запросов/с "
+          f"({result['clients']} клиентов)")
+    print(f"Задержка: средняя {result['mean_ms']:.1f} мс, "
+          f"p50 {result['p50_ms']:.1f}, p95 {result['p95_ms']:.1f}, "
+          f"p99 {result['p99_ms']:.1f} мс")
+    print("Коды ответа: " + ", ".join(
+        f"{k}: {v}" for k, v in result["statuses"].items()
+    ))
+
+
+if __name__ == "__main__":
+    main()
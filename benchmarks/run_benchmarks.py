@@ -0,0 +1,457 @@
+# benchmarks/run_benchmarks.py
+# Набор замеров основных путей без графического интерфейса:
+#   - classify_task: по одному тексту и пакетом (classify_tasks);
+#   - generate_task: задержка;
+#   - check_solution: пропускная способность на наборе верных,
+#     неверных и вредоносных решений;
+#   - save_result, get_students_statistics, search_results и аналитика
+#     (ml/analytics.py: первый расчёт и повторный после новых решений)
+#     на временной БД с 10 тыс. и 1 млн записей;
+#   - вход: стоимость хеша пароля (ml/passwords.py), вход с переводом
+#     старого хеша и входов/с при одновременном входе группы
+#     (sessions.login_async, как в server.py);
+#   - холодный импорт main (см. bench_startup.py).
+#
+# Запуск:
+#   python benchmarks/run_benchmarks.py [--quick] [--output result.json]
+#       [--baseline benchmarks/baseline.json] [--tolerance 0.25]
+#       [--save-baseline]
+#
+# Результат — JSON с описанием окружения. При наличии базового
+# замера (--baseline) каждый показатель сравнивается с ним:
+# *_ms — чем меньше, тем лучше, *_per_s — чем больше, тем лучше.
+# Код возврата 1, если какой-либо показатель хуже базового
+# больше чем на --tolerance (доля); 3, если файла базового замера
+# нет и сравнивать не с чем (сохраняется он флагом --save-baseline
+# на той машине, где замеры будут повторяться).
+
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime
+from pathlib import Path
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+import ml.database as database  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(PROJECT_ROOT, "benchmarks", "baseline.json")
+DATASET_PATH = os.path.join(PROJECT_ROOT, "data", "tasks_dataset.csv")
+
+DB_SIZES = (10_000, 1_000_000)
+QUICK_DB_SIZES = (10_000,)
+
+# Коды возврата
+EXIT_REGRESSION = 1
+EXIT_NO_BASELINE = 3
+
+STUDENTS = 500
+
+LOGIN_PASSWORD = "student123"
+LOGIN_CLIENTS = 32
+
+# Набор решений для check_solution: (категория, тип, код, вход, ожидаемое)
+LIST_INPUT = "data = Список: [3, 8, 1, 4, 6]"
+TEXT_INPUT = 'data = Строка текста: "Анализ данных и машинное обучение"'
+
+CHECK_CORPUS = [
+    ("correct", "list_sum", "result = sum(data)", LIST_INPUT, 22),
+    ("correct", "list_even",
+     "result = len([x for x in data if x % 2 == 0])", LIST_INPUT, 3),
+    ("correct", "list_sort", "result = sorted(data)", LIST_INPUT,
+     [1, 3, 4, 6, 8]),
+    ("correct", "text_words", "result = len(text.split())", TEXT_INPUT, 5),
+    ("correct", "list_sum",
+     "result = 0\nfor x in data:\n    result += x", LIST_INPUT, 22),
+    ("incorrect", "list_sum", "result = max(data)", LIST_INPUT, 22),
+    ("incorrect", "list_sort", "result = data", LIST_INPUT, [1, 3, 4, 6, 8]),
+    ("incorrect", "text_words", "result = len(text)", TEXT_INPUT, 5),
+    ("incorrect", "list_even", "result = data[10]", LIST_INPUT, 3),
+    ("incorrect", "list_sum", "result = sum(data", LIST_INPUT, 22),
+    ("malicious", "list_sum", "import os\nresult = os.getcwd()",
+     LIST_INPUT, 22),
+    ("malicious", "list_sum", "from subprocess import run\nresult = 0",
+     LIST_INPUT, 22),
+    ("malicious", "list_sum",
+     "result = ().__class__.__bases__[0].__subclasses__()", LIST_INPUT, 22),
+    ("malicious", "list_sum", "f = lambda: open('/etc/passwd')\nresult = f()",
+     LIST_INPUT, 22),
+    ("malicious", "list_sum",
+     "try:\n    result = 1\nexcept Exception:\n    pass", LIST_INPUT, 22),
+]
+
+
+# ======================================================
+# ВСПОМОГАТЕЛЬНОЕ
+# ======================================================
+
+def _timings(fn, runs: int) -> list:
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def _summary(times: list) -> dict:
+    times = sorted(times)
+    return {
+        "median_ms": statistics.median(times) * 1000,
+        "p95_ms": times[min(len(times) - 1, int(len(times) * 0.95))] * 1000
+    }
+
+
+def _load_texts(limit: int = 2000) -> list:
+    import csv
+
+    with open(DATASET_PATH, encoding="utf-8") as f:
+        texts = [row["task_text"] for row in csv.DictReader(f)]
+    return texts[:limit]
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> dict:
+    versions = {}
+    for name in ("numpy", "scipy", "sklearn", "pandas", "joblib"):
+        try:
+            versions[name] = __import__(name).__version__
+        except ImportError:
+            versions[name] = None
+
+    return {
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "sqlite": sqlite3.sqlite_version,
+        "packages": versions
+    }
+
+
+# ======================================================
+# ЗАМЕРЫ
+# ======================================================
+
+def bench_classify(runs: int, batch_size: int) -> dict:
+    from ml.task_classifier import classify_task, classify_tasks, load_model
+
+    texts = _load_texts()
+    load_model()
+    classify_task(texts[0])
+
+    started = time.perf_counter()
+    for i in range(runs):
+        classify_task(texts[i % len(texts)])
+    single = time.perf_counter() - started
+
+    batch = (texts * (batch_size // len(texts) + 1))[:batch_size]
+    batch_times = _timings(lambda: classify_tasks(batch), 5)
+
+    return {
+        "single_per_s": runs / single,
+        "single_mean_ms": single / runs * 1000,
+        "batch_size": batch_size,
+        "batch_per_s": batch_size / min(batch_times),
+        "batch_ms": min(batch_times) * 1000
+    }
+
+
+def bench_generate(runs: int) -> dict:
+    from ml.task_generator import generate_task
+
+    random.seed(0)
+    generate_task()
+    return _summary(_timings(generate_task, runs))
+
+
+def bench_check(runs: int) -> dict:
+    from ml.checkers import check_solution
+
+    result = {}
+    for category in ("correct", "incorrect", "malicious"):
+        corpus = [c[1:] for c in CHECK_CORPUS if c[0] == category]
+        for args in corpus:
+            check_solution(*args)
+
+        started = time.perf_counter()
+        for i in range(runs):
+            check_solution(*corpus[i % len(corpus)])
+        elapsed = time.perf_counter() - started
+
+        result[category] = {
+            "per_s": runs / elapsed,
+            "mean_ms": elapsed / runs * 1000
+        }
+    return result
+
+
+def bench_db(rows: int, runs: int) -> dict:
+    from generate_db import generate
+    from ml import analytics
+
+    original_path = database.DB_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = Path(tmp) / "system.db"
+        try:
+            filled = generate(
+                database.DB_PATH,
+                students=STUDENTS,
+                per_student=max(1, rows // STUDENTS),
+                seed=0
+            )
+
+            analytics_times = _timings(analytics.task_type_stats, 1)
+
+            save_times = _timings(
+                lambda: database.save_result(
+                    "student00000", "Задание list_sum", "list_sum",
+                    "result = sum(data)", True, "Решение верное"
+                ),
+                runs
+            )
+            stats_times = _timings(database.get_students_statistics, 3)
+            history_times = _timings(
+                lambda: database.get_results_by_user("student00001"), 5
+            )
+            search_times = _timings(
+                lambda: database.search_results(
+                    "reverse", column="code", order="rank"
+                ), 5
+            )
+            search_recent_times = _timings(
+                lambda: database.search_results("result", order="recent"), 5
+            )
+            # слово почти из каждого решения: ранжируется
+            # ограниченный набор совпадений
+            search_rank_times = _timings(
+                lambda: database.search_results("result", order="rank"), 5
+            )
+            # после save_result: досчёт новых строк в куб
+            analytics_update_times = _timings(analytics.task_type_stats, 1)
+        finally:
+            database.DB_PATH = original_path
+
+    return {
+        "rows": rows,
+        "fill_rows_per_s": filled["rows_per_s"],
+        "fill_index_ms": filled["index_seconds"] * 1000,
+        "save_result": _summary(save_times),
+        "statistics_ms": min(stats_times) * 1000,
+        "results_by_user_ms": min(history_times) * 1000,
+        "search_ms": min(search_times) * 1000,
+        "search_recent_ms": min(search_recent_times) * 1000,
+        "search_rank_ms": min(search_rank_times) * 1000,
+        "analytics_ms": min(analytics_times) * 1000,
+        "analytics_update_ms": min(analytics_update_times) * 1000
+    }
+
+
+def bench_login(logins: int, clients: int = LOGIN_CLIENTS) -> dict:
+    import asyncio
+    from ml import async_db, passwords, sessions
+    from ml.auth import init_system
+
+    usernames = [f"login{i:04d}" for i in range(clients)]
+    legacy = [f"legacy{i:04d}" for i in range(5)]
+
+    original_path = database.DB_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = Path(tmp) / "system.db"
+        try:
+            init_system()
+
+            # один хеш на всех: стоимость проверки от соли не зависит
+            password_hash = passwords.hash_password(LOGIN_PASSWORD)
+            legacy_hash = passwords._legacy_hash(LOGIN_PASSWORD)
+            conn = database.get_connection()
+            conn.executemany("""
+                INSERT INTO users (username, password_hash, role)
+                VALUES (?, ?, 'student')
+            """, [(u, password_hash) for u in usernames]
+                + [(u, legacy_hash) for u in legacy])
+            conn.commit()
+            conn.close()
+
+            hash_times = _timings(
+                lambda: passwords.hash_password(LOGIN_PASSWORD), 5
+            )
+            login_times = _timings(
+                lambda: sessions.login(usernames[0], LOGIN_PASSWORD), 5
+            )
+            # первый вход со старым хешем: проверка SHA-256,
+            # расчёт нового хеша и его запись
+            upgrade_times = []
+            for username in legacy:
+                started = time.perf_counter()
+                sessions.login(username, LOGIN_PASSWORD)
+                upgrade_times.append(time.perf_counter() - started)
+
+            async def cohort():
+                async def client(username):
+                    for _ in range(logins // clients):
+                        if await sessions.login_async(
+                                username, LOGIN_PASSWORD) is None:
+                            raise RuntimeError("Вход не выполнен")
+
+                await async_db.start()
+                try:
+                    started = time.perf_counter()
+                    await asyncio.gather(*(client(u) for u in usernames))
+                    return time.perf_counter() - started
+                finally:
+                    await async_db.stop()
+
+            elapsed = asyncio.run(cohort())
+        finally:
+            passwords.shutdown()
+            database.DB_PATH = original_path
+
+    return {
+        "hash": password_hash.rsplit("$", 2)[0],
+        "kdf_workers": passwords._workers,
+        "hash_ms": statistics.median(hash_times) * 1000,
+        "login_ms": statistics.median(login_times) * 1000,
+        "legacy_upgrade_ms": statistics.median(upgrade_times) * 1000,
+        "logins_per_s": logins // clients * clients / elapsed
+    }
+
+
+def bench_import(runs: int) -> dict:
+    from bench_startup import measure_imports
+
+    result = measure_imports("main", runs)
+    return {
+        "best_ms": result["best_ms"],
+        "median_ms": result["median_ms"],
+        "heavy_modules": result["heavy_modules"]
+    }
+
+
+# ======================================================
+# СРАВНЕНИЕ С БАЗОВЫМ ЗАМЕРОМ
+# ======================================================
+
+def _flatten(data: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Список (показатель, базовое значение, текущее, изменение),
+    ухудшившихся больше чем на tolerance.
+    """
+    current = _flatten(results)
+    previous = _flatten(baseline)
+    regressions = []
+
+    for name, old in previous.items():
+        new = current.get(name)
+        if new is None or old <= 0:
+            continue
+        if name.endswith("_ms"):
+            change = new / old - 1
+        elif name.endswith("_per_s"):
+            change = old / new - 1 if new > 0 else float("inf")
+        else:
+            continue
+        if change > tolerance:
+            regressions.append((name, old, new, change))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замеры производительности")
+    parser.add_argument("--quick", action="store_true",
+                        help="меньше повторов, БД только на 10 тыс. записей")
+    parser.add_argument("--output", help="файл для результата (JSON)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="сохранить результат как базовый замер")
+    args = parser.parse_args()
+
+    runs = 200 if args.quick else 2000
+    db_sizes = QUICK_DB_SIZES if args.quick else DB_SIZES
+
+    results = {}
+
+    print("classify_task...", flush=True)
+    results["classify"] = bench_classify(runs, batch_size=1000)
+    print("generate_task...", flush=True)
+    results["generate"] = bench_generate(runs)
+    print("check_solution...", flush=True)
+    results["check"] = bench_check(runs * 5)
+    for rows in db_sizes:
+        print(f"БД, {rows} записей...", flush=True)
+        results[f"db_{rows}"] = bench_db(rows, runs=50 if args.quick else 200)
+    print("вход...", flush=True)
+    results["login"] = bench_login(64 if args.quick else 320)
+    print("импорт...", flush=True)
+    results["import"] = bench_import(3 if args.quick else 5)
+
+    report = {"environment": environment(), "results": results}
+    text = json.dumps(report, indent=4, ensure_ascii=False)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+
+    status = 0
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"Базовый замер сохранён: {args.baseline}")
+    elif not os.path.exists(args.baseline):
+        print(f"ВНИМАНИЕ: базового замера нет ({args.baseline}) — "
+              f"сравнение не выполнено. Сохраните его флагом "
+              f"--save-baseline", file=sys.stderr)
+        status = EXIT_NO_BASELINE
+    else:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.tolerance)
+        for name, old, new, change in regressions:
+            print(f"РЕГРЕССИЯ: {name}: {old:.3f} -> {new:.3f} "
+                  f"(хуже на {change:.0%})")
+        if regressions:
+            status = EXIT_REGRESSION
+        else:
+            print(f"Регрессий относительно {args.baseline} нет")
+
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,12 +7,25 @@
 
 import sys
 from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QTimer
 
 from ui.login_window import LoginWindow
-from ui.main_window import MainWindow
+from ui.workers import run_in_background
 from ml.auth import init_system
 
 
+def warm_up():
+    """
+    Фоновая подгрузка тяжёлых модулей и модели,
+    пока пользователь вводит логин и пароль.
+    """
+    import ui.main_window  # noqa: F401
+    import pandas  # noqa: F401
+    from ml.predict import reload_model
+
+    reload_model()
+
+
 def main():
     """
     Точка входа десктопного приложения.
@@ -38,6 +51,8 @@ def main():
     # После успешного входа
     # -------------------------------------------------
     def on_login_success(user: dict):
+        from ui.main_window import MainWindow
+
         main_window = MainWindow(
             user=user,
             on_logout=show_login
@@ -48,6 +63,11 @@ def main():
     # Запуск с окна входа
     show_login()
 
+    # Прогрев запускается, когда окно входа уже показано.
+    # Ошибка прогрева (например, модель ещё не обучена) не мешает
+    # работе: модули и модель будут загружены при первом обращении
+    QTimer.singleShot(0, lambda: run_in_background(warm_up))
+
     sys.exit(app.exec_())
 
 
@@ -0,0 +1,360 @@
+import threading
+from datetime import date, datetime
+
+from ml import database, metrics
+
+# ======================================================
+# АНАЛИТИКА ПО ТИПАМ ЗАДАНИЙ И ПЕРИОДАМ
+# ======================================================
+#
+# Показатели:
+#   - доля верных попыток по типу задания и по дням / неделям;
+#   - успех с первой попытки: задание (студент + текст задания)
+#     решено первой же попыткой;
+#   - время решения: от первой попытки до первой верной.
+#
+# История не перечитывается при каждом запросе. Агрегатный SQL
+# сворачивает её в «куб» по (день, тип задания), а отчёты
+# считаются по кубу в памяти:
+#   attempts: (день, id типа) -> [попыток, верных]
+#   tasks:    (день первой попытки, id типа) ->
+#             [заданий, решено с первой, решено, сумма времени решения, с]
+#
+# Новые решения (id больше последнего учтённого) досчитываются
+# в куб при следующем запросе: попытки просто добавляются, а для
+# затронутых заданий вклад до новых строк вычитается и вклад
+# с ними добавляется заново. Так видны и записи других процессов.
+# Куб строится заново после архивирования (меняется archive_terms)
+# и если новых строк больше REBUILD_ROWS.
+#
+# Архивные таблицы сворачиваются в отдельный куб и, как и
+# в ml.database, учитываются только при заданном периоде.
+# Задание, попытки которого разошлись по архиву и results,
+# считается в каждой части отдельно.
+
+REBUILD_ROWS = 50_000
+
+BUCKETS = ("day", "week")
+
+# {"db_path", "synced_id", "archive_terms", "live", "archive"}
+_state = None
+_lock = threading.Lock()
+
+_DAY_SQL = "date({}, 'unixepoch', 'localtime')"
+
+# Состояние задания по его попыткам (группировка по заданию)
+_TASK_STATE_SQL = f"""
+    {_DAY_SQL.format("MIN(created_at)")} AS day,
+    task_type_id,
+    MIN(id) AS first_id,
+    MIN(CASE WHEN is_correct THEN id END) AS solved_id,
+    MIN(created_at) AS first_at,
+    MIN(CASE WHEN is_correct THEN created_at END) AS solved_at
+"""
+
+
+def _empty_cube() -> dict:
+    return {"attempts": {}, "tasks": {}}
+
+
+def _add(cells: dict, key, values, sign: int = 1):
+    entry = cells.get(key)
+    if entry is None:
+        entry = cells[key] = [0] * len(values)
+    for i, value in enumerate(values):
+        entry[i] += sign * value
+
+
+def _task_values(first_id, solved_id, first_at, solved_at) -> tuple:
+    if solved_id is None:
+        return 1, 0, 0, 0
+    return 1, int(first_id == solved_id), 1, solved_at - first_at
+
+
+# ======================================================
+# ПОСТРОЕНИЕ И ДОСЧЁТ КУБА
+# ======================================================
+
+def _build_cube(cur, source: str, max_id: int = None) -> dict:
+    """
+    Куб по строкам source (таблица или подзапрос);
+    max_id — учитывать только строки с id <= max_id.
+    """
+    cube = _empty_cube()
+    where, params = "", ()
+    if max_id is not None:
+        where, params = "WHERE id <= ?", (max_id,)
+
+    cur.execute(f"""
+        SELECT {_DAY_SQL.format("created_at")} AS day, task_type_id,
+               COUNT(*), SUM(is_correct)
+        FROM {source}
+        {where}
+        GROUP BY day, task_type_id
+    """, params)
+    for day, type_id, attempts, correct in cur.fetchall():
+        cube["attempts"][day, type_id] = [attempts, correct or 0]
+
+    # задания сворачиваются в SQL: в Python приходят только суммы
+    cur.execute(f"""
+        SELECT day, task_type_id, COUNT(*),
+               SUM(first_id = solved_id), COUNT(solved_id),
+               SUM(solved_at - first_at)
+        FROM (
+            SELECT {_TASK_STATE_SQL}
+            FROM {source}
+            {where}
+            GROUP BY user_id, task_type_id, task_text
+        )
+        GROUP BY day, task_type_id
+    """, params)
+    for day, type_id, tasks, first_ok, solved, seconds in cur.fetchall():
+        cube["tasks"][day, type_id] = [
+            tasks, first_ok or 0, solved, seconds or 0
+        ]
+
+    return cube
+
+
+def _apply_new_rows(cur, cube: dict, synced_id: int, max_id: int):
+    """
+    Досчитывает в куб строки results с synced_id < id <= max_id.
+    """
+    cur.execute(f"""
+        SELECT {_DAY_SQL.format("created_at")} AS day, task_type_id,
+               COUNT(*), SUM(is_correct)
+        FROM results
+        WHERE id > ? AND id <= ?
+        GROUP BY day, task_type_id
+    """, (synced_id, max_id))
+    for day, type_id, attempts, correct in cur.fetchall():
+        _add(cube["attempts"], (day, type_id), (attempts, correct or 0))
+
+    # затронутые задания: состояние до новых строк и с ними
+    cur.execute(f"""
+        WITH touched AS (
+            SELECT DISTINCT user_id, task_type_id, task_text
+            FROM results
+            WHERE id > ? AND id <= ?
+        )
+        SELECT {_DAY_SQL.format("MIN(r.created_at)")},
+               r.task_type_id,
+               MIN(r.id),
+               MIN(CASE WHEN r.is_correct THEN r.id END),
+               MIN(r.created_at),
+               MIN(CASE WHEN r.is_correct THEN r.created_at END),
+               MIN(CASE WHEN r.id <= ? THEN r.id END),
+               MIN(CASE WHEN r.is_correct AND r.id <= ? THEN r.id END),
+               MIN(CASE WHEN r.is_correct AND r.id <= ?
+                        THEN r.created_at END)
+        FROM touched t
+        JOIN results r
+          ON r.user_id = t.user_id
+         AND r.task_type_id = t.task_type_id
+         AND r.task_text = t.task_text
+        WHERE r.id <= ?
+        GROUP BY t.user_id, t.task_type_id, t.task_text
+    """, (synced_id, max_id, synced_id, synced_id, synced_id, max_id))
+
+    for (day, type_id, first_id, solved_id, first_at, solved_at,
+         old_first_id, old_solved_id, old_solved_at) in cur.fetchall():
+        key = (day, type_id)
+        # первая попытка задания с новыми строками не меняется,
+        # если она была учтена раньше
+        if old_first_id is not None:
+            _add(cube["tasks"], key, _task_values(
+                old_first_id, old_solved_id, first_at, old_solved_at
+            ), sign=-1)
+        _add(cube["tasks"], key, _task_values(
+            first_id, solved_id, first_at, solved_at
+        ))
+
+
+def _archive_terms(cur) -> tuple:
+    cur.execute("SELECT table_name, rows FROM archive_terms ORDER BY term")
+    return tuple(cur.fetchall())
+
+
+def _refresh(cur) -> dict:
+    """
+    Приводит кубы в соответствие с БД. Вызывается под _lock.
+    """
+    global _state
+
+    cur.execute("SELECT COALESCE(MAX(id), 0) FROM results")
+    max_id = cur.fetchone()[0]
+    terms = _archive_terms(cur)
+
+    state = _state
+    if (state is None
+            or state["db_path"] != database.DB_PATH
+            or state["archive_terms"] != terms
+            or max_id < state["synced_id"]
+            or max_id - state["synced_id"] > REBUILD_ROWS):
+        if terms:
+            union = " UNION ALL ".join(
+                f"SELECT {database.RESULT_COLUMNS} FROM {table}"
+                for table, _ in terms
+            )
+            archive = _build_cube(cur, f"({union})")
+        else:
+            archive = _empty_cube()
+
+        state = {
+            "db_path": database.DB_PATH,
+            "synced_id": max_id,
+            "archive_terms": terms,
+            "live": _build_cube(cur, "results", max_id),
+            "archive": archive
+        }
+        metrics.inc("analytics.rebuild")
+    elif max_id > state["synced_id"]:
+        _apply_new_rows(cur, state["live"], state["synced_id"], max_id)
+        state["synced_id"] = max_id
+
+    _state = state
+    return state
+
+
+def _snapshot(date_from=None, date_to=None):
+    """
+    (ячейки попыток, ячейки заданий, {id типа: название})
+    за период; копии, безопасные для чтения вне блокировки.
+    """
+    since, until = database.period_bounds(date_from, date_to)
+    first_day = _day_key(since)
+    last_day = _day_key(until)
+
+    conn = database.get_connection()
+    try:
+        cur = conn.cursor()
+        with _lock:
+            state = _refresh(cur)
+            cubes = [state["live"]]
+            if since is not None or until is not None:
+                cubes.append(state["archive"])
+
+            attempts, tasks = {}, {}
+            for cube in cubes:
+                for cells, target in ((cube["attempts"], attempts),
+                                      (cube["tasks"], tasks)):
+                    for key, values in cells.items():
+                        day = key[0]
+                        if first_day is not None and day < first_day:
+                            continue
+                        if last_day is not None and day >= last_day:
+                            continue
+                        _add(target, key, values)
+
+        cur.execute("SELECT id, name FROM task_types")
+        names = dict(cur.fetchall())
+    finally:
+        conn.close()
+
+    return attempts, tasks, names
+
+
+def _day_key(timestamp):
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d")
+
+
+def invalidate():
+    """
+    Сбрасывает кубы: следующий запрос построит их заново.
+    """
+    global _state
+    with _lock:
+        _state = None
+
+
+# ======================================================
+# ОТЧЁТЫ
+# ======================================================
+
+def _rate(part, total):
+    return round(part / total, 4) if total else None
+
+
+def _summary(attempt_values, task_values) -> dict:
+    attempts, correct = attempt_values or (0, 0)
+    tasks, first_ok, solved, seconds = task_values or (0, 0, 0, 0)
+    return {
+        "attempts": attempts,
+        "correct": correct,
+        "pass_rate": _rate(correct, attempts),
+        "tasks": tasks,
+        "first_attempt_correct": first_ok,
+        "first_attempt_rate": _rate(first_ok, tasks),
+        "solved": solved,
+        "avg_solve_seconds": round(seconds / solved, 1) if solved else None
+    }
+
+
+def _group(attempts: dict, tasks: dict, key_fn):
+    grouped_attempts, grouped_tasks = {}, {}
+    for cells, target in ((attempts, grouped_attempts),
+                          (tasks, grouped_tasks)):
+        for key, values in cells.items():
+            _add(target, key_fn(key), values)
+    return grouped_attempts, grouped_tasks
+
+
+def _week_start(day: str) -> str:
+    """
+    "ГГГГ-ММ-ДД" -> понедельник этой недели в том же формате.
+    """
+    value = date.fromisoformat(day)
+    return date.fromordinal(value.toordinal() - value.weekday()).isoformat()
+
+
+@metrics.timed("analytics.task_type_stats")
+def task_type_stats(date_from=None, date_to=None):
+    """
+    Показатели по типам заданий (см. _summary), по убыванию
+    числа попыток. Период (обе границы включительно) для
+    заданий считается по дню первой попытки.
+    """
+    attempts, tasks, names = _snapshot(date_from, date_to)
+    attempts, tasks = _group(attempts, tasks, lambda key: key[1])
+
+    rows = [
+        {"task_type": names.get(type_id, str(type_id)),
+         **_summary(attempts.get(type_id), tasks.get(type_id))}
+        for type_id in set(attempts) | set(tasks)
+    ]
+    rows.sort(key=lambda r: (-r["attempts"], r["task_type"]))
+    return rows
+
+
+@metrics.timed("analytics.period_stats")
+def period_stats(bucket: str = "day", date_from=None, date_to=None,
+                 task_type: str = None):
+    """
+    Показатели по дням или неделям (bucket = "day" | "week";
+    неделя обозначается датой понедельника), по возрастанию
+    даты. task_type — только этот тип задания.
+    """
+    if bucket not in BUCKETS:
+        raise ValueError(f"Неизвестный интервал: {bucket}")
+
+    attempts, tasks, names = _snapshot(date_from, date_to)
+
+    if task_type is not None:
+        type_ids = {i for i, name in names.items() if name == task_type}
+        attempts = {k: v for k, v in attempts.items() if k[1] in type_ids}
+        tasks = {k: v for k, v in tasks.items() if k[1] in type_ids}
+
+    if bucket == "week":
+        attempts, tasks = _group(
+            attempts, tasks, lambda key: _week_start(key[0])
+        )
+    else:
+        attempts, tasks = _group(attempts, tasks, lambda key: key[0])
+
+    return [
+        {"period": period,
+         **_summary(attempts.get(period), tasks.get(period))}
+        for period in sorted(set(attempts) | set(tasks))
+    ]
@@ -0,0 +1,302 @@
+import queue
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ml import database, metrics, passwords, results_cache
+
+# ======================================================
+# АСИНХРОННЫЙ ДОСТУП К БД (для HTTP-сервиса)
+# ======================================================
+#
+# Функции ml/database.py блокирующие. Чтобы они не останавливали
+# цикл событий asyncio:
+#   - чтение выполняется в небольшом пуле потоков; база переводится
+#     в режим WAL, поэтому читатели не ждут писателя;
+#   - запись идёт через одну очередь и один поток с собственным
+#     соединением. Поток забирает из очереди всё накопившееся
+#     и выполняет это одной транзакцией: при одновременных
+#     запросах вместо N фиксаций на диск получается одна.
+#
+# Каждая операция записи выполняется внутри SAVEPOINT, так что
+# ошибка одной операции не отменяет остальные в той же транзакции.
+#
+# Использование:
+#   await async_db.start()
+#   result_id = await async_db.save_result(...)
+#   stats = await async_db.get_students_statistics()
+#   await async_db.stop()
+
+READ_WORKERS = 4
+
+# Наибольшее число операций записи в одной транзакции
+MAX_BATCH = 256
+
+_readers = None
+_writer = None
+_queue = None
+
+# Счётчики для оценки группировки записи
+_counters = {"transactions": 0, "writes": 0}
+
+_STOP = object()
+
+
+# ======================================================
+# ПОТОК ЗАПИСИ
+# ======================================================
+
+def _resolve(future, result=None, error=None):
+    # вызывается в потоке цикла событий
+    if future.cancelled():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+def _run_batch(conn, batch):
+    """
+    Выполняет операции одной транзакцией.
+    Возвращает список (future, loop, result, error).
+    """
+    cur = conn.cursor()
+    outcomes = []
+
+    try:
+        cur.execute("BEGIN IMMEDIATE")
+        for fn, args, future, loop in batch:
+            cur.execute("SAVEPOINT op")
+            try:
+                result = fn(cur, *args)
+            except Exception as e:
+                cur.execute("ROLLBACK TO op")
+                cur.execute("RELEASE op")
+                outcomes.append((future, loop, None, e))
+            else:
+                cur.execute("RELEASE op")
+                outcomes.append((future, loop, result, None))
+        conn.commit()
+    except Exception as e:
+        # например, база заблокирована другим процессом дольше таймаута
+        if conn.in_transaction:
+            conn.rollback()
+        return [(future, loop, None, e) for _, _, future, loop in batch]
+
+    _counters["transactions"] += 1
+    _counters["writes"] += len(batch)
+    return outcomes
+
+
+def _writer_loop(q: queue.Queue):
+    conn = database.get_connection()
+    # транзакциями управляем сами (BEGIN IMMEDIATE / SAVEPOINT)
+    conn.isolation_level = None
+
+    try:
+        while True:
+            item = q.get()
+            if item is _STOP:
+                break
+
+            batch = [item]
+            stopping = False
+            while len(batch) < MAX_BATCH:
+                try:
+                    item = q.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            with metrics.timer("db.write_batch"):
+                outcomes = _run_batch(conn, batch)
+            metrics.inc("db.batched_writes", len(batch))
+
+            for future, loop, result, error in outcomes:
+                loop.call_soon_threadsafe(_resolve, future, result, error)
+
+            if stopping:
+                break
+    finally:
+        conn.close()
+
+
+# ======================================================
+# ЗАПУСК И ОСТАНОВКА
+# ======================================================
+
+def _enable_wal():
+    conn = database.get_connection()
+    try:
+        # режим WAL сохраняется в файле базы
+        conn.execute("PRAGMA journal_mode=WAL")
+    finally:
+        conn.close()
+
+
+async def start(read_workers: int = READ_WORKERS):
+    global _readers, _writer, _queue
+
+    if _writer is not None:
+        return
+
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, _enable_wal)
+
+    _readers = ThreadPoolExecutor(
+        max_workers=read_workers,
+        thread_name_prefix="db-read"
+    )
+    _queue = queue.Queue()
+    _writer = threading.Thread(
+        target=_writer_loop,
+        args=(_queue,),
+        name="db-write",
+        daemon=True
+    )
+    _writer.start()
+
+
+async def stop():
+    """
+    Дожидается записи всех поставленных в очередь операций.
+    """
+    global _readers, _writer, _queue
+
+    if _writer is None:
+        return
+
+    _queue.put(_STOP)
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, _writer.join)
+    _readers.shutdown(wait=True)
+
+    _readers = _writer = _queue = None
+
+
+def stats() -> dict:
+    """
+    Число транзакций записи и операций в них.
+    """
+    return dict(_counters)
+
+
+# ======================================================
+# ОБЩИЕ ОПЕРАЦИИ
+# ======================================================
+
+async def read(fn, *args):
+    """
+    Выполняет блокирующую функцию чтения fn(*args) в пуле читателей.
+    """
+    if _readers is None:
+        raise RuntimeError("Доступ к БД не запущен: вызовите start()")
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_readers, fn, *args)
+
+
+async def write(fn, *args):
+    """
+    Ставит fn(cur, *args) в очередь записи и возвращает её результат
+    после фиксации транзакции.
+    """
+    if _queue is None:
+        raise RuntimeError("Доступ к БД не запущен: вызовите start()")
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    _queue.put((fn, args, future, loop))
+    return await future
+
+
+# ======================================================
+# ФУНКЦИИ ПРИЛОЖЕНИЯ
+# ======================================================
+
+async def check_password(username: str, password: str):
+    """
+    database.check_password без расчёта хеша в пуле чтения:
+    хеширование выполняется в пуле ml/passwords.py.
+    """
+    user = await get_user(username)
+    if user is None or not user["is_active"]:
+        await passwords.verify_dummy_async(password)
+        return None
+    if not await passwords.verify_password_async(
+            password, user["password_hash"]):
+        return None
+
+    old_hash = user["password_hash"]
+    if passwords.needs_rehash(old_hash):
+        new_hash = await passwords.hash_password_async(password)
+        if await write(database.replace_password_hash,
+                       username, old_hash, new_hash):
+            user["password_hash"] = new_hash
+    return user
+
+
+async def authenticate(username: str, password: str):
+    user = await check_password(username, password)
+    if user is None:
+        return None
+    return {"username": user["username"], "role": user["role"]}
+
+
+async def get_user(username: str):
+    return await read(database.get_user, username)
+
+
+async def get_results_by_user(username: str, date_from=None, date_to=None):
+    # кэш хранит только неархивные записи; запрос за период
+    # (возможно, с архивом) идёт в БД
+    if date_from is None and date_to is None:
+        return await read(results_cache.get_results, username)
+    return await read(
+        database.get_results_by_user, username, date_from, date_to
+    )
+
+
+async def get_students_statistics(date_from=None, date_to=None):
+    return await read(database.get_students_statistics, date_from, date_to)
+
+
+async def get_students_statistics_page(offset: int = 0,
+                                       limit: int = database.PAGE_SIZE,
+                                       order_by: str = "username",
+                                       descending: bool = False,
+                                       search: str = None,
+                                       date_from=None, date_to=None):
+    return await read(
+        database.get_students_statistics_page,
+        offset, limit, order_by, descending, search, date_from, date_to
+    )
+
+
+async def search_results(query: str, offset: int = 0,
+                         limit: int = database.PAGE_SIZE, column: str = None,
+                         username: str = None, order: str = "recent"):
+    return await read(
+        database.search_results,
+        query, offset, limit, column, username, order
+    )
+
+
+async def get_results_since(username: str, since_id: int = 0):
+    return await read(results_cache.get_results_since, username, since_id)
+
+
+async def save_result(username, task_text, task_type, user_code,
+                      is_correct, feedback) -> int:
+    row = await write(
+        database.insert_result,
+        username, task_text, task_type, user_code, is_correct, feedback
+    )
+    results_cache.add_result(username, row)
+    return row["id"]
+
+
+async def log_admin_action(admin: str, action: str) -> dict:
+    return await write(database.insert_admin_log, admin, action)
@@ -1,29 +1,56 @@
-import hashlib
-
 from ml.database import (
-    init_db,
-    get_connection
+    get_connection,
+    create_schema,
+    get_schema_version,
+    set_schema_version,
+    check_password,
+    SCHEMA_VERSION
 )
-
-# -------------------------------------------------
-# ВСПОМОГАТЕЛЬНОЕ
-# -------------------------------------------------
-
-def hash_password(password: str) -> str:
-    return hashlib.sha256(password.encode("utf-8")).hexdigest()
+from ml.passwords import hash_password
 
 
 # -------------------------------------------------
 # ИНИЦИАЛИЗАЦИЯ СИСТЕМЫ
 # -------------------------------------------------
 
-def init_system():
-    init_db()
+# пользователи по умолчанию
+DEFAULT_USERS = (
+    ("student", "student", "student123"),
+    ("teacher", "teacher", "teacher123"),
+    ("admin", "admin", "admin123"),
+)
 
-    # пользователи по умолчанию
-    register_user("student", "student", "student123")
-    register_user("teacher", "teacher", "teacher123")
-    register_user("admin", "admin", "admin123")
+
+def init_system():
+    """
+    Создаёт схему БД и пользователей по умолчанию.
+    Если БД уже инициализирована текущей версией — выполняется
+    один запрос; иначе всё делается в одной транзакции.
+    """
+    conn = get_connection()
+    try:
+        if get_schema_version(conn) >= SCHEMA_VERSION:
+            return
+
+        # IMMEDIATE — чтобы два процесса не инициализировали БД одновременно
+        conn.execute("BEGIN IMMEDIATE")
+        if get_schema_version(conn) >= SCHEMA_VERSION:
+            conn.rollback()
+            return
+
+        cur = conn.cursor()
+        create_schema(cur)
+        cur.executemany("""
+            INSERT OR IGNORE INTO users (username, password_hash, role)
+            VALUES (?, ?, ?)
+        """, [
+            (username, hash_password(password), role)
+            for username, role, password in DEFAULT_USERS
+        ])
+        set_schema_version(conn)
+        conn.commit()
+    finally:
+        conn.close()
 
 
 # -------------------------------------------------
@@ -54,25 +81,17 @@ def register_user(username: str, role: str, password: str):
 # -------------------------------------------------
 
 def login(username: str, password: str):
+    """
+    Вход в приложение; хеш старого формата при этом заменяется
+    (см. ml/passwords.py). Заблокированный пользователь не входит.
+    """
     if not username or not password:
         return None
 
-    password_hash = hash_password(password)
-
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT username, role
-        FROM users
-        WHERE username = ? AND password_hash = ?
-    """, (username, password_hash))
-
-    row = cur.fetchone()
-    conn.close()
-
-    if row:
-        return {"username": row[0], "role": row[1]}
-    return None
+    user = check_password(username, password)
+    if user is None:
+        return None
+    return {"username": user["username"], "role": user["role"]}
 
 
 # -------------------------------------------------
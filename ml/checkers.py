@@ -1,4 +1,7 @@
 import ast
+import builtins
+
+from ml import feedback, metrics
 
 # ======================================================
 # AST-БЕЗОПАСНОСТЬ
@@ -20,13 +23,30 @@ def ast_security_check(code: str):
     for node in ast.walk(tree):
         if isinstance(node, FORBIDDEN_NODES):
             raise ValueError("В коде использованы запрещённые конструкции")
+        # через служебные атрибуты (__class__, __globals__ ...)
+        # можно добраться до встроенных функций в обход SAFE_BUILTINS
+        if isinstance(node, ast.Attribute) and node.attr.startswith("__"):
+            raise ValueError("В коде использованы запрещённые конструкции")
 
 # ======================================================
 # ВЫПОЛНЕНИЕ КОДА ПОЛЬЗОВАТЕЛЯ
 # ======================================================
 
+# Встроенные функции, доступные коду пользователя: без __import__,
+# open, eval, exec, getattr и прочего, что даёт доступ к системе
+SAFE_BUILTINS = {
+    name: getattr(builtins, name)
+    for name in (
+        "abs", "all", "any", "bool", "chr", "dict", "divmod",
+        "enumerate", "filter", "float", "frozenset", "int",
+        "isinstance", "len", "list", "map", "max", "min", "ord",
+        "pow", "range", "reversed", "round", "set", "sorted", "str",
+        "sum", "tuple", "zip"
+    )
+}
+
 def run_user_code(code: str, env: dict):
-    exec(code, {}, env)
+    exec(code, {"__builtins__": SAFE_BUILTINS}, env)
     return env.get("result")
 
 # ======================================================
@@ -57,6 +77,7 @@ def parse_input(input_data: str):
 # ОСНОВНАЯ ФУНКЦИЯ ПРОВЕРКИ
 # ======================================================
 
+@metrics.timed("check.total")
 def check_solution(
     task_type: str,
     user_code: str,
@@ -64,14 +85,14 @@ def check_solution(
     expected_result
 ):
     if "result" not in user_code:
-        return False, "В решении должна быть переменная result"
+        return False, feedback.NO_RESULT
 
     # --- Проверка AST
     try:
-        ast_security_check(user_code)
-        ast.parse(user_code)
+        with metrics.timer("check.ast"):
+            ast_security_check(user_code)
     except Exception as e:
-        return False, f"Ошибка в коде: {e}"
+        return False, feedback.CODE_ERROR.format(e)
 
     # --- Подготовка окружения
     env = {}
@@ -82,21 +103,19 @@ def check_solution(
         else:
             env["text"] = parsed_data
     except Exception:
-        return False, "Ошибка разбора входных данных"
+        return False, feedback.BAD_INPUT
 
     # --- Выполнение кода пользователя
     try:
-        user_result = run_user_code(user_code, env)
+        with metrics.timer("check.exec"):
+            user_result = run_user_code(user_code, env)
     except Exception as e:
-        return False, f"Ошибка выполнения: {e}"
+        return False, feedback.RUNTIME_ERROR.format(e)
 
     # --- Сравнение
     if user_result != expected_result:
-        return False, (
-            "Неверный результат.\n"
-            f"Входные данные: {input_data}\n"
-            f"Ожидалось: {expected_result}\n"
-            f"Получено: {user_result}"
+        return False, feedback.WRONG_RESULT.format(
+            input_data, expected_result, user_result
         )
 
-    return True, "Решение верное"
+    return True, feedback.CORRECT
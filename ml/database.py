@@ -1,338 +1,2122 @@
+import re
+import json
+import time
 import sqlite3
 import hashlib
-from datetime import datetime
+import threading
+from datetime import date, datetime, timedelta
 from pathlib import Path
 
+from ml import metrics
+from ml.passwords import (
+    hash_password,
+    verify_password,
+    verify_dummy,
+    needs_rehash
+)
+from ml.feedback import (
+    ARGS_SEPARATOR,
+    encode as encode_feedback,
+    decode as decode_feedback
+)
+
 # -------------------------------------------------
 # ПУТЬ К БАЗЕ ДАННЫХ
 # -------------------------------------------------
 
-DB_PATH = Path(__file__).resolve().parent.parent / "data" / "system.db"
+DB_PATH = Path(__file__).resolve().parent.parent / "data" / "system.db"
+
+
+def get_connection():
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    return sqlite3.connect(DB_PATH)
+
+
+# -------------------------------------------------
+# ПОСТРАНИЧНАЯ ВЫБОРКА (для таблиц интерфейса)
+# -------------------------------------------------
+
+PAGE_SIZE = 200
+
+
+def _like_pattern(text: str) -> str:
+    escaped = (
+        text.replace("\\", "\\\\")
+            .replace("%", "\\%")
+            .replace("_", "\\_")
+    )
+    return f"%{escaped}%"
+
+
+def _order_clause(columns: dict, order_by: str, descending: bool,
+                  tiebreak: str) -> str:
+    """
+    ORDER BY только по колонкам из белого списка columns.
+    """
+    if order_by not in columns:
+        raise ValueError(f"Недопустимая колонка сортировки: {order_by}")
+    direction = "DESC" if descending else "ASC"
+    return f"ORDER BY {columns[order_by]} {direction}, {tiebreak} {direction}"
+
+
+# -------------------------------------------------
+# ХЕШ КОДА РЕШЕНИЯ
+# -------------------------------------------------
+
+def code_hash(code: str) -> str:
+    return hashlib.blake2b(code.encode("utf-8"), digest_size=16).hexdigest()
+
+
+# -------------------------------------------------
+# ИНИЦИАЛИЗАЦИЯ БД
+# -------------------------------------------------
+
+# Версия схемы и начальных данных; хранится в PRAGMA user_version.
+# Увеличивается при каждом изменении create_schema.
+SCHEMA_VERSION = 10
+
+
+def get_schema_version(conn) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def set_schema_version(conn, version: int = SCHEMA_VERSION):
+    # PRAGMA не принимает параметры запроса
+    conn.execute(f"PRAGMA user_version = {int(version)}")
+
+
+@metrics.timed("db.init_db")
+def init_db():
+    conn = get_connection()
+    cur = conn.cursor()
+    create_schema(cur)
+    conn.commit()
+    conn.close()
+
+
+def create_schema(cur):
+    """
+    Создаёт недостающие таблицы. Транзакцией управляет вызывающий код.
+    """
+
+    # Пользователи. password_version растёт при каждой смене пароля
+    # (но не при переводе хеша на новый алгоритм): по нему сессии
+    # сверяются с БД (ml/sessions.py)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            role TEXT NOT NULL,
+            is_active INTEGER DEFAULT 1,
+            password_version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    if "password_version" not in _table_columns(cur, "users"):
+        cur.execute("""
+            ALTER TABLE users
+            ADD COLUMN password_version INTEGER NOT NULL DEFAULT 0
+        """)
+
+    # Тексты решений: одинаковый код хранится один раз
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS code_blobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            hash TEXT UNIQUE NOT NULL,
+            code TEXT NOT NULL
+        )
+    """)
+
+    # Справочники: типы заданий и шаблоны отзывов (ml/feedback.py)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS task_types (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS feedback_texts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            text TEXT UNIQUE NOT NULL
+        )
+    """)
+
+    # Результаты выполнения заданий: пользователь, тип задания,
+    # код решения (code_blobs) и шаблон отзыва — ссылки на
+    # справочники; feedback_args — подстановки шаблона (ml/feedback.py);
+    # created_at — Unix-время
+    columns = _table_columns(cur, "results")
+    if "user_code" in columns:
+        _move_code_to_blobs(cur)
+    if "username" in columns:
+        _compact_results(cur)
+    _create_results_table(cur, "results", autoincrement=True)
+    _create_results_index(cur, "results")
+
+    # Архив старых результатов: таблицы results_archive_<семестр>
+    # (см. archive_results); здесь — их список и диапазоны времени
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS archive_terms (
+            term TEXT PRIMARY KEY,
+            table_name TEXT NOT NULL,
+            first_at INTEGER NOT NULL,
+            last_at INTEGER NOT NULL,
+            rows INTEGER NOT NULL
+        )
+    """)
+    if "first_timestamp" in _table_columns(cur, "archive_terms"):
+        _compact_archive(cur)
+
+    # Полнотекстовый поиск по решениям (см. search_results).
+    # После миграций выше: функции SQLite, которые они регистрируют,
+    # нельзя определить, пока на соединении есть запросы FTS5
+    _create_search_index(cur)
+
+    # Вердикты проверки: (код, задание) -> результат,
+    # чтобы не выполнять повторно одинаковое решение
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS verdicts (
+            code_id INTEGER NOT NULL REFERENCES code_blobs (id),
+            task_hash TEXT NOT NULL,
+            is_correct INTEGER NOT NULL,
+            feedback TEXT NOT NULL,
+            PRIMARY KEY (code_id, task_hash)
+        ) WITHOUT ROWID
+    """)
+
+    # Журнал действий администратора
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS admin_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            admin_id INTEGER NOT NULL REFERENCES users (id),
+            action TEXT NOT NULL,
+            created_at INTEGER NOT NULL
+        )
+    """)
+    if "admin" in _table_columns(cur, "admin_log"):
+        _compact_admin_log(cur)
+
+    # Задания на обучение модели
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS training_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            started_by TEXT NOT NULL,
+            status TEXT NOT NULL,
+            started_at TEXT NOT NULL,
+            finished_at TEXT,
+            model_version TEXT,
+            message TEXT
+        )
+    """)
+
+    # Сессии (если включено их сохранение, см. ml/sessions.py).
+    # Хранится хеш токена, а не сам токен; expires_at — Unix-время
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            token_hash TEXT PRIMARY KEY,
+            username TEXT NOT NULL,
+            role TEXT NOT NULL,
+            expires_at INTEGER NOT NULL
+        )
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_sessions_username
+        ON sessions (username)
+    """)
+
+    # Трассировки медленных проверок (ml/profiling.py);
+    # trace — JSON, result_id пуст, если решение не сохранялось
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS check_profiles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            result_id INTEGER REFERENCES results (id),
+            task_type TEXT NOT NULL,
+            elapsed_ms REAL NOT NULL,
+            trace TEXT NOT NULL,
+            timestamp TEXT NOT NULL
+        )
+    """)
+
+    # Счётчики изменений users и admin_log для кэша (см. _cached_table).
+    # Последними: миграции выше пересоздают таблицы вместе с триггерами
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS table_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    for table in CACHED_TABLES:
+        cur.execute(
+            "INSERT OR IGNORE INTO table_versions (name) VALUES (?)", (table,)
+        )
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cur.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()}
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE table_versions SET version = version + 1
+                    WHERE name = '{table}';
+                END
+            """)
+
+
+def _move_code_to_blobs(cur):
+    """
+    Переносит код решений из results.user_code в code_blobs
+    (для баз, созданных до появления code_blobs).
+    """
+    columns = [r[1] for r in cur.execute("PRAGMA table_info(results)")]
+    if "code_id" not in columns:
+        cur.execute("""
+            ALTER TABLE results
+            ADD COLUMN code_id INTEGER REFERENCES code_blobs (id)
+        """)
+
+    cur.connection.create_function(
+        "code_hash", 1, code_hash, deterministic=True
+    )
+    cur.execute("""
+        INSERT OR IGNORE INTO code_blobs (hash, code)
+        SELECT code_hash(user_code), user_code
+        FROM results
+        WHERE code_id IS NULL
+    """)
+    cur.execute("""
+        UPDATE results
+        SET code_id = (
+                SELECT id FROM code_blobs
+                WHERE hash = code_hash(results.user_code)
+            ),
+            user_code = ''
+        WHERE code_id IS NULL
+    """)
+
+
+def _table_columns(cur, table: str) -> list:
+    return [r[1] for r in cur.execute(f"PRAGMA table_info({table})")]
+
+
+def _create_results_table(cur, table: str, autoincrement: bool = False):
+    """
+    Таблица результатов (results или архивная). В архивных
+    id переносятся из results, AUTOINCREMENT не нужен.
+    """
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER PRIMARY KEY{" AUTOINCREMENT" if autoincrement else ""},
+            user_id INTEGER NOT NULL REFERENCES users (id),
+            task_text TEXT NOT NULL,
+            task_type_id INTEGER NOT NULL REFERENCES task_types (id),
+            code_id INTEGER REFERENCES code_blobs (id),
+            is_correct INTEGER NOT NULL,
+            feedback_id INTEGER NOT NULL REFERENCES feedback_texts (id),
+            feedback_args TEXT,
+            created_at INTEGER NOT NULL
+        )
+    """)
+
+
+def _create_results_index(cur, table: str):
+    # покрывающий индекс для статистики (COUNT, SUM(is_correct),
+    # MAX(created_at) по студенту) и истории студента по времени
+    cur.execute(f"""
+        CREATE INDEX IF NOT EXISTS idx_{table}_user_created
+        ON {table} (user_id, created_at, is_correct)
+    """)
+
+
+# -------------------------------------------------
+# ПЕРЕХОД НА КОМПАКТНУЮ СХЕМУ (версия 7)
+# -------------------------------------------------
+#
+# До версии 7 в results и admin_log в каждой строке хранились
+# имя пользователя, тип задания, полный текст отзыва и время
+# строкой "ГГГГ-ММ-ДД ЧЧ:ММ:СС". Таблицы пересобираются:
+# имена и типы заменяются ссылками на справочники, отзыв —
+# шаблоном и подстановками, время — Unix-временем. id сохраняются.
+
+# Строка локального времени -> Unix-время (как datetime.timestamp())
+_EPOCH_SQL = "CAST(strftime('%s', {}, 'utc') AS INTEGER)"
+
+
+def _replace_table(cur, table: str, new_table: str):
+    """
+    Заменяет table на заполненную new_table, сохраняя
+    счётчик AUTOINCREMENT (id удалённых строк не переиспользуются).
+    """
+    cur.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,))
+    row = cur.fetchone()
+
+    cur.execute(f"DROP TABLE {table}")
+    cur.execute(f"ALTER TABLE {new_table} RENAME TO {table}")
+
+    if row:
+        cur.execute("""
+            UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?
+        """, (row[0], table))
+        if cur.rowcount == 0:
+            cur.execute("""
+                INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)
+            """, (table, row[0]))
+
+
+def _add_missing_users(cur, table: str, column: str, role: str):
+    """
+    Имена из старых записей, которых нет в users (удалённые
+    пользователи), добавляются заблокированными и без пароля —
+    войти под ними нельзя.
+    """
+    cur.execute(f"""
+        INSERT OR IGNORE INTO users (username, password_hash, role, is_active)
+        SELECT DISTINCT {column}, '', ?, 0 FROM {table}
+    """, (role,))
+
+
+def _compact_results_table(cur, table: str, autoincrement: bool):
+    _add_missing_users(cur, table, "username", "student")
+    cur.execute(f"""
+        INSERT OR IGNORE INTO task_types (name)
+        SELECT DISTINCT task_type FROM {table}
+    """)
+    cur.execute(f"""
+        INSERT OR IGNORE INTO feedback_texts (text)
+        SELECT DISTINCT feedback_template(feedback) FROM {table}
+    """)
+
+    new_table = f"{table}_compact"
+    cur.execute(f"DROP TABLE IF EXISTS {new_table}")
+    _create_results_table(cur, new_table, autoincrement)
+    cur.execute(f"""
+        INSERT INTO {new_table} ({RESULT_COLUMNS})
+        SELECT r.id, u.id, r.task_text, t.id, r.code_id, r.is_correct,
+               f.id, feedback_args(r.feedback),
+               {_EPOCH_SQL.format("r.timestamp")}
+        FROM {table} r
+        JOIN users u ON u.username = r.username
+        JOIN task_types t ON t.name = r.task_type
+        JOIN feedback_texts f ON f.text = feedback_template(r.feedback)
+        ORDER BY r.id
+    """)
+    _replace_table(cur, table, new_table)
+    _create_results_index(cur, table)
+
+
+def _register_feedback_functions(conn):
+    conn.create_function(
+        "feedback_template", 1,
+        lambda text: encode_feedback(text)[0], deterministic=True
+    )
+    conn.create_function(
+        "feedback_args", 1,
+        lambda text: encode_feedback(text)[1], deterministic=True
+    )
+
+
+def _compact_results(cur):
+    _register_feedback_functions(cur.connection)
+    cur.execute("DROP INDEX IF EXISTS idx_results_username_id")
+    _compact_results_table(cur, "results", autoincrement=True)
+
+
+def _compact_archive(cur):
+    """
+    Архивные таблицы и archive_terms (время — Unix-время).
+    """
+    _register_feedback_functions(cur.connection)
+    tables = [r[0] for r in cur.execute("SELECT table_name FROM archive_terms")]
+    for table in tables:
+        if "username" in _table_columns(cur, table):
+            cur.execute(f"DROP INDEX IF EXISTS idx_{table}_username_id")
+            _compact_results_table(cur, table, autoincrement=False)
+
+    cur.execute("""
+        CREATE TABLE archive_terms_compact (
+            term TEXT PRIMARY KEY,
+            table_name TEXT NOT NULL,
+            first_at INTEGER NOT NULL,
+            last_at INTEGER NOT NULL,
+            rows INTEGER NOT NULL
+        )
+    """)
+    cur.execute(f"""
+        INSERT INTO archive_terms_compact
+        SELECT term, table_name,
+               {_EPOCH_SQL.format("first_timestamp")},
+               {_EPOCH_SQL.format("last_timestamp")},
+               rows
+        FROM archive_terms
+    """)
+    _replace_table(cur, "archive_terms", "archive_terms_compact")
+
+
+def _compact_admin_log(cur):
+    _add_missing_users(cur, "admin_log", "admin", "admin")
+    cur.execute("""
+        CREATE TABLE admin_log_compact (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            admin_id INTEGER NOT NULL REFERENCES users (id),
+            action TEXT NOT NULL,
+            created_at INTEGER NOT NULL
+        )
+    """)
+    cur.execute(f"""
+        INSERT INTO admin_log_compact (id, admin_id, action, created_at)
+        SELECT l.id, u.id, l.action, {_EPOCH_SQL.format("l.timestamp")}
+        FROM admin_log l
+        JOIN users u ON u.username = l.admin
+        ORDER BY l.id
+    """)
+    _replace_table(cur, "admin_log", "admin_log_compact")
+
+
+# -------------------------------------------------
+# КЭШ ПОЛЬЗОВАТЕЛЕЙ И ЖУРНАЛА
+# -------------------------------------------------
+#
+# Список пользователей и последние LOG_CACHE_SIZE записей журнала
+# администратора хранятся в памяти. add_user, update_user_password,
+# toggle_user_active и log_admin_action обновляют кэш на месте,
+# и таблицы панели администратора после действий читаются из памяти.
+#
+# Любое изменение users и admin_log (в том числе из других
+# процессов и мимо этих функций, например ml.auth.register_user)
+# увеличивает счётчик в table_versions (триггеры, см. create_schema).
+# Чтение сверяет счётчик — один запрос по ключу — и при расхождении
+# перечитывает таблицу. Запись читает счётчик до и после изменения
+# в одной транзакции: если до изменения он совпадал с кэшем, кэш
+# обновляется на месте, иначе сбрасывается.
+#
+# get_user и authenticate кэш не используют: проверка входа
+# и сессий всегда видит актуальные пароль и статус.
+
+CACHED_TABLES = ("users", "admin_log")
+
+LOG_CACHE_SIZE = 1000
+
+# имя таблицы -> {"db_path", "version", ...данные загрузчика}
+_table_cache = {}
+_table_cache_lock = threading.Lock()
+
+
+def _table_version(cur, table: str) -> int:
+    cur.execute("SELECT version FROM table_versions WHERE name = ?", (table,))
+    return cur.fetchone()[0]
+
+
+def _cached_table(table: str, load) -> dict:
+    """
+    Запись кэша таблицы; load(cur) -> dict читает данные заново,
+    если счётчик изменений разошёлся с кэшем.
+    """
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        version = _table_version(cur, table)
+        with _table_cache_lock:
+            entry = _table_cache.get(table)
+            if (entry is not None and entry["db_path"] == DB_PATH
+                    and entry["version"] == version):
+                return entry
+
+        # счётчик и данные — из одного снимка БД
+        cur.execute("BEGIN")
+        entry = load(cur)
+        entry["version"] = _table_version(cur, table)
+        entry["db_path"] = DB_PATH
+        conn.rollback()
+    finally:
+        conn.close()
+
+    with _table_cache_lock:
+        current = _table_cache.get(table)
+        if (current is None or current["db_path"] != DB_PATH
+                or current["version"] <= entry["version"]):
+            _table_cache[table] = entry
+    return entry
+
+
+def _write_cached(table: str, write, update):
+    """
+    Выполняет write(cur) в транзакции и обновляет кэш таблицы:
+    update(entry, результат write) под блокировкой кэша.
+    Возвращает результат write.
+    """
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        # IMMEDIATE — чтобы между чтением счётчика и записью
+        # таблицу не изменил другой процесс
+        cur.execute("BEGIN IMMEDIATE")
+        before = _table_version(cur, table)
+        result = write(cur)
+        after = _table_version(cur, table)
+        conn.commit()
+    finally:
+        conn.close()
+
+    with _table_cache_lock:
+        entry = _table_cache.get(table)
+        if entry is not None:
+            if entry["db_path"] == DB_PATH and entry["version"] == before:
+                update(entry, result)
+                entry["version"] = after
+            elif entry["db_path"] != DB_PATH or entry["version"] != after:
+                del _table_cache[table]
+    return result
+
+
+def invalidate_table_cache():
+    with _table_cache_lock:
+        _table_cache.clear()
+
+
+_ASCII_LOWER = str.maketrans(
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz"
+)
+
+
+def _fold_case(text: str) -> str:
+    """
+    Регистр для поиска как в LIKE SQLite: различается
+    только у латиницы.
+    """
+    return text.translate(_ASCII_LOWER)
+
+
+def _sorted_rows(entry: dict, rows, key: str, descending: bool) -> list:
+    """
+    Строки, отсортированные как ORDER BY key, id (см. _order_clause);
+    результат запоминается в entry до следующего изменения.
+    """
+    orders = entry["orders"]
+    if (key, descending) not in orders:
+        orders[key, descending] = sorted(
+            rows, key=lambda r: (r[key], r["id"]), reverse=descending
+        )
+    return orders[key, descending]
+
+
+# -------------------------------------------------
+# ПОЛЬЗОВАТЕЛИ
+# -------------------------------------------------
+
+def _user_entry(user_id, username, role, is_active) -> dict:
+    return {
+        "id": user_id,
+        "username": username,
+        "role": role,
+        "is_active": bool(is_active),
+        "search_key": _fold_case(username)
+    }
+
+
+def _load_users(cur) -> dict:
+    cur.execute("SELECT id, username, role, is_active FROM users")
+    return {
+        "users": {r[1]: _user_entry(*r) for r in cur.fetchall()},
+        "orders": {}
+    }
+
+
+def _cached_users() -> dict:
+    return _cached_table("users", _load_users)
+
+
+def _public_user(row: dict) -> dict:
+    # копия: таблицы интерфейса меняют полученные строки
+    return {
+        "username": row["username"],
+        "role": row["role"],
+        "is_active": row["is_active"]
+    }
+
+
+@metrics.timed("db.add_user")
+def add_user(username: str, password: str, role: str):
+    password_hash = hash_password(password)
+
+    def write(cur):
+        cur.execute("""
+            INSERT INTO users (username, password_hash, role)
+            VALUES (?, ?, ?)
+        """, (username, password_hash, role))
+        return cur.lastrowid
+
+    def update(entry, user_id):
+        entry["users"][username] = _user_entry(
+            user_id, username, role, True
+        )
+        entry["orders"].clear()
+
+    _write_cached("users", write, update)
+
+
+@metrics.timed("db.update_user_password")
+def update_user_password(username: str, new_password: str):
+    """
+    Сброс пароля пользователя.
+    Пароль передаётся в открытом виде и хешируется внутри функции.
+    """
+    password_hash = hash_password(new_password)
+
+    def write(cur):
+        cur.execute("""
+            UPDATE users
+            SET password_hash = ?, password_version = password_version + 1
+            WHERE username = ?
+        """, (password_hash, username))
+
+        if cur.rowcount == 0:
+            raise ValueError("Пользователь не найден")
+
+        delete_user_sessions(cur, username)
+
+    # хеш пароля в кэше не хранится — меняется только счётчик
+    _write_cached("users", write, lambda entry, _: None)
+
+    _revoke_cached_sessions(username)
+
+
+@metrics.timed("db.toggle_user_active")
+def toggle_user_active(username: str) -> bool:
+    """
+    Блокирует или разблокирует пользователя.
+    Возвращает новый статус (True — активен).
+    """
+    def write(cur):
+        cur.execute("""
+            SELECT is_active FROM users WHERE username = ?
+        """, (username,))
+        row = cur.fetchone()
+
+        if not row:
+            raise ValueError("Пользователь не найден")
+
+        new_status = 0 if row[0] else 1
+
+        cur.execute("""
+            UPDATE users
+            SET is_active = ?
+            WHERE username = ?
+        """, (new_status, username))
+
+        if not new_status:
+            delete_user_sessions(cur, username)
+        return bool(new_status)
+
+    def update(entry, is_active):
+        user = entry["users"].get(username)
+        if user is not None:
+            user["is_active"] = is_active
+            entry["orders"].clear()
+
+    is_active = _write_cached("users", write, update)
+
+    if not is_active:
+        _revoke_cached_sessions(username)
+    return is_active
+
+
+# --- АЛИАС ДЛЯ UI (ВАЖНО) ---
+def set_user_active(username: str) -> bool:
+    """
+    Алиас для admin_panel.py.
+    """
+    return toggle_user_active(username)
+
+
+@metrics.timed("db.get_user")
+def get_user(username: str):
+    conn = get_connection()
+    cur = conn.cursor()
+
+    cur.execute("""
+        SELECT username, password_hash, role, is_active, password_version
+        FROM users
+        WHERE username = ?
+    """, (username,))
+
+    row = cur.fetchone()
+    conn.close()
+
+    if row:
+        return {
+            "username": row[0],
+            "password_hash": row[1],
+            "role": row[2],
+            "is_active": bool(row[3]),
+            "password_version": row[4]
+        }
+    return None
+
+
+@metrics.timed("db.get_all_users")
+def get_all_users():
+    entry = _cached_users()
+    with _table_cache_lock:
+        rows = _sorted_rows(
+            entry, entry["users"].values(), "username", False
+        )
+        return [_public_user(r) for r in rows]
+
+
+USER_SORT_COLUMNS = {
+    "username": "username",
+    "role": "role",
+    "is_active": "is_active"
+}
+
+
+@metrics.timed("db.get_users_page")
+def get_users_page(offset: int = 0, limit: int = PAGE_SIZE,
+                   order_by: str = "username", descending: bool = False,
+                   search: str = None):
+    if order_by not in USER_SORT_COLUMNS:
+        raise ValueError(f"Недопустимая колонка сортировки: {order_by}")
+
+    entry = _cached_users()
+    with _table_cache_lock:
+        rows = _sorted_rows(
+            entry, entry["users"].values(), order_by, descending
+        )
+        if search:
+            search = _fold_case(search)
+            rows = [r for r in rows if search in r["search_key"]]
+        return [_public_user(r) for r in rows[offset:offset + limit]]
+
+
+# -------------------------------------------------
+# АУТЕНТИФИКАЦИЯ
+# -------------------------------------------------
+
+@metrics.timed("db.check_password")
+def check_password(username: str, password: str):
+    """
+    Запись get_user для активного пользователя с верным паролем,
+    иначе None. Хеш старого формата при этом заменяется
+    (см. ml/passwords.py) — в записи уже новый хеш.
+    """
+    user = get_user(username)
+    if user is None or not user["is_active"]:
+        # то же время ответа, что и при неверном пароле
+        verify_dummy(password)
+        return None
+    if not verify_password(password, user["password_hash"]):
+        return None
+
+    if needs_rehash(user["password_hash"]):
+        new_hash = hash_password(password)
+        if upgrade_password_hash(username, user["password_hash"], new_hash):
+            user["password_hash"] = new_hash
+    return user
+
+
+@metrics.timed("db.authenticate")
+def authenticate(username: str, password: str):
+    user = check_password(username, password)
+    if user is None:
+        return None
+    return {
+        "username": user["username"],
+        "role": user["role"]
+    }
+
+
+def replace_password_hash(cur, username: str, old_hash: str,
+                          new_hash: str) -> bool:
+    """
+    Заменяет хеш пароля в открытой транзакции, только если он
+    не изменился с момента проверки (пароль могли сбросить).
+    """
+    cur.execute("""
+        UPDATE users
+        SET password_hash = ?
+        WHERE username = ? AND password_hash = ?
+    """, (new_hash, username, old_hash))
+    return cur.rowcount > 0
+
+
+@metrics.timed("db.upgrade_password_hash")
+def upgrade_password_hash(username: str, old_hash: str, new_hash: str) -> bool:
+    """
+    Перевод хеша на текущий алгоритм после успешного входа
+    (см. ml/passwords.py). Пароль не меняется, password_version
+    тоже, поэтому сессии пользователя (в любом процессе) остаются
+    действительными.
+    """
+    return _write_cached(
+        "users",
+        lambda cur: replace_password_hash(cur, username, old_hash, new_hash),
+        lambda entry, _: None
+    )
+
+
+# -------------------------------------------------
+# СЕССИИ
+# -------------------------------------------------
+
+def insert_session_row(cur, token_hash: str, username: str, role: str,
+                       expires_at: int):
+    """
+    Сохраняет сессию в открытой транзакции.
+    """
+    cur.execute("""
+        INSERT OR REPLACE INTO sessions (token_hash, username, role, expires_at)
+        VALUES (?, ?, ?, ?)
+    """, (token_hash, username, role, int(expires_at)))
+
+
+@metrics.timed("db.insert_session")
+def insert_session(token_hash: str, username: str, role: str,
+                   expires_at: int):
+    conn = get_connection()
+    cur = conn.cursor()
+
+    insert_session_row(cur, token_hash, username, role, expires_at)
+
+    conn.commit()
+    conn.close()
+
+
+@metrics.timed("db.get_session_row")
+def get_session_row(token_hash: str):
+    conn = get_connection()
+    cur = conn.cursor()
+
+    cur.execute("""
+        SELECT s.username, s.role, s.expires_at, u.password_version,
+               u.is_active
+        FROM sessions s
+        JOIN users u ON u.username = s.username
+        WHERE s.token_hash = ?
+    """, (token_hash,))
+
+    row = cur.fetchone()
+    conn.close()
+
+    if row:
+        return {
+            "username": row[0],
+            "role": row[1],
+            "expires_at": row[2],
+            "password_version": row[3],
+            "is_active": bool(row[4])
+        }
+    return None
+
+
+def delete_session_row(cur, token_hash: str):
+    """
+    Удаляет сессию в открытой транзакции.
+    """
+    cur.execute("DELETE FROM sessions WHERE token_hash = ?", (token_hash,))
+
+
+@metrics.timed("db.delete_session")
+def delete_session(token_hash: str):
+    conn = get_connection()
+    cur = conn.cursor()
+    delete_session_row(cur, token_hash)
+    conn.commit()
+    conn.close()
+
+
+def delete_user_sessions(cur, username: str):
+    """
+    Удаляет сохранённые сессии пользователя в открытой транзакции.
+    """
+    cur.execute("DELETE FROM sessions WHERE username = ?", (username,))
+
+
+@metrics.timed("db.delete_expired_sessions")
+def delete_expired_sessions(now: int) -> int:
+    conn = get_connection()
+    cur = conn.cursor()
+    cur.execute("DELETE FROM sessions WHERE expires_at <= ?", (int(now),))
+    deleted = cur.rowcount
+    conn.commit()
+    conn.close()
+    return deleted
+
+
+def _revoke_cached_sessions(username: str):
+    """
+    Сбрасывает сессии пользователя в кэше текущего процесса
+    (импорт отложенный: ml.sessions сам использует этот модуль).
+    """
+    from ml.sessions import forget_user
+    forget_user(username)
+
+
+# -------------------------------------------------
+# РЕЗУЛЬТАТЫ
+# -------------------------------------------------
+
+def insert_code_blob(cur, code: str) -> int:
+    """
+    Возвращает id текста решения, добавляя его при первом появлении.
+    """
+    digest = code_hash(code)
+
+    cur.execute("SELECT id FROM code_blobs WHERE hash = ?", (digest,))
+    row = cur.fetchone()
+    if row:
+        return row[0]
+
+    cur.execute("""
+        INSERT INTO code_blobs (hash, code)
+        VALUES (?, ?)
+    """, (digest, code))
+    return cur.lastrowid
+
+
+def _lookup_id(cur, table: str, column: str, value: str) -> int:
+    """
+    id значения в справочнике (task_types, feedback_texts),
+    значение добавляется при первом появлении.
+    """
+    cur.execute(f"SELECT id FROM {table} WHERE {column} = ?", (value,))
+    row = cur.fetchone()
+    if row:
+        return row[0]
+
+    cur.execute(f"INSERT INTO {table} ({column}) VALUES (?)", (value,))
+    return cur.lastrowid
+
+
+def _user_id(cur, username: str, role: str = "student") -> int:
+    """
+    id пользователя. Для неизвестного имени (например, сохранение
+    результата после удаления пользователя) заводится
+    заблокированная запись без пароля, как при миграции.
+    """
+    cur.execute("SELECT id FROM users WHERE username = ?", (username,))
+    row = cur.fetchone()
+    if row:
+        return row[0]
+
+    cur.execute("""
+        INSERT INTO users (username, password_hash, role, is_active)
+        VALUES (?, '', ?, 0)
+    """, (username, role))
+    return cur.lastrowid
+
+
+# Unix-время -> "ГГГГ-ММ-ДД ЧЧ:ММ:СС" (локальное время) — формат,
+# в котором время отдаётся интерфейсу и API. В запросах время
+# форматирует SQLite: это заметно быстрее datetime.fromtimestamp
+TIMESTAMP_SQL = "datetime({}, 'unixepoch', 'localtime')"
+
+
+def format_timestamp(created_at) -> str:
+    if created_at is None:
+        return None
+    return datetime.fromtimestamp(created_at).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def insert_result(cur, username, task_text, task_type, user_code,
+                  is_correct, feedback) -> dict:
+    """
+    Добавляет результат в открытой транзакции.
+    Возвращает запись в формате get_results_by_user (с id).
+    """
+    created_at = int(time.time())
+    code_id = insert_code_blob(cur, user_code)
+    template, args = encode_feedback(feedback)
+
+    cur.execute("""
+        INSERT INTO results (
+            user_id, task_text, task_type_id, code_id,
+            is_correct, feedback_id, feedback_args, created_at
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        _user_id(cur, username),
+        task_text,
+        _lookup_id(cur, "task_types", "name", task_type),
+        code_id,
+        int(is_correct),
+        _lookup_id(cur, "feedback_texts", "text", template),
+        args,
+        created_at
+    ))
+
+    return {
+        "id": cur.lastrowid,
+        "task_text": task_text,
+        "task_type": task_type,
+        "is_correct": bool(is_correct),
+        "feedback": feedback,
+        "timestamp": format_timestamp(created_at)
+    }
+
+
+@metrics.timed("db.save_result")
+def save_result(username, task_text, task_type, user_code, is_correct, feedback):
+    conn = get_connection()
+    cur = conn.cursor()
+
+    row = insert_result(
+        cur, username, task_text, task_type, user_code, is_correct, feedback
+    )
+
+    conn.commit()
+    conn.close()
+
+    _cache_saved_result(username, row)
+    return row["id"]
+
+
+def _cache_saved_result(username, row: dict):
+    """
+    Дописывает результат в кэш истории (ml/results_cache.py),
+    если история пользователя уже закэширована. Импорт отложенный:
+    ml.results_cache сам использует этот модуль.
+    """
+    from ml.results_cache import add_result
+    add_result(username, row)
+
+
+# Колонки результата в формате _result_row; r — results
+# или архивная таблица (results_source)
+RESULT_SELECT = f"""
+    SELECT r.id, r.task_text, t.name, r.is_correct,
+           f.text, r.feedback_args, {TIMESTAMP_SQL.format("r.created_at")}
+    FROM {{source}} r
+    JOIN task_types t ON t.id = r.task_type_id
+    JOIN feedback_texts f ON f.id = r.feedback_id
+"""
+
+
+def _result_row(r) -> dict:
+    return {
+        "id": r[0],
+        "task_text": r[1],
+        "task_type": r[2],
+        "is_correct": bool(r[3]),
+        "feedback": decode_feedback(r[4], r[5]),
+        "timestamp": r[6]
+    }
+
+
+@metrics.timed("db.get_results_by_user")
+def get_results_by_user(username, date_from=None, date_to=None):
+    """
+    История пользователя (новые сверху). Без периода — только
+    неархивные записи; если период задан, в выборку попадают
+    и архивные таблицы, которые его затрагивают.
+    """
+    since, until = period_bounds(date_from, date_to)
+    conditions, params = period_conditions(since, until, "r.created_at")
+
+    conn = get_connection()
+    cur = conn.cursor()
+
+    cur.execute(f"""
+        {RESULT_SELECT.format(source=results_source(cur, since, until))}
+        WHERE r.user_id = (SELECT id FROM users WHERE username = ?)
+              {"".join(" AND " + c for c in conditions)}
+        ORDER BY r.created_at DESC, r.id DESC
+    """, (username, *params))
+
+    rows = cur.fetchall()
+    conn.close()
+
+    return [_result_row(r) for r in rows]
+
+
+@metrics.timed("db.get_results_since")
+def get_results_since(username, since_id: int = 0):
+    """
+    Результаты пользователя с id больше since_id (по возрастанию id) —
+    для инкрементального обновления истории.
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+
+    cur.execute(f"""
+        {RESULT_SELECT.format(source="results")}
+        WHERE r.user_id = (SELECT id FROM users WHERE username = ?)
+          AND r.id > ?
+        ORDER BY r.id
+    """, (username, since_id))
+
+    rows = cur.fetchall()
+    conn.close()
+
+    return [_result_row(r) for r in rows]
+
+
+# -------------------------------------------------
+# ПОЛНОТЕКСТОВЫЙ ПОИСК
+# -------------------------------------------------
+#
+# results_fts — индекс FTS5 по тексту задания, коду решения
+# и отзыву каждой записи results. Сами тексты в индексе не
+# хранятся: содержимое (external content) берётся из
+# представления results_search_content, где код подставлен
+# из code_blobs, а отзыв — шаблон вместе с подстановками.
+# Индекс обновляют триггеры на results; архивные записи
+# (archive_results удаляет их из results) в поиск не попадают.
+
+SEARCH_COLUMNS = ("task_text", "code", "feedback")
+
+# Наибольший размер страницы результатов поиска
+SEARCH_MAX_LIMIT = 1000
+
+
+def _search_feedback_sql(row: str) -> str:
+    """
+    Текст отзыва для индекса: шаблон без меток {} и подстановки
+    через пробел (слова те же, что в отзыве, который видит
+    пользователь).
+    """
+    return (
+        f"replace((SELECT text FROM feedback_texts "
+        f"WHERE id = {row}.feedback_id), '{{}}', '')"
+        f" || COALESCE(' ' || replace({row}.feedback_args, "
+        f"char({ord(ARGS_SEPARATOR)}), ' '), '')"
+    )
+
+
+def _search_values_sql(row: str) -> str:
+    return (
+        f"{row}.id, {row}.task_text, "
+        f"(SELECT code FROM code_blobs WHERE id = {row}.code_id), "
+        f"{_search_feedback_sql(row)}"
+    )
+
+
+def _create_search_index(cur):
+    cur.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'results_fts'"
+    )
+    exists = cur.fetchone() is not None
+
+    cur.execute(f"""
+        CREATE VIEW IF NOT EXISTS results_search_content AS
+        SELECT r.id, r.task_text,
+               b.code AS code,
+               {_search_feedback_sql("r")} AS feedback
+        FROM results r
+        LEFT JOIN code_blobs b ON b.id = r.code_id
+    """)
+    # tokenchars '_' — идентификаторы вроде task_text ищутся целиком
+    cur.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS results_fts USING fts5 (
+            task_text, code, feedback,
+            content = 'results_search_content',
+            content_rowid = 'id',
+            tokenize = "unicode61 tokenchars '_'"
+        )
+    """)
+
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS results_fts_insert
+        AFTER INSERT ON results BEGIN
+            INSERT INTO results_fts (rowid, task_text, code, feedback)
+            VALUES ({_search_values_sql("new")});
+        END
+    """)
+    # из индекса с внешним содержимым запись удаляется командой
+    # 'delete' с прежними значениями колонок
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS results_fts_delete
+        AFTER DELETE ON results BEGIN
+            INSERT INTO results_fts (results_fts, rowid, task_text, code, feedback)
+            VALUES ('delete', {_search_values_sql("old")});
+        END
+    """)
+    cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS results_fts_update
+        AFTER UPDATE ON results BEGIN
+            INSERT INTO results_fts (results_fts, rowid, task_text, code, feedback)
+            VALUES ('delete', {_search_values_sql("old")});
+            INSERT INTO results_fts (rowid, task_text, code, feedback)
+            VALUES ({_search_values_sql("new")});
+        END
+    """)
+
+    if not exists:
+        # индекс по уже накопленным решениям
+        cur.execute("INSERT INTO results_fts (results_fts) VALUES ('rebuild')")
+
+
+def drop_search_index(cur):
+    """
+    Удаляет индекс поиска и его триггеры (для массовой загрузки:
+    create_schema затем строит индекс заново одним проходом).
+    """
+    for trigger in ("insert", "delete", "update"):
+        cur.execute(f"DROP TRIGGER IF EXISTS results_fts_{trigger}")
+    cur.execute("DROP TABLE IF EXISTS results_fts")
+    cur.execute("DROP VIEW IF EXISTS results_search_content")
+
+
+def _search_terms(text: str) -> list:
+    """
+    Строка поиска -> [(фраза, префикс ли)]. Слова и "фразы
+    в кавычках" должны встретиться все; слово со * в конце — префикс.
+    """
+    terms = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', text or ""):
+        prefix = False
+        if word:
+            phrase = word.replace('"', "")
+            if phrase.endswith("*"):
+                phrase, prefix = phrase.rstrip("*"), True
+        if phrase.strip():
+            terms.append((phrase, prefix))
+
+    if not terms:
+        raise ValueError("Пустой поисковый запрос")
+    return terms
+
+
+def _search_match(terms: list) -> str:
+    """
+    Запрос FTS5 по _search_terms. Операторы FTS5 в тексте
+    пользователя не действуют.
+    """
+    return " ".join(
+        f'"{phrase}"' + ("*" if prefix else "") for phrase, prefix in terms
+    )
+
+
+# Метки найденных слов во фрагментах FTS5 (в тексте не встречаются;
+# в ответе заменяются на [ ])
+_MARK_OPEN, _MARK_CLOSE = "\x02", "\x03"
+
+SNIPPET_TOKENS = 12
 
 
-def get_connection():
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    return sqlite3.connect(DB_PATH)
+def _text_snippet(text: str, terms: list, tokens: int = SNIPPET_TOKENS) -> str:
+    """
+    Фрагмент text с найденными словами в [скобках], как у snippet()
+    FTS5. Нужен для отзывов: в индексе они хранятся шаблоном
+    без подстановок, и фрагмент FTS5 показал бы пустые поля.
+    """
+    exact, prefixes = set(), []
+    for phrase, prefix in terms:
+        words = re.findall(r"\w+", phrase.casefold())
+        if prefix and words:
+            prefixes.append(words.pop())
+        exact.update(words)
+
+    def found(word):
+        word = word.casefold()
+        return word in exact or any(word.startswith(p) for p in prefixes)
+
+    words = list(re.finditer(r"\w+", text))
+    if not words:
+        return text
+    first = next((i for i, w in enumerate(words) if found(w.group())), 0)
+    start = max(0, min(first - tokens // 4, len(words) - tokens))
+    end = min(len(words), start + tokens)
+
+    begin = words[start].start() if start else 0
+    parts = ["…"] if start else []
+    position = begin
+    for w in words[start:end]:
+        if found(w.group()):
+            parts.append(text[position:w.start()])
+            parts.append(f"[{w.group()}]")
+            position = w.end()
+    tail = words[end - 1].end() if end < len(words) else len(text)
+    parts.append(text[position:tail])
+    if end < len(words):
+        parts.append("…")
+    return "".join(parts)
+
+
+# «recent» (по умолчанию) — новые сверху: индекс читается с конца
+# и останавливается на нужной странице, время не зависит от числа
+# совпадений. «rank» — по релевантности (bm25): для оценки нужно
+# перебрать все совпадения, поэтому ранжируются только
+# SEARCH_RANK_CANDIDATES самых новых из них (или offset + limit,
+# если страница дальше) — иначе слово, которое есть почти
+# в каждом решении, искалось бы секунду.
+SEARCH_ORDERS = {
+    "recent": "results_fts.rowid DESC",
+    "rank": "bm25(results_fts), results_fts.rowid DESC"
+}
+
+SEARCH_RANK_CANDIDATES = 5000
+
+
+@metrics.timed("db.search_results")
+def search_results(query: str, offset: int = 0, limit: int = PAGE_SIZE,
+                   column: str = None, username: str = None,
+                   order: str = "recent"):
+    """
+    Решения, в тексте задания, коде или отзыве которых встречается
+    query (column — искать только в одной из SEARCH_COLUMNS),
+    в порядке order (SEARCH_ORDERS). Записи в формате
+    get_results_by_user, плюс username и snippet — фрагмент
+    с найденными словами в [скобках].
+    """
+    terms = _search_terms(query)
+    match = _search_match(terms)
+    if column is not None:
+        if column not in SEARCH_COLUMNS:
+            raise ValueError(f"Недопустимая колонка поиска: {column}")
+        match = f"{column} : ({match})"
+    if order not in SEARCH_ORDERS:
+        raise ValueError(f"Недопустимый порядок поиска: {order}")
+    limit = min(limit, SEARCH_MAX_LIMIT)
+
+    joins, conditions, params = "", ["results_fts MATCH ?"], [match]
+    if username:
+        joins = "CROSS JOIN results r ON r.id = results_fts.rowid"
+        conditions.append(
+            "r.user_id = (SELECT id FROM users WHERE username = ?)"
+        )
+        params.append(username)
 
+    conn = get_connection()
+    cur = conn.cursor()
 
-# -------------------------------------------------
-# ХЕШИРОВАНИЕ ПАРОЛЯ
-# -------------------------------------------------
+    if order == "rank":
+        # нижняя граница id ранжируемых совпадений
+        cur.execute(f"""
+            SELECT results_fts.rowid
+            FROM results_fts
+            {joins}
+            WHERE {" AND ".join(conditions)}
+            ORDER BY results_fts.rowid DESC
+            LIMIT 1 OFFSET ?
+        """, (*params, max(SEARCH_RANK_CANDIDATES, offset + limit) - 1))
+        row = cur.fetchone()
+        if row is not None:
+            conditions.append("results_fts.rowid >= ?")
+            params.append(row[0])
+
+    # Сначала выбираются только id страницы. Записи и фрагменты
+    # читаются одним проходом индекса по диапазону id страницы.
+    # Поиск в индексе по каждому id отдельно для частого слова
+    # перечитывал бы весь его список совпадений.
+    cur.execute(f"""
+        WITH page AS (
+            SELECT results_fts.rowid AS id
+            FROM results_fts
+            {joins}
+            WHERE {" AND ".join(conditions)}
+            ORDER BY {SEARCH_ORDERS[order]}
+            LIMIT ? OFFSET ?
+        )
+        SELECT r.id, r.task_text, t.name, r.is_correct,
+               f.text, r.feedback_args, {TIMESTAMP_SQL.format("r.created_at")},
+               u.username,
+               snippet(results_fts, 0, '{_MARK_OPEN}', '{_MARK_CLOSE}',
+                       '…', {SNIPPET_TOKENS}),
+               snippet(results_fts, 1, '{_MARK_OPEN}', '{_MARK_CLOSE}',
+                       '…', {SNIPPET_TOKENS})
+        FROM results_fts
+        CROSS JOIN results r ON r.id = results_fts.rowid
+        JOIN users u ON u.id = r.user_id
+        JOIN task_types t ON t.id = r.task_type_id
+        JOIN feedback_texts f ON f.id = r.feedback_id
+        WHERE results_fts MATCH ?
+          AND results_fts.rowid BETWEEN (SELECT MIN(id) FROM page)
+                                    AND (SELECT MAX(id) FROM page)
+          AND +results_fts.rowid IN (SELECT id FROM page)
+        ORDER BY {SEARCH_ORDERS[order]}
+    """, (*params, limit, offset, match))
+
+    rows = cur.fetchall()
+    conn.close()
 
-def hash_password(password: str) -> str:
-    return hashlib.sha256(password.encode("utf-8")).hexdigest()
+    hits = []
+    for r in rows:
+        hit = _result_row(r)
+        hit["username"] = r[7]
+        # фрагмент из колонки, где найдены слова; отзыв — по
+        # раскодированному тексту
+        snippet = next((text for text in r[8:10]
+                        if text and _MARK_OPEN in text), None)
+        if snippet is None:
+            hit["snippet"] = _text_snippet(hit["feedback"], terms)
+        else:
+            hit["snippet"] = (snippet.replace(_MARK_OPEN, "[")
+                              .replace(_MARK_CLOSE, "]"))
+        hits.append(hit)
+    return hits
 
 
 # -------------------------------------------------
-# ИНИЦИАЛИЗАЦИЯ БД
+# ВЕРДИКТЫ ПРОВЕРКИ
 # -------------------------------------------------
 
-def init_db():
+@metrics.timed("db.get_verdict")
+def get_verdict(user_code: str, task_hash: str):
+    """
+    Ранее полученный вердикт (is_correct, feedback) или None.
+    """
     conn = get_connection()
     cur = conn.cursor()
 
-    # Пользователи
     cur.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            role TEXT NOT NULL,
-            is_active INTEGER DEFAULT 1
-        )
-    """)
+        SELECT v.is_correct, v.feedback
+        FROM verdicts v
+        JOIN code_blobs b ON b.id = v.code_id
+        WHERE b.hash = ? AND v.task_hash = ?
+    """, (code_hash(user_code), task_hash))
 
-    # Результаты выполнения заданий
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS results (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT NOT NULL,
-            task_text TEXT NOT NULL,
-            task_type TEXT NOT NULL,
-            user_code TEXT NOT NULL,
-            is_correct INTEGER NOT NULL,
-            feedback TEXT NOT NULL,
-            timestamp TEXT NOT NULL
-        )
-    """)
+    row = cur.fetchone()
+    conn.close()
 
-    # Журнал действий администратора
+    if row:
+        return bool(row[0]), row[1]
+    return None
+
+
+def insert_verdict(cur, user_code: str, task_hash: str,
+                   is_correct: bool, feedback: str):
+    code_id = insert_code_blob(cur, user_code)
     cur.execute("""
-        CREATE TABLE IF NOT EXISTS admin_log (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            admin TEXT NOT NULL,
-            action TEXT NOT NULL,
-            timestamp TEXT NOT NULL
-        )
-    """)
+        INSERT OR REPLACE INTO verdicts (code_id, task_hash, is_correct, feedback)
+        VALUES (?, ?, ?, ?)
+    """, (code_id, task_hash, int(is_correct), feedback))
+
 
+@metrics.timed("db.save_verdict")
+def save_verdict(user_code: str, task_hash: str,
+                 is_correct: bool, feedback: str):
+    conn = get_connection()
+    cur = conn.cursor()
+    insert_verdict(cur, user_code, task_hash, is_correct, feedback)
     conn.commit()
     conn.close()
 
 
 # -------------------------------------------------
-# ПОЛЬЗОВАТЕЛИ
+# АРХИВ РЕЗУЛЬТАТОВ
 # -------------------------------------------------
+#
+# Таблица results со временем растёт, а статистика читает её
+# целиком. Решения старше заданного срока переносятся в таблицы
+# по семестрам: results_archive_<год>_1 (январь–июнь) и
+# results_archive_<год>_2 (июль–декабрь); id сохраняются.
+# Архив хранится в той же базе: перенос — одна транзакция
+# (в режиме WAL транзакция над несколькими присоединёнными
+# файлами не атомарна).
+#
+# Запросы без периода читают только results. Если период задан,
+# results_source добавляет архивные таблицы, которые с ним
+# пересекаются.
+
+# Решения старше этого срока переносятся в архив (дни)
+ARCHIVE_AGE_DAYS = 365
+
+RESULT_COLUMNS = (
+    "id, user_id, task_text, task_type_id, code_id, "
+    "is_correct, feedback_id, feedback_args, created_at"
+)
+
+
+def _as_date(value):
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def _day_start(day: date) -> int:
+    """
+    Начало дня по локальному времени -> Unix-время.
+    """
+    return int(datetime(day.year, day.month, day.day).timestamp())
 
-def add_user(username: str, password: str, role: str):
-    password_hash = hash_password(password)
+
+def period_bounds(date_from=None, date_to=None):
+    """
+    Период по дням (обе границы включительно; date или "ГГГГ-ММ-ДД")
+    -> (since, until): Unix-время для сравнения с created_at,
+    since включительно, until не включительно; None — без границы.
+    """
+    date_from = _as_date(date_from)
+    date_to = _as_date(date_to)
+    return (
+        _day_start(date_from) if date_from else None,
+        _day_start(date_to + timedelta(days=1)) if date_to else None
+    )
+
+
+def period_conditions(since=None, until=None, column: str = "created_at"):
+    conditions, params = [], []
+    if since is not None:
+        conditions.append(f"{column} >= ?")
+        params.append(since)
+    if until is not None:
+        conditions.append(f"{column} < ?")
+        params.append(until)
+    return conditions, params
+
+
+def _term_bounds(year: int, half: int):
+    """
+    (начало, начало следующего семестра) в Unix-времени.
+    """
+    start = date(year, 1 if half == 1 else 7, 1)
+    end = date(year, 7, 1) if half == 1 else date(year + 1, 1, 1)
+    return _day_start(start), _day_start(end)
+
+
+def results_source(cur, since=None, until=None) -> str:
+    """
+    Выражение FROM для выборки результатов за период: results
+    или results вместе с пересекающимися архивными таблицами.
+    Без границ периода архив не читается.
+    """
+    if since is None and until is None:
+        return "results"
+
+    conditions, params = [], []
+    if since is not None:
+        conditions.append("last_at >= ?")
+        params.append(since)
+    if until is not None:
+        conditions.append("first_at < ?")
+        params.append(until)
+
+    cur.execute(f"""
+        SELECT table_name FROM archive_terms
+        WHERE {" AND ".join(conditions)}
+        ORDER BY term
+    """, params)
+    tables = [r[0] for r in cur.fetchall()]
+    if not tables:
+        return "results"
+
+    union = " UNION ALL ".join(
+        f"SELECT {RESULT_COLUMNS} FROM {table}"
+        for table in ["results"] + tables
+    )
+    return f"({union})"
+
+
+@metrics.timed("db.archive_results")
+def archive_results(older_than_days: int = ARCHIVE_AGE_DAYS,
+                    now: datetime = None) -> dict:
+    """
+    Переносит решения старше older_than_days дней в архивные
+    таблицы. Возвращает {семестр: перенесено строк}.
+    """
+    if older_than_days < 0:
+        raise ValueError("Срок хранения не может быть отрицательным")
+
+    now = now or datetime.now()
+    before = int((now - timedelta(days=older_than_days)).timestamp())
 
     conn = get_connection()
     cur = conn.cursor()
 
-    cur.execute("""
-        INSERT INTO users (username, password_hash, role)
-        VALUES (?, ?, ?)
-    """, (username, password_hash, role))
+    cur.execute("SELECT MIN(created_at) FROM results WHERE created_at < ?",
+                (before,))
+    first = cur.fetchone()[0]
+    moved = {}
+
+    if first is not None:
+        first = datetime.fromtimestamp(first)
+        year, half = first.year, 1 if first.month <= 6 else 2
+
+        while True:
+            start, end = _term_bounds(year, half)
+            if start >= before:
+                break
+            end = min(end, before)
+
+            term = f"{year}_{half}"
+            table = f"results_archive_{term}"
+            _create_results_table(cur, table)
+            _create_results_index(cur, table)
+
+            cur.execute(f"""
+                INSERT INTO {table} ({RESULT_COLUMNS})
+                SELECT {RESULT_COLUMNS}
+                FROM results
+                WHERE created_at >= ? AND created_at < ?
+            """, (start, end))
+
+            if cur.rowcount > 0:
+                moved[term] = cur.rowcount
+                cur.execute(f"""
+                    INSERT OR REPLACE INTO archive_terms (
+                        term, table_name, first_at, last_at, rows
+                    )
+                    SELECT ?, ?, MIN(created_at), MAX(created_at), COUNT(*)
+                    FROM {table}
+                """, (term, table))
+
+            year, half = (year, 2) if half == 1 else (year + 1, 1)
+
+        cur.execute("DELETE FROM results WHERE created_at < ?", (before,))
 
     conn.commit()
     conn.close()
 
+    if moved:
+        _invalidate_results_cache()
+    return moved
 
-def update_user_password(username: str, new_password: str):
+
+def _invalidate_results_cache():
     """
-    Сброс пароля пользователя.
-    Пароль передаётся в открытом виде и хешируется внутри функции.
+    Перенесённые записи убираются из кэша истории этого процесса;
+    в других процессах они остаются в кэше до его вытеснения.
     """
-    password_hash = hash_password(new_password)
+    from ml.results_cache import invalidate
+    invalidate()
 
+
+@metrics.timed("db.get_archive_terms")
+def get_archive_terms():
     conn = get_connection()
     cur = conn.cursor()
 
     cur.execute("""
-        UPDATE users
-        SET password_hash = ?
-        WHERE username = ?
-    """, (password_hash, username))
+        SELECT term, table_name, first_at, last_at, rows
+        FROM archive_terms
+        ORDER BY term
+    """)
 
-    if cur.rowcount == 0:
-        conn.close()
-        raise ValueError("Пользователь не найден")
+    rows = cur.fetchall()
+    conn.close()
 
-    conn.commit()
+    return [{
+        "term": r[0],
+        "table_name": r[1],
+        "first_timestamp": format_timestamp(r[2]),
+        "last_timestamp": format_timestamp(r[3]),
+        "rows": r[4]
+    } for r in rows]
+
+
+# -------------------------------------------------
+# СТАТИСТИКА
+# -------------------------------------------------
+
+# Агрегаты считаются по user_id, имя подставляется после
+# группировки — по одному поиску в users на студента
+STATISTICS_SELECT = f"""
+    SELECT u.username, s.attempts, s.correct,
+           {TIMESTAMP_SQL.format("s.last_at")}
+    FROM (
+        SELECT user_id,
+               COUNT(*) AS attempts,
+               SUM(is_correct) AS correct,
+               MAX(created_at) AS last_at
+        FROM {{source}}
+        {{where}}
+        GROUP BY user_id
+    ) s
+    JOIN users u ON u.id = s.user_id
+"""
+
+
+def _statistics_row(r) -> dict:
+    return {
+        "username": r[0],
+        "attempts": r[1],
+        "correct": r[2] or 0,
+        "last_attempt": r[3]
+    }
+
+
+@metrics.timed("db.get_students_statistics")
+def get_students_statistics(date_from=None, date_to=None):
+    """
+    Статистика по студентам. Архив учитывается, только если
+    задан период (см. get_results_by_user).
+    """
+    since, until = period_bounds(date_from, date_to)
+    conditions, params = period_conditions(since, until)
+    where = "WHERE " + " AND ".join(conditions) if conditions else ""
+
+    conn = get_connection()
+    cur = conn.cursor()
+
+    cur.execute(STATISTICS_SELECT.format(
+        source=results_source(cur, since, until), where=where
+    ), params)
+
+    rows = cur.fetchall()
     conn.close()
 
+    return [_statistics_row(r) for r in rows]
+
+
+STATISTICS_SORT_COLUMNS = {
+    "username": "u.username",
+    "attempts": "s.attempts",
+    "correct": "s.correct",
+    "last_attempt": "s.last_at"
+}
+
+
+@metrics.timed("db.get_students_statistics_page")
+def get_students_statistics_page(offset: int = 0, limit: int = PAGE_SIZE,
+                                 order_by: str = "username",
+                                 descending: bool = False,
+                                 search: str = None,
+                                 date_from=None, date_to=None):
+    since, until = period_bounds(date_from, date_to)
+    conditions, params = period_conditions(since, until)
+    where = "WHERE " + " AND ".join(conditions) if conditions else ""
+
+    search_where = ""
+    if search:
+        search_where = "WHERE u.username LIKE ? ESCAPE '\\'"
+        params.append(_like_pattern(search))
+
+    order = _order_clause(
+        STATISTICS_SORT_COLUMNS, order_by, descending, "u.username"
+    )
 
-def toggle_user_active(username: str):
     conn = get_connection()
     cur = conn.cursor()
 
-    cur.execute("""
-        SELECT is_active FROM users WHERE username = ?
-    """, (username,))
-    row = cur.fetchone()
+    cur.execute(f"""
+        {STATISTICS_SELECT.format(
+            source=results_source(cur, since, until), where=where
+        )}
+        {search_where}
+        {order}
+        LIMIT ? OFFSET ?
+    """, (*params, limit, offset))
 
-    if not row:
-        conn.close()
-        raise ValueError("Пользователь не найден")
+    rows = cur.fetchall()
+    conn.close()
+
+    return [_statistics_row(r) for r in rows]
+
+
+# -------------------------------------------------
+# ЖУРНАЛ ДЕЙСТВИЙ АДМИНИСТРАТОРА
+# -------------------------------------------------
 
-    new_status = 0 if row[0] else 1
+def insert_admin_log(cur, admin: str, action: str) -> dict:
+    """
+    Добавляет запись журнала в открытой транзакции.
+    """
+    created_at = int(time.time())
 
     cur.execute("""
-        UPDATE users
-        SET is_active = ?
-        WHERE username = ?
-    """, (new_status, username))
+        INSERT INTO admin_log (admin_id, action, created_at)
+        VALUES (?, ?, ?)
+    """, (
+        _user_id(cur, admin, role="admin"),
+        action,
+        created_at
+    ))
 
-    conn.commit()
-    conn.close()
+    return {
+        "id": cur.lastrowid,
+        "admin": admin,
+        "action": action,
+        "timestamp": format_timestamp(created_at)
+    }
 
 
-# --- АЛИАС ДЛЯ UI (ВАЖНО) ---
-def set_user_active(username: str):
+@metrics.timed("db.log_admin_action")
+def log_admin_action(admin: str, action: str):
     """
-    Алиас для admin_panel.py.
+    Записывает действие в журнал и возвращает добавленную запись.
     """
-    toggle_user_active(username)
+    def update(entry, row):
+        rows = entry["rows"]
+        rows.insert(0, row)
+        if len(rows) > LOG_CACHE_SIZE:
+            del rows[LOG_CACHE_SIZE:]
+            entry["complete"] = False
+
+    row = _write_cached(
+        "admin_log",
+        lambda cur: insert_admin_log(cur, admin, action),
+        update
+    )
+    return dict(row)
+
+
+def _load_admin_logs(cur) -> dict:
+    """
+    Последние LOG_CACHE_SIZE записей журнала (новые сверху);
+    complete — в кэше весь журнал.
+    """
+    cur.execute(f"""
+        SELECT l.id, u.username, l.action,
+               {TIMESTAMP_SQL.format("l.created_at")}
+        FROM admin_log l
+        JOIN users u ON u.id = l.admin_id
+        ORDER BY l.id DESC
+        LIMIT ?
+    """, (LOG_CACHE_SIZE + 1,))
 
+    rows = [{
+        "id": r[0],
+        "admin": r[1],
+        "action": r[2],
+        "timestamp": r[3]
+    } for r in cur.fetchall()]
 
-def get_user(username: str):
-    conn = get_connection()
-    cur = conn.cursor()
+    return {
+        "rows": rows[:LOG_CACHE_SIZE],
+        "complete": len(rows) <= LOG_CACHE_SIZE
+    }
 
-    cur.execute("""
-        SELECT username, password_hash, role, is_active
-        FROM users
-        WHERE username = ?
-    """, (username,))
 
-    row = cur.fetchone()
-    conn.close()
+def _cached_admin_logs() -> dict:
+    return _cached_table("admin_log", _load_admin_logs)
 
-    if row:
-        return {
-            "username": row[0],
-            "password_hash": row[1],
-            "role": row[2],
-            "is_active": bool(row[3])
-        }
-    return None
 
+@metrics.timed("db.get_admin_logs")
+def get_admin_logs():
+    entry = _cached_admin_logs()
+    with _table_cache_lock:
+        if entry["complete"]:
+            return [{
+                "admin": r["admin"],
+                "action": r["action"],
+                "timestamp": r["timestamp"]
+            } for r in entry["rows"]]
 
-def get_all_users():
     conn = get_connection()
     cur = conn.cursor()
 
-    cur.execute("""
-        SELECT username, role, is_active
-        FROM users
-        ORDER BY username
+    cur.execute(f"""
+        SELECT u.username, l.action, {TIMESTAMP_SQL.format("l.created_at")}
+        FROM admin_log l
+        JOIN users u ON u.id = l.admin_id
+        ORDER BY l.id DESC
     """)
 
     rows = cur.fetchall()
     conn.close()
 
     return [{
-        "username": r[0],
-        "role": r[1],
-        "is_active": bool(r[2])
+        "admin": r[0],
+        "action": r[1],
+        "timestamp": r[2]
     } for r in rows]
 
 
-# -------------------------------------------------
-# АУТЕНТИФИКАЦИЯ
-# -------------------------------------------------
+# «Дата» сортируется по id — порядок записи совпадает с хронологией
+LOG_SORT_COLUMNS = {
+    "timestamp": "l.id",
+    "admin": "u.username",
+    "action": "l.action"
+}
 
-def authenticate(username: str, password: str):
-    password_hash = hash_password(password)
+
+@metrics.timed("db.get_admin_logs_page")
+def get_admin_logs_page(offset: int = 0, limit: int = PAGE_SIZE,
+                        order_by: str = "timestamp", descending: bool = True,
+                        search: str = None):
+    # страницы журнала в порядке по умолчанию (новые сверху)
+    # отдаются из кэша последних записей
+    if order_by == "timestamp" and descending and not search:
+        entry = _cached_admin_logs()
+        with _table_cache_lock:
+            if entry["complete"] or offset + limit <= len(entry["rows"]):
+                return [dict(r) for r in entry["rows"][offset:offset + limit]]
+
+    where, params = "", []
+    if search:
+        where = ("WHERE u.username LIKE ? ESCAPE '\\' "
+                 "OR l.action LIKE ? ESCAPE '\\'")
+        params += [_like_pattern(search)] * 2
+
+    order = _order_clause(LOG_SORT_COLUMNS, order_by, descending, "l.id")
 
     conn = get_connection()
     cur = conn.cursor()
 
-    cur.execute("""
-        SELECT username, role
-        FROM users
-        WHERE username = ?
-          AND password_hash = ?
-          AND is_active = 1
-    """, (username, password_hash))
+    cur.execute(f"""
+        SELECT l.id, u.username, l.action,
+               {TIMESTAMP_SQL.format("l.created_at")}
+        FROM admin_log l
+        JOIN users u ON u.id = l.admin_id
+        {where}
+        {order}
+        LIMIT ? OFFSET ?
+    """, (*params, limit, offset))
 
-    row = cur.fetchone()
+    rows = cur.fetchall()
     conn.close()
 
-    if row:
-        return {
-            "username": row[0],
-            "role": row[1]
-        }
-    return None
+    return [{
+        "id": r[0],
+        "admin": r[1],
+        "action": r[2],
+        "timestamp": r[3]
+    } for r in rows]
 
 
 # -------------------------------------------------
-# РЕЗУЛЬТАТЫ
+# ЗАДАНИЯ НА ОБУЧЕНИЕ МОДЕЛИ
 # -------------------------------------------------
 
-def save_result(username, task_text, task_type, user_code, is_correct, feedback):
+@metrics.timed("db.create_training_job")
+def create_training_job(started_by: str) -> int:
     conn = get_connection()
     cur = conn.cursor()
 
     cur.execute("""
-        INSERT INTO results (
-            username, task_text, task_type,
-            user_code, is_correct, feedback, timestamp
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?)
+        INSERT INTO training_jobs (started_by, status, started_at)
+        VALUES (?, 'running', ?)
     """, (
-        username,
-        task_text,
-        task_type,
-        user_code,
-        int(is_correct),
-        feedback,
+        started_by,
         datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     ))
 
+    job_id = cur.lastrowid
     conn.commit()
     conn.close()
+    return job_id
 
 
-def get_results_by_user(username):
+@metrics.timed("db.finish_training_job")
+def finish_training_job(job_id: int, status: str,
+                        model_version: str = None, message: str = None):
+    """
+    Фиксирует завершение задания: status — 'done', 'failed' или 'cancelled'.
+    """
     conn = get_connection()
     cur = conn.cursor()
 
     cur.execute("""
-        SELECT task_text, task_type, is_correct, feedback, timestamp
-        FROM results
-        WHERE username = ?
-        ORDER BY timestamp DESC
-    """, (username,))
+        UPDATE training_jobs
+        SET status = ?, finished_at = ?, model_version = ?, message = ?
+        WHERE id = ?
+    """, (
+        status,
+        datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        model_version,
+        message,
+        job_id
+    ))
 
-    rows = cur.fetchall()
+    conn.commit()
     conn.close()
 
-    return [{
-        "task_text": r[0],
-        "task_type": r[1],
-        "is_correct": bool(r[2]),
-        "feedback": r[3],
-        "timestamp": r[4]
-    } for r in rows]
-
-
-# -------------------------------------------------
-# СТАТИСТИКА
-# -------------------------------------------------
 
-def get_students_statistics():
+@metrics.timed("db.get_training_jobs")
+def get_training_jobs(limit: int = 20):
     conn = get_connection()
     cur = conn.cursor()
 
     cur.execute("""
-        SELECT username,
-               COUNT(*) AS attempts,
-               SUM(is_correct) AS correct,
-               MAX(timestamp) AS last_attempt
-        FROM results
-        GROUP BY username
-    """)
+        SELECT id, started_by, status, started_at,
+               finished_at, model_version, message
+        FROM training_jobs
+        ORDER BY id DESC
+        LIMIT ?
+    """, (limit,))
 
     rows = cur.fetchall()
     conn.close()
 
     return [{
-        "username": r[0],
-        "attempts": r[1],
-        "correct": r[2] or 0,
-        "last_attempt": r[3]
+        "id": r[0],
+        "started_by": r[1],
+        "status": r[2],
+        "started_at": r[3],
+        "finished_at": r[4],
+        "model_version": r[5],
+        "message": r[6]
     } for r in rows]
 
 
 # -------------------------------------------------
-# ЖУРНАЛ ДЕЙСТВИЙ АДМИНИСТРАТОРА
+# ТРАССИРОВКИ МЕДЛЕННЫХ ПРОВЕРОК
 # -------------------------------------------------
 
-def log_admin_action(admin: str, action: str):
-    conn = get_connection()
-    cur = conn.cursor()
-
+def insert_check_profile(cur, result_id, task_type: str, trace: dict) -> int:
     cur.execute("""
-        INSERT INTO admin_log (admin, action, timestamp)
-        VALUES (?, ?, ?)
+        INSERT INTO check_profiles (
+            result_id, task_type, elapsed_ms, trace, timestamp
+        )
+        VALUES (?, ?, ?, ?, ?)
     """, (
-        admin,
-        action,
+        result_id,
+        task_type,
+        trace["elapsed_ms"],
+        json.dumps(trace, ensure_ascii=False),
         datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     ))
+    return cur.lastrowid
+
+
+@metrics.timed("db.save_check_profile")
+def save_check_profile(result_id, task_type: str, trace: dict) -> int:
+    conn = get_connection()
+    cur = conn.cursor()
+
+    profile_id = insert_check_profile(cur, result_id, task_type, trace)
 
     conn.commit()
     conn.close()
+    return profile_id
 
 
-def get_admin_logs():
+@metrics.timed("db.get_check_profiles")
+def get_check_profiles(limit: int = 100):
+    """
+    Последние трассировки (без самих трассировок) с именем
+    пользователя из сохранённого решения — в том числе
+    уже перенесённого в архив.
+    """
     conn = get_connection()
     cur = conn.cursor()
 
     cur.execute("""
-        SELECT admin, action, timestamp
-        FROM admin_log
+        SELECT id, result_id, task_type, elapsed_ms, timestamp
+        FROM check_profiles
         ORDER BY id DESC
-    """)
-
+        LIMIT ?
+    """, (limit,))
     rows = cur.fetchall()
+
+    result_ids = sorted({r[1] for r in rows if r[1] is not None})
+    usernames = {}
+    if result_ids:
+        # решение сохраняется раньше трассировки, поэтому искать
+        # его нужно только среди записей до последней из них
+        until = datetime.strptime(
+            max(r[4] for r in rows), "%Y-%m-%d %H:%M:%S"
+        ) + timedelta(seconds=1)
+        source = results_source(cur, until=int(until.timestamp()))
+        placeholders = ",".join("?" * len(result_ids))
+        cur.execute(f"""
+            SELECT r.id, u.username
+            FROM {source} r
+            JOIN users u ON u.id = r.user_id
+            WHERE r.id IN ({placeholders})
+        """, result_ids)
+        usernames = dict(cur.fetchall())
+
     conn.close()
 
     return [{
-        "admin": r[0],
-        "action": r[1],
-        "timestamp": r[2]
+        "id": r[0],
+        "result_id": r[1],
+        "username": usernames.get(r[1]),
+        "task_type": r[2],
+        "elapsed_ms": r[3],
+        "timestamp": r[4]
     } for r in rows]
+
+
+@metrics.timed("db.get_check_profile")
+def get_check_profile(profile_id: int):
+    conn = get_connection()
+    cur = conn.cursor()
+
+    cur.execute("SELECT trace FROM check_profiles WHERE id = ?", (profile_id,))
+    row = cur.fetchone()
+    conn.close()
+
+    return json.loads(row[0]) if row else None
@@ -0,0 +1,362 @@
+import os
+import re
+import ast
+import csv
+import json
+import hashlib
+import zipfile
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# ======================================================
+# ЗАГРУЗКА ОБУЧАЮЩЕГО ДАТАСЕТА
+# ======================================================
+#
+# Загруженный CSV читается порциями: заголовок проверяется
+# до чтения данных, строки проверяются и очищаются от дублей,
+# результат сохраняется в data/train_data.csv (нормализованный)
+# и в колоночный кэш data/train_data.npz, который читает обучение.
+# Кэш тоже пишется по порциям (массив на колонку и порцию), так что
+# память при загрузке не растёт с размером файла — кроме множества
+# ключей строк для удаления дублей (16 байт на строку).
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DATA_DIR = PROJECT_ROOT / "data"
+DATASET_PATH = DATA_DIR / "train_data.csv"
+
+REQUIRED_COLUMNS = {"task_text", "task_type"}
+COLUMNS = ["task_text", "task_type", "input_data"]
+
+CHUNK_SIZE = 10_000
+
+# Тип задания — идентификатор вида list_sum, text_words
+TASK_TYPE_RE = re.compile(r"^[a-z][a-z0-9_]*$")
+
+# Причины отбраковки строк
+REJECT_EMPTY_TEXT = "empty_text"
+REJECT_UNKNOWN_TYPE = "unknown_task_type"
+REJECT_MALFORMED_INPUT = "malformed_input_data"
+
+
+def cache_path_for(csv_path) -> Path:
+    return Path(csv_path).with_suffix(".npz")
+
+
+# ======================================================
+# ПРОВЕРКА СТРУКТУРЫ
+# ======================================================
+
+def read_header(path) -> list:
+    """
+    Читает только первую строку CSV.
+    """
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        header = next(csv.reader(f), None)
+
+    if not header:
+        raise ValueError("Файл пуст или не является CSV")
+
+    return [h.strip() for h in header]
+
+
+def check_schema(path) -> list:
+    header = read_header(path)
+    missing = REQUIRED_COLUMNS - set(header)
+    if missing:
+        raise ValueError(
+            f"Отсутствуют обязательные колонки: {', '.join(sorted(missing))}"
+        )
+    return header
+
+
+# ======================================================
+# ПРОВЕРКА СТРОК
+# ======================================================
+
+def _is_valid_input(value: str) -> bool:
+    """
+    Пустые и «простые» строки допустимы; значение, похожее
+    на литерал Python (список, словарь, строка в кавычках),
+    должно разбираться через ast.literal_eval.
+    """
+    value = value.strip()
+    if not value or value[0] not in "[{(\"'":
+        return True
+    try:
+        ast.literal_eval(value)
+        return True
+    except (ValueError, SyntaxError):
+        return False
+
+
+def known_task_types(csv_path=DATASET_PATH) -> set:
+    """
+    Типы заданий, которые принимаются при загрузке датасета:
+    шаблоны генератора (ml/task_generator.py) и типы, уже
+    встречающиеся в текущем датасете.
+    """
+    from ml.task_generator import TASKS
+
+    types = set(TASKS)
+    csv_path = Path(csv_path)
+    if csv_path.exists():
+        cached = _read_cache(csv_path)
+        if cached is not None:
+            types.update(cached[0]["task_type"])
+        else:
+            for chunk in pd.read_csv(
+                    csv_path, usecols=["task_type"], dtype=str,
+                    keep_default_na=False, encoding="utf-8-sig",
+                    chunksize=CHUNK_SIZE):
+                types.update(chunk["task_type"].str.strip())
+
+    return {t for t in types if TASK_TYPE_RE.match(t)}
+
+
+def _validate_chunk(chunk: pd.DataFrame, allowed_types, rejected: dict):
+    text = chunk["task_text"].str.strip()
+    task_type = chunk["task_type"].str.strip()
+    input_data = chunk["input_data"].str.strip()
+
+    empty = text == ""
+    if allowed_types is not None:
+        bad_type = ~task_type.isin(allowed_types)
+    else:
+        bad_type = ~task_type.str.match(TASK_TYPE_RE)
+    bad_type &= ~empty
+    malformed = ~input_data.map(_is_valid_input) & ~empty & ~bad_type
+
+    rejected[REJECT_EMPTY_TEXT] += int(empty.sum())
+    rejected[REJECT_UNKNOWN_TYPE] += int(bad_type.sum())
+    rejected[REJECT_MALFORMED_INPUT] += int(malformed.sum())
+
+    valid = ~(empty | bad_type | malformed)
+    return pd.DataFrame({
+        "task_text": text[valid],
+        "task_type": task_type[valid],
+        "input_data": input_data[valid]
+    })
+
+
+# ======================================================
+# ЗАГРУЗКА
+# ======================================================
+
+def ingest_dataset(src_path, dest_path=DATASET_PATH, allowed_types=None,
+                   chunk_size: int = CHUNK_SIZE, progress=None) -> dict:
+    """
+    Проверяет и нормализует CSV-датасет порциями по chunk_size строк.
+
+    Строки с пустым текстом, неизвестным типом задания (не из
+    allowed_types; по умолчанию — known_task_types()) или
+    некорректными input_data отбрасываются, дубликаты удаляются.
+    Результат атомарно записывается в dest_path, рядом создаётся
+    колоночный кэш (.npz). progress(rows) вызывается после каждой
+    порции.
+
+    Возвращает отчёт: rows_total, rows_valid, duplicates, rejected,
+    content_sha256.
+    """
+    if allowed_types is None:
+        allowed_types = known_task_types()
+    return _ingest(src_path, dest_path, allowed_types, chunk_size, progress)
+
+
+def _ingest(src_path, dest_path, allowed_types, chunk_size, progress) -> dict:
+    """
+    ingest_dataset; allowed_types=None — проверяется только формат
+    типа задания, dest_path=None — исходный файл не переписывается,
+    а кэш строится для него самого.
+    """
+    header = check_schema(src_path)
+    usecols = [c for c in COLUMNS if c in header]
+
+    rejected = {
+        REJECT_EMPTY_TEXT: 0,
+        REJECT_UNKNOWN_TYPE: 0,
+        REJECT_MALFORMED_INPUT: 0
+    }
+    seen = set()
+    rows_total = 0
+    duplicates = 0
+    digest = hashlib.sha256()
+
+    out = None
+    tmp_path = None
+    if dest_path is not None:
+        dest_path = Path(dest_path)
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=".tmp-", suffix=".csv", dir=dest_path.parent
+        )
+        out = os.fdopen(fd, "w", encoding="utf-8", newline="")
+
+    csv_path = Path(dest_path if dest_path is not None else src_path)
+    cache, cache_tmp = _open_cache(csv_path)
+
+    try:
+        if out is not None:
+            writer = csv.writer(out, lineterminator="\n")
+            writer.writerow(COLUMNS)
+
+        reader = pd.read_csv(
+            src_path,
+            usecols=usecols,
+            dtype=str,
+            keep_default_na=False,
+            encoding="utf-8-sig",
+            chunksize=chunk_size
+        )
+
+        for index, chunk in enumerate(reader):
+            rows_total += len(chunk)
+            if "input_data" not in chunk:
+                chunk["input_data"] = ""
+
+            valid = _validate_chunk(chunk, allowed_types, rejected)
+            columns = {c: [] for c in COLUMNS}
+
+            for row in valid.itertuples(index=False):
+                key = hashlib.blake2b(
+                    "\x1f".join(row).encode("utf-8"), digest_size=16
+                ).digest()
+                if key in seen:
+                    duplicates += 1
+                    continue
+                seen.add(key)
+
+                if out is not None:
+                    writer.writerow(row)
+                digest.update(key)
+                for name, value in zip(COLUMNS, row):
+                    columns[name].append(value)
+
+            _write_cache_chunk(cache, index, columns)
+            if progress is not None:
+                progress(rows_total)
+
+        if not seen:
+            raise ValueError("В датасете нет ни одной корректной строки")
+
+        if out is not None:
+            out.flush()
+            os.fsync(out.fileno())
+            out.close()
+            os.replace(tmp_path, dest_path)
+        content_sha256 = digest.hexdigest()
+        _finish_cache(cache, cache_tmp, csv_path, content_sha256)
+    except BaseException:
+        if out is not None:
+            out.close()
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        cache.close()
+        if os.path.exists(cache_tmp):
+            os.remove(cache_tmp)
+        raise
+
+    return {
+        "rows_total": rows_total,
+        "rows_valid": len(seen),
+        "duplicates": duplicates,
+        "rejected": rejected,
+        "content_sha256": content_sha256
+    }
+
+
+# ======================================================
+# КОЛОНОЧНЫЙ КЭШ
+# ======================================================
+
+# Формат — обычный .npz (np.load): массивы "<колонка>.<номер порции>"
+# и "meta". Файл пишется во временный и атомарно переименовывается.
+
+def _open_cache(csv_path: Path):
+    cache_path = cache_path_for(csv_path)
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=".tmp-", suffix=".npz", dir=cache_path.parent
+    )
+    os.close(fd)
+    return zipfile.ZipFile(tmp_path, "w", allowZip64=True), tmp_path
+
+
+def _write_array(cache: zipfile.ZipFile, name: str, array: np.ndarray):
+    with cache.open(name + ".npy", "w", force_zip64=True) as f:
+        np.lib.format.write_array(f, array, allow_pickle=False)
+
+
+def _write_cache_chunk(cache: zipfile.ZipFile, index: int, columns: dict):
+    for name, values in columns.items():
+        _write_array(cache, f"{name}.{index:06d}", np.array(values, dtype=str))
+
+
+def _finish_cache(cache: zipfile.ZipFile, tmp_path: str, csv_path: Path,
+                  content_sha256: str):
+    stat = os.stat(csv_path)
+    meta = {
+        "csv_size": stat.st_size,
+        "csv_mtime_ns": stat.st_mtime_ns,
+        "content_sha256": content_sha256
+    }
+    _write_array(cache, "meta", np.array(json.dumps(meta)))
+    cache.close()
+    os.replace(tmp_path, cache_path_for(csv_path))
+
+
+def _read_cache(csv_path: Path):
+    cache_path = cache_path_for(csv_path)
+    if not cache_path.exists():
+        return None
+
+    with np.load(cache_path, allow_pickle=False) as cache:
+        meta = json.loads(str(cache["meta"]))
+        stat = os.stat(csv_path)
+        if (meta["csv_size"] != stat.st_size
+                or meta["csv_mtime_ns"] != stat.st_mtime_ns):
+            return None
+
+        # кэш прежнего формата — по массиву на колонку, без номера порции
+        parts = {name: [] for name in COLUMNS}
+        for key in sorted(cache.files):
+            name = key.partition(".")[0]
+            if name in parts:
+                parts[name].append(cache[key])
+        df = pd.DataFrame({
+            name: np.concatenate(arrays) if arrays else np.array([], dtype=str)
+            for name, arrays in parts.items()
+        })
+
+    return df, meta
+
+
+def load_dataset(csv_path=DATASET_PATH):
+    """
+    Возвращает (DataFrame, content_sha256) обучающего датасета.
+    Если колоночный кэш устарел или отсутствует (CSV правили
+    вручную), кэш строится заново; сам CSV не изменяется.
+    """
+    csv_path = Path(csv_path)
+    cached = _read_cache(csv_path)
+
+    if cached is None:
+        # файл уже в датасете: типы заданий не сверяются со списком
+        _ingest(csv_path, None, None, CHUNK_SIZE, None)
+        cached = _read_cache(csv_path)
+
+    df, meta = cached
+    return df, meta["content_sha256"]
+
+
+def describe_report(report: dict) -> str:
+    rejected = report["rejected"]
+    return (
+        f"Строк в файле: {report['rows_total']}\n"
+        f"Принято: {report['rows_valid']}\n"
+        f"Дубликатов: {report['duplicates']}\n"
+        f"Отброшено — пустой текст: {rejected[REJECT_EMPTY_TEXT]}, "
+        f"неизвестный тип: {rejected[REJECT_UNKNOWN_TYPE]}, "
+        f"некорректные входные данные: {rejected[REJECT_MALFORMED_INPUT]}"
+    )
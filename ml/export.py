@@ -0,0 +1,197 @@
+import csv
+
+from ml.database import (
+    STATISTICS_SELECT,
+    TIMESTAMP_SQL,
+    get_connection,
+    period_bounds,
+    period_conditions,
+    results_source
+)
+from ml.feedback import decode as decode_feedback
+
+# ======================================================
+# ЭКСПОРТ СТАТИСТИКИ И РЕЗУЛЬТАТОВ
+# ======================================================
+#
+# Строки читаются из курсора SQLite порциями и сразу пишутся
+# в файл (CSV или xlsx в режиме write-only), поэтому память
+# не зависит от количества выгружаемых строк.
+
+FETCH_SIZE = 5000
+
+# Предел строк на листе Excel (включая заголовок)
+XLSX_MAX_ROWS = 1_048_576
+
+STATISTICS_HEADER = [
+    "Студент",
+    "Количество попыток",
+    "Верных решений",
+    "Последняя попытка"
+]
+
+RESULTS_HEADER = [
+    "ID",
+    "Студент",
+    "Задание",
+    "Тип задания",
+    "Код решения",
+    "Верно",
+    "Отзыв",
+    "Время"
+]
+
+
+# ======================================================
+# ВЫБОРКА
+# ======================================================
+
+def _filters(cur, date_from=None, date_to=None, username=None):
+    """
+    Источник строк (с архивом, если задан период — см.
+    ml.database.results_source) и условия WHERE по периоду
+    (обе границы включительно) и студенту.
+    """
+    since, until = period_bounds(date_from, date_to)
+    conditions, params = period_conditions(since, until)
+
+    if username:
+        conditions.append("user_id = (SELECT id FROM users WHERE username = ?)")
+        params.append(username)
+
+    where = "WHERE " + " AND ".join(conditions) if conditions else ""
+    return results_source(cur, since, until), where, params
+
+
+def _iter_cursor(build_query, date_from, date_to, username):
+    """
+    build_query(source, where) -> текст запроса.
+    """
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        source, where, params = _filters(cur, date_from, date_to, username)
+        cur.execute(build_query(source, where), params)
+        while True:
+            rows = cur.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        conn.close()
+
+
+def iter_statistics(date_from=None, date_to=None, username=None):
+    rows = _iter_cursor(lambda source, where: f"""
+        {STATISTICS_SELECT.format(source=source, where=where)}
+        ORDER BY u.username
+    """, date_from, date_to, username)
+    return ((r[0], r[1], r[2] or 0, r[3]) for r in rows)
+
+
+def iter_results(date_from=None, date_to=None, username=None):
+    # пользователь, тип задания, код и шаблон отзыва хранятся
+    # в справочниках; отзыв собирается здесь. CROSS JOIN оставляет
+    # результаты внешним циклом (по id, без сортировки): иначе
+    # планировщик перебирает пользователей и сортирует всю выборку
+    rows = _iter_cursor(lambda source, where: f"""
+        SELECT r.id, u.username, r.task_text, t.name, b.code,
+               r.is_correct, f.text, r.feedback_args,
+               {TIMESTAMP_SQL.format("r.created_at")}
+        FROM (SELECT * FROM {source} {where}) r
+        CROSS JOIN users u ON u.id = r.user_id
+        JOIN task_types t ON t.id = r.task_type_id
+        JOIN feedback_texts f ON f.id = r.feedback_id
+        LEFT JOIN code_blobs b ON b.id = r.code_id
+        ORDER BY r.id
+    """, date_from, date_to, username)
+    return (
+        (r[0], r[1], r[2], r[3], r[4], r[5],
+         decode_feedback(r[6], r[7]), r[8])
+        for r in rows
+    )
+
+
+# ======================================================
+# ЗАПИСЬ
+# ======================================================
+
+def _write_csv(path: str, header: list, rows, progress) -> int:
+    count = 0
+    # utf-8-sig — чтобы Excel корректно открыл кириллицу
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(header)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+            if progress is not None and count % FETCH_SIZE == 0:
+                progress(count)
+    return count
+
+
+def _write_xlsx(path: str, title: str, header: list, rows, progress) -> int:
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet_number = 1
+    sheet = workbook.create_sheet(title)
+    sheet.append(header)
+    sheet_rows = 1
+    count = 0
+
+    for row in rows:
+        # лист Excel ограничен по числу строк — продолжаем на следующем
+        if sheet_rows >= XLSX_MAX_ROWS:
+            sheet_number += 1
+            sheet = workbook.create_sheet(f"{title} ({sheet_number})")
+            sheet.append(header)
+            sheet_rows = 1
+
+        sheet.append(row)
+        sheet_rows += 1
+        count += 1
+        if progress is not None and count % FETCH_SIZE == 0:
+            progress(count)
+
+    workbook.save(path)
+    return count
+
+
+def _export(path: str, title: str, header: list, rows, progress) -> int:
+    if str(path).lower().endswith(".csv"):
+        count = _write_csv(path, header, rows, progress)
+    else:
+        count = _write_xlsx(path, title, header, rows, progress)
+
+    if progress is not None:
+        progress(count)
+    return count
+
+
+def export_statistics(path: str, date_from=None, date_to=None,
+                      username=None, progress=None) -> int:
+    """
+    Выгружает статистику по студентам в .xlsx или .csv.
+    Возвращает количество выгруженных строк.
+    """
+    return _export(
+        path,
+        "Статистика",
+        STATISTICS_HEADER,
+        iter_statistics(date_from, date_to, username),
+        progress
+    )
+
+
+def export_results(path: str, date_from=None, date_to=None,
+                   username=None, progress=None) -> int:
+    """
+    Выгружает все решения (по одной строке на попытку)
+    в .xlsx или .csv. Возвращает количество выгруженных строк.
+    """
+    rows = (
+        (r[0], r[1], r[2], r[3], r[4], "да" if r[5] else "нет", r[6], r[7])
+        for r in iter_results(date_from, date_to, username)
+    )
+    return _export(path, "Результаты", RESULTS_HEADER, rows, progress)
@@ -0,0 +1,118 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+
+import joblib
+import numpy as np
+import scipy
+import sklearn
+from scipy import sparse
+
+from ml.model_service import MODEL_DIR
+
+# ======================================================
+# КЭШ TF-IDF ПРИЗНАКОВ
+# ======================================================
+#
+# Обученный векторизатор и разреженные матрицы train/test
+# сохраняются на диск. Ключ — хеш содержимого датасета,
+# параметров векторизатора и параметров разбиения, поэтому
+# при изменении только гиперпараметров модели векторизация
+# не повторяется. В ключ входят и версии scikit-learn и SciPy:
+# после их обновления сохранённый векторизатор и матрицы
+# не используются.
+
+CACHE_DIR = MODEL_DIR / "feature_cache"
+
+# Сколько наборов признаков хранить
+KEEP_ENTRIES = 3
+
+
+def cache_key(content_sha256: str, vectorizer_params: dict,
+              split_params: dict) -> str:
+    payload = json.dumps(
+        {
+            "dataset": content_sha256,
+            "vectorizer": vectorizer_params,
+            "split": split_params,
+            "sklearn": sklearn.__version__,
+            "scipy": scipy.__version__
+        },
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def load_features(key: str) -> dict | None:
+    """
+    Возвращает сохранённые признаки или None, если их нет.
+    Ключи: vectorizer, X_train, X_test, y_train, y_test, seconds.
+    """
+    entry = CACHE_DIR / key
+    if not (entry / "meta.json").exists():
+        return None
+
+    with open(entry / "meta.json", encoding="utf-8") as f:
+        meta = json.load(f)
+
+    with np.load(entry / "labels.npz", allow_pickle=False) as labels:
+        y_train = labels["y_train"]
+        y_test = labels["y_test"]
+
+    # отметка использования — для вытеснения старых записей
+    os.utime(entry / "meta.json")
+
+    return {
+        "vectorizer": joblib.load(entry / "vectorizer.pkl"),
+        "X_train": sparse.load_npz(entry / "X_train.npz"),
+        "X_test": sparse.load_npz(entry / "X_test.npz"),
+        "y_train": y_train,
+        "y_test": y_test,
+        "seconds": meta["seconds"]
+    }
+
+
+def save_features(key: str, vectorizer, X_train, X_test,
+                  y_train, y_test, seconds: float):
+    """
+    Сохраняет признаки; seconds — время их построения,
+    оно показывается как сэкономленное при попадании в кэш.
+    """
+    CACHE_DIR.mkdir(exist_ok=True)
+    entry = CACHE_DIR / key
+    tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=CACHE_DIR)
+
+    try:
+        joblib.dump(vectorizer, os.path.join(tmp_dir, "vectorizer.pkl"))
+        sparse.save_npz(os.path.join(tmp_dir, "X_train.npz"), X_train)
+        sparse.save_npz(os.path.join(tmp_dir, "X_test.npz"), X_test)
+        np.savez(
+            os.path.join(tmp_dir, "labels.npz"),
+            y_train=np.asarray(y_train, dtype=str),
+            y_test=np.asarray(y_test, dtype=str)
+        )
+        # meta.json пишется последним — признак завершённой записи
+        with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"seconds": seconds}, f)
+
+        if entry.exists():
+            shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp_dir, entry)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    _prune()
+
+
+def _prune(keep: int = KEEP_ENTRIES):
+    entries = sorted(
+        (p for p in CACHE_DIR.iterdir()
+         if p.is_dir() and (p / "meta.json").exists()),
+        key=lambda p: (p / "meta.json").stat().st_mtime
+    )
+    for p in entries[:-keep]:
+        shutil.rmtree(p, ignore_errors=True)
@@ -0,0 +1,76 @@
+import re
+from functools import lru_cache
+
+# ======================================================
+# ШАБЛОНЫ ОТЗЫВОВ О ПРОВЕРКЕ
+# ======================================================
+#
+# Отзывы check_solution строятся по нескольким шаблонам, и в таблице
+# results длинный русский текст повторялся в каждой строке. Теперь
+# хранится id шаблона (таблица feedback_texts) и, если у шаблона
+# есть подстановки, их значения (results.feedback_args, через
+# разделитель ARGS_SEPARATOR — разбор в разы быстрее JSON).
+#
+# encode(text) -> (шаблон, аргументы или None); decode — обратно.
+# Текст, не подходящий ни под один шаблон (или с разделителем
+# внутри подстановки), хранится как есть (аргументы None),
+# так что decode(*encode(text)) == text всегда.
+
+CORRECT = "Решение верное"
+NO_RESULT = "В решении должна быть переменная result"
+BAD_INPUT = "Ошибка разбора входных данных"
+TIMEOUT = "Превышено время выполнения решения"
+CODE_ERROR = "Ошибка в коде: {}"
+RUNTIME_ERROR = "Ошибка выполнения: {}"
+WRONG_RESULT = (
+    "Неверный результат.\n"
+    "Входные данные: {}\n"
+    "Ожидалось: {}\n"
+    "Получено: {}"
+)
+
+# Управляющий символ «разделитель единиц» (US)
+ARGS_SEPARATOR = "\x1f"
+
+# Шаблоны с подстановками {} (тексты без подстановок
+# совпадают сами с собой и в списке не нужны)
+TEMPLATES = (
+    WRONG_RESULT,
+    CODE_ERROR,
+    RUNTIME_ERROR,
+)
+
+
+def _pattern(template: str):
+    parts = template.split("{}")
+    return re.compile(
+        "(.*?)".join(re.escape(p) for p in parts[:-1])
+        + ("(.*)" if len(parts) > 1 else "")
+        + re.escape(parts[-1]),
+        re.DOTALL
+    )
+
+
+_PATTERNS = [(t, _pattern(t)) for t in TEMPLATES]
+
+
+@lru_cache(maxsize=4096)
+def encode(text: str):
+    """
+    Отзыв -> (шаблон, строка аргументов или None).
+    """
+    if ARGS_SEPARATOR in text:
+        return text, None
+    for template, pattern in _PATTERNS:
+        match = pattern.fullmatch(text)
+        if match:
+            return template, ARGS_SEPARATOR.join(match.groups())
+    # литеральные фигурные скобки в тексте без аргументов безопасны:
+    # decode применяет format только при наличии аргументов
+    return text, None
+
+
+def decode(template: str, args) -> str:
+    if args is None:
+        return template
+    return template.format(*args.split(ARGS_SEPARATOR))
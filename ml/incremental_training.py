@@ -0,0 +1,206 @@
+import os
+import time
+import hashlib
+
+import joblib
+import pandas as pd
+
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import accuracy_score
+
+from ml import dataset_ingest
+from ml.model_service import MODEL_DIR, dump_atomic
+
+# ======================================================
+# ИНКРЕМЕНТАЛЬНОЕ ДООБУЧЕНИЕ КЛАССИФИКАТОРА
+# ======================================================
+#
+# HashingVectorizer не хранит словарь, поэтому новые строки
+# датасета можно векторизовать без переобучения векторизатора,
+# а SGDClassifier дообучается на них через partial_fit.
+#
+# Данные читаются через ml/dataset_ingest.py (проверка строк,
+# удаление дублей, колоночный кэш) — те же строки, что видит
+# полное обучение.
+#
+# Контрольная точка хранит модель, размер прочитанной части
+# датасета (в байтах) с хешем этой части и число принятых из неё
+# строк. Если начало файла не изменилось, строки проверенного
+# датасета после этого числа — дописанные: дубли сохраняют первое
+# вхождение, поэтому начало проверенного датасета то же. Если
+# начало изменилось, модель строится заново.
+
+CHECKPOINT_PATH = MODEL_DIR / "incremental_checkpoint.pkl"
+
+MODEL_NAME = "SGDClassifier (incremental)"
+
+# Число проходов по данным при построении с нуля и при дообучении
+INITIAL_EPOCHS = 10
+UPDATE_EPOCHS = 3
+
+
+def build_vectorizer() -> HashingVectorizer:
+    return HashingVectorizer(
+        ngram_range=(1, 2),
+        n_features=2 ** 18,
+        alternate_sign=False
+    )
+
+
+def build_model() -> SGDClassifier:
+    return SGDClassifier(
+        loss="modified_huber",
+        random_state=42
+    )
+
+
+def fit_epochs(model, vectorizer, texts, labels, epochs, classes=None):
+    X = vectorizer.transform(texts)
+    for _ in range(epochs):
+        if classes is not None:
+            model.partial_fit(X, labels, classes=classes)
+            classes = None
+        else:
+            model.partial_fit(X, labels)
+
+
+# ======================================================
+# КОНТРОЛЬНАЯ ТОЧКА
+# ======================================================
+
+def _hash_prefix(path: str, size: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        remaining = size
+        while remaining > 0:
+            chunk = f.read(min(1 << 20, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+def load_checkpoint() -> dict | None:
+    if not CHECKPOINT_PATH.exists():
+        return None
+    return joblib.load(CHECKPOINT_PATH)
+
+
+def _checkpoint_is_valid(checkpoint: dict, data_path: str) -> bool:
+    if checkpoint is None:
+        return False
+    if checkpoint.get("data_path") != os.path.abspath(data_path):
+        return False
+
+    # контрольные точки до проверки строк через dataset_ingest
+    if "rows" not in checkpoint:
+        return False
+
+    offset = checkpoint["byte_offset"]
+    if os.path.getsize(data_path) < offset:
+        return False
+    return _hash_prefix(data_path, offset) == checkpoint["prefix_sha256"]
+
+
+# ======================================================
+# ОБУЧЕНИЕ
+# ======================================================
+
+def _train_from_scratch(df: pd.DataFrame):
+    """
+    Строит модель с нуля. Точность оценивается на отложенной
+    выборке, после чего модель дообучается и на ней.
+    """
+    vectorizer = build_vectorizer()
+    model = build_model()
+    classes = sorted(df["task_type"].unique())
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        df["task_text"],
+        df["task_type"],
+        test_size=0.2,
+        random_state=42,
+    )
+
+    fit_epochs(model, vectorizer, X_train, y_train, INITIAL_EPOCHS, classes)
+    accuracy = accuracy_score(y_test, model.predict(vectorizer.transform(X_test)))
+    fit_epochs(model, vectorizer, X_test, y_test, UPDATE_EPOCHS)
+
+    return vectorizer, model, accuracy
+
+
+def train_incremental(data_path: str) -> dict:
+    """
+    Дообучает модель на строках, добавленных в датасет после
+    последней контрольной точки. Возвращает сведения о прогоне:
+    mode ('scratch', 'update' или 'unchanged'), rows, accuracy, seconds,
+    а также vectorizer и model.
+
+    Для режима 'update' accuracy считается на новых строках
+    до дообучения (оценка «сначала проверка, потом обучение»).
+    """
+    started = time.perf_counter()
+
+    file_size = os.path.getsize(data_path)
+    checkpoint = load_checkpoint()
+    mode = "scratch"
+
+    df, _ = dataset_ingest.load_dataset(data_path)
+
+    if _checkpoint_is_valid(checkpoint, data_path):
+        new_rows = df.iloc[checkpoint["rows"]:]
+
+        vectorizer = checkpoint["vectorizer"]
+        model = checkpoint["model"]
+
+        if new_rows.empty:
+            return {
+                "mode": "unchanged",
+                "rows": 0,
+                "accuracy": checkpoint["accuracy"],
+                "seconds": time.perf_counter() - started,
+                "vectorizer": vectorizer,
+                "model": model
+            }
+
+        # partial_fit не умеет добавлять новые классы —
+        # в этом случае модель строится заново
+        if set(new_rows["task_type"]) <= set(model.classes_):
+            X_new = vectorizer.transform(new_rows["task_text"])
+            accuracy = accuracy_score(new_rows["task_type"], model.predict(X_new))
+            fit_epochs(
+                model, vectorizer,
+                new_rows["task_text"], new_rows["task_type"],
+                UPDATE_EPOCHS
+            )
+            mode = "update"
+            rows = len(new_rows)
+
+    if mode == "scratch":
+        vectorizer, model, accuracy = _train_from_scratch(df)
+        rows = len(df)
+
+    dump_atomic(
+        {
+            "data_path": os.path.abspath(data_path),
+            "byte_offset": file_size,
+            "prefix_sha256": _hash_prefix(data_path, file_size),
+            "rows": len(df),
+            "vectorizer": vectorizer,
+            "model": model,
+            "accuracy": accuracy
+        },
+        CHECKPOINT_PATH
+    )
+
+    return {
+        "mode": mode,
+        "rows": rows,
+        "accuracy": accuracy,
+        "seconds": time.perf_counter() - started,
+        "vectorizer": vectorizer,
+        "model": model
+    }
@@ -0,0 +1,223 @@
+import os
+import json
+import time
+import bisect
+import threading
+from functools import wraps
+
+# ======================================================
+# МЕТРИКИ ПРОИЗВОДИТЕЛЬНОСТИ
+# ======================================================
+#
+# Таймеры (гистограммы длительностей) и счётчики для горячих
+# участков: загрузка модели, предсказание, проверка решений,
+# запросы к БД. По умолчанию сбор выключен, и инструментированный
+# код только проверяет флаг: timer() возвращает общий пустой
+# контекстный менеджер, timed() сразу вызывает функцию.
+#
+# Включение: enable() или переменная окружения TASK_METRICS=1.
+# Экспорт: to_json() и to_prometheus() (текстовый формат Prometheus).
+#
+#   with metrics.timer("predict.transform"):
+#       X = vectorizer.transform([text])
+#
+#   @metrics.timed("db.save_result")
+#   def save_result(...): ...
+
+PREFIX = "task_system"
+
+# Границы корзин гистограмм (секунды)
+BUCKETS = (
+    0.00001, 0.000025, 0.00005,
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+_enabled = os.environ.get("TASK_METRICS", "") not in ("", "0")
+
+_histograms = {}
+_counters = {}
+_lock = threading.Lock()
+
+
+def enable(on: bool = True):
+    global _enabled
+    _enabled = bool(on)
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+# ======================================================
+# СБОР
+# ======================================================
+
+def inc(name: str, value: int = 1):
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def observe(name: str, seconds: float):
+    if not _enabled:
+        return
+    with _lock:
+        h = _histograms.get(name)
+        if h is None:
+            h = {
+                "count": 0,
+                "sum": 0.0,
+                "min": seconds,
+                "max": seconds,
+                "buckets": [0] * (len(BUCKETS) + 1)
+            }
+            _histograms[name] = h
+        h["count"] += 1
+        h["sum"] += seconds
+        h["min"] = min(h["min"], seconds)
+        h["max"] = max(h["max"], seconds)
+        h["buckets"][bisect.bisect_left(BUCKETS, seconds)] += 1
+
+
+class _Timer:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(name: str):
+    """
+    Контекстный менеджер, измеряющий длительность блока.
+    """
+    if not _enabled:
+        return _NULL_TIMER
+    return _Timer(name)
+
+
+def timed(name: str):
+    """
+    Декоратор: длительность каждого вызова функции.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+# ======================================================
+# ЭКСПОРТ
+# ======================================================
+
+def _quantile(h: dict, q: float) -> float:
+    """
+    Оценка квантиля по корзинам — верхняя граница корзины.
+    """
+    rank = q * h["count"]
+    seen = 0
+    for bound, count in zip(BUCKETS + (h["max"],), h["buckets"]):
+        seen += count
+        if seen >= rank:
+            return min(bound, h["max"])
+    return h["max"]
+
+
+def snapshot() -> dict:
+    """
+    {"enabled", "timers": {имя: {...}}, "counters": {имя: значение}};
+    длительности — в миллисекундах.
+    """
+    with _lock:
+        timers = {
+            name: {
+                "count": h["count"],
+                "total_ms": h["sum"] * 1000,
+                "mean_ms": h["sum"] / h["count"] * 1000,
+                "min_ms": h["min"] * 1000,
+                "max_ms": h["max"] * 1000,
+                "p50_ms": _quantile(h, 0.50) * 1000,
+                "p95_ms": _quantile(h, 0.95) * 1000
+            }
+            for name, h in sorted(_histograms.items())
+        }
+        counters = dict(sorted(_counters.items()))
+
+    return {"enabled": _enabled, "timers": timers, "counters": counters}
+
+
+def to_json() -> str:
+    return json.dumps(snapshot(), indent=4, ensure_ascii=False)
+
+
+def _label(name: str) -> str:
+    escaped = name.replace("\\", "\\\\").replace('"', '\\"')
+    return f'name="{escaped}"'
+
+
+def to_prometheus() -> str:
+    with _lock:
+        histograms = {n: dict(h, buckets=list(h["buckets"]))
+                      for n, h in _histograms.items()}
+        counters = dict(_counters)
+
+    family = f"{PREFIX}_duration_seconds"
+    lines = [
+        f"# HELP {family} Длительность операций",
+        f"# TYPE {family} histogram"
+    ]
+    for name, h in sorted(histograms.items()):
+        label = _label(name)
+        cumulative = 0
+        for bound, count in zip(BUCKETS, h["buckets"]):
+            cumulative += count
+            lines.append(f'{family}_bucket{{{label},le="{bound}"}} {cumulative}')
+        lines.append(f'{family}_bucket{{{label},le="+Inf"}} {h["count"]}')
+        lines.append(f"{family}_sum{{{label}}} {h['sum']}")
+        lines.append(f"{family}_count{{{label}}} {h['count']}")
+
+    family = f"{PREFIX}_events_total"
+    lines += [
+        f"# HELP {family} Счётчики событий",
+        f"# TYPE {family} counter"
+    ]
+    for name, value in sorted(counters.items()):
+        lines.append(f"{family}{{{_label(name)}}} {value}")
+
+    return "\n".join(lines) + "\n"
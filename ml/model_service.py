@@ -1,37 +1,255 @@
+import os
+import json
+import shutil
+import tempfile
 import joblib
+from datetime import datetime
 from pathlib import Path
 
+from ml import metrics
+
 # ======================================================
-# СЕРВИС РАБОТЫ С МОДЕЛЬЮ 
+# СЕРВИС РАБОТЫ С МОДЕЛЬЮ
 # ======================================================
 
 BASE_DIR = Path(__file__).resolve().parent
 MODEL_DIR = BASE_DIR / "models"
 MODEL_DIR.mkdir(exist_ok=True)
 
+# Файл модели старого формата (до введения версий)
 MODEL_PATH = MODEL_DIR / "model_task_classifier.pkl"
 
+# Версионированное хранилище:
+#   models/versions/<версия>/model_task_classifier.pkl
+#   models/versions/<версия>/metrics.json
+#   models/current — имя текущей версии
+VERSIONS_DIR = MODEL_DIR / "versions"
+CURRENT_POINTER = MODEL_DIR / "current"
+
+MODEL_FILENAME = "model_task_classifier.pkl"
+METRICS_FILENAME = "metrics.json"
+
+# Сколько версий хранить (включая текущую)
+KEEP_VERSIONS = 5
+
+LEGACY_VERSION = "legacy"
+
+
+# ======================================================
+# АТОМАРНАЯ ЗАПИСЬ
+# ======================================================
+
+def _fsync_dir(path: Path):
+    """
+    Сбрасывает на диск запись каталога (для rename).
+    На Windows каталог открыть нельзя — там шаг пропускается.
+    """
+    if os.name == "nt":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_pointer(version: str):
+    """
+    Атомарно переключает указатель current на версию.
+    """
+    fd, tmp_path = tempfile.mkstemp(prefix=".current-", dir=MODEL_DIR)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, CURRENT_POINTER)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _fsync_dir(MODEL_DIR)
+
+
+def dump_atomic(obj, path):
+    """
+    Записывает объект joblib-файлом так, чтобы читатель
+    никогда не увидел недописанный файл.
+    """
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            joblib.dump(obj, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _fsync_dir(path.parent)
+
+
+def _new_version_name() -> str:
+    return datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+
+
+# ======================================================
+# ВЕРСИИ
+# ======================================================
+
+def current_version() -> str | None:
+    """
+    Имя текущей версии модели.
+    Если версий ещё нет, но есть файл старого формата — 'legacy'.
+    """
+    try:
+        version = CURRENT_POINTER.read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        version = ""
+
+    if version and (VERSIONS_DIR / version / MODEL_FILENAME).exists():
+        return version
+
+    if MODEL_PATH.exists():
+        return LEGACY_VERSION
+    return None
+
+
+def _version_names() -> list:
+    if not VERSIONS_DIR.exists():
+        return []
+    return sorted(
+        p.name for p in VERSIONS_DIR.iterdir()
+        if p.is_dir()
+        and not p.name.startswith(".")
+        and (p / MODEL_FILENAME).exists()
+    )
 
-def save_model(model_data: dict):
+
+def list_versions() -> list:
+    """
+    Список сохранённых версий (новые первыми) с их метриками.
+    """
+    current = current_version()
+    versions = []
+
+    for name in reversed(_version_names()):
+        metrics_path = VERSIONS_DIR / name / METRICS_FILENAME
+        version_metrics = {}
+        if metrics_path.exists():
+            with open(metrics_path, encoding="utf-8") as f:
+                version_metrics = json.load(f)
+
+        versions.append({
+            "version": name,
+            "metrics": version_metrics,
+            "is_current": name == current
+        })
+
+    return versions
+
+
+def _prune_versions(keep: int = KEEP_VERSIONS):
+    current = current_version()
+    names = _version_names()
+
+    for name in names[:-keep] if keep > 0 else names:
+        if name == current:
+            continue
+        shutil.rmtree(VERSIONS_DIR / name, ignore_errors=True)
+
+    # недописанные каталоги прерванных сохранений
+    for p in VERSIONS_DIR.glob(".tmp-*"):
+        shutil.rmtree(p, ignore_errors=True)
+
+
+def rollback_model(version: str | None = None) -> str:
+    """
+    Делает текущей указанную версию, а без аргумента —
+    версию, предшествующую текущей.
+    """
+    names = _version_names()
+
+    if version is None:
+        current = current_version()
+        older = names[:names.index(current)] if current in names else []
+        if not older:
+            raise ValueError("Нет предыдущей версии модели для отката")
+        version = older[-1]
+
+    if version not in names:
+        raise ValueError(f"Версия модели не найдена: {version}")
+
+    _write_pointer(version)
+    return version
+
+
+# ======================================================
+# СОХРАНЕНИЕ И ЗАГРУЗКА
+# ======================================================
+
+def save_model(model_data: dict, scores: dict | None = None) -> str:
     """
-    Сохраняет обученную модель классификатора.
+    Сохраняет обученную модель классификатора новой версией.
     Используется ТОЛЬКО в процессе обучения.
+
+    Файлы пишутся во временный каталог, сбрасываются на диск
+    и атомарно переименовываются; затем переключается указатель
+    current. Читатель всегда видит либо старую, либо новую
+    версию целиком. scores — метрики качества, сохраняются
+    рядом с моделью в metrics.json.
     """
-    joblib.dump(model_data, MODEL_PATH)
+    VERSIONS_DIR.mkdir(exist_ok=True)
+
+    version = _new_version_name()
+    tmp_dir = Path(tempfile.mkdtemp(prefix=".tmp-", dir=VERSIONS_DIR))
 
+    try:
+        with open(tmp_dir / MODEL_FILENAME, "wb") as f:
+            joblib.dump(model_data, f)
+            f.flush()
+            os.fsync(f.fileno())
 
-def load_model() -> dict | None:
+        with open(tmp_dir / METRICS_FILENAME, "w", encoding="utf-8") as f:
+            json.dump(scores or {}, f, indent=4, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+
+        _fsync_dir(tmp_dir)
+        os.replace(tmp_dir, VERSIONS_DIR / version)
+        _fsync_dir(VERSIONS_DIR)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    _write_pointer(version)
+    _prune_versions()
+
+    return version
+
+
+@metrics.timed("model.load")
+def load_model(version: str | None = None) -> dict | None:
     """
-    Загружает модель классификатора.
+    Загружает модель классификатора (по умолчанию — текущую версию).
     В runtime генерации заданий НЕ используется.
     """
-    if not MODEL_PATH.exists():
+    if version is None:
+        version = current_version()
+
+    if version is None:
         return None
-    return joblib.load(MODEL_PATH)
+
+    if version == LEGACY_VERSION:
+        return joblib.load(MODEL_PATH)
+
+    return joblib.load(VERSIONS_DIR / version / MODEL_FILENAME)
 
 
 def model_exists() -> bool:
     """
     Проверка наличия модели (для интерфейса обучения).
     """
-    return MODEL_PATH.exists()
+    return current_version() is not None
@@ -0,0 +1,202 @@
+import os
+import hmac
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# ======================================================
+# ХЕШИРОВАНИЕ ПАРОЛЕЙ
+# ======================================================
+#
+# Пароли хешируются функцией с солью и настраиваемой стоимостью
+# (scrypt или PBKDF2 из hashlib). Параметры хранятся в самом хеше:
+#   scrypt$<n>$<r>$<p>$<соль hex>$<хеш hex>
+#   pbkdf2_sha256$<итерации>$<соль hex>$<хеш hex>
+# поэтому смена параметров не ломает уже сохранённые хеши.
+#
+# Старые хеши — SHA-256 без соли (64 hex-символа) — по-прежнему
+# проверяются; needs_rehash для них истинно, и при следующем
+# успешном входе хеш заменяется новым (см. ml/sessions.py, ml/auth.py).
+#
+# Один расчёт стоит десятки миллисекунд процессорного времени.
+# Чтобы он не останавливал цикл событий сервиса, асинхронные
+# варианты выполняются в отдельном пуле потоков (hashlib
+# освобождает GIL на время расчёта).
+
+ALGORITHMS = ("scrypt", "pbkdf2_sha256")
+
+# Стоимость по умолчанию: scrypt n=2**14, r=8 (16 МБ памяти на расчёт)
+ALGORITHM = "scrypt"
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+PBKDF2_ITERATIONS = 600_000
+
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+KDF_WORKERS = os.cpu_count() or 2
+
+_algorithm = ALGORITHM
+_scrypt = (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+_iterations = PBKDF2_ITERATIONS
+_workers = KDF_WORKERS
+
+_executor = None
+_lock = threading.Lock()
+
+
+def configure(algorithm: str = None, scrypt_n: int = None,
+              pbkdf2_iterations: int = None, workers: int = None):
+    """
+    Алгоритм и стоимость для новых хешей; workers — размер пула
+    асинхронных расчётов (действует для пула, созданного после вызова).
+    """
+    global _algorithm, _scrypt, _iterations, _workers
+    if algorithm is not None:
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Неизвестный алгоритм хеширования: {algorithm}")
+        _algorithm = algorithm
+    if scrypt_n is not None:
+        if scrypt_n < 2 or scrypt_n & (scrypt_n - 1):
+            raise ValueError("Параметр n для scrypt должен быть степенью двойки")
+        _scrypt = (int(scrypt_n), _scrypt[1], _scrypt[2])
+    if pbkdf2_iterations is not None:
+        _iterations = int(pbkdf2_iterations)
+    if workers is not None:
+        _workers = int(workers)
+
+
+def _scrypt_hash(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(
+        password.encode("utf-8"), salt=salt, n=n, r=r, p=p,
+        # с запасом: по умолчанию OpenSSL ограничивает память 32 МБ
+        maxmem=2 * 128 * n * r * p + 1024 * 1024,
+        dklen=HASH_BYTES
+    )
+
+
+def _pbkdf2_hash(password: str, salt: bytes, iterations: int) -> bytes:
+    return hashlib.pbkdf2_hmac(
+        "sha256", password.encode("utf-8"), salt, iterations, HASH_BYTES
+    )
+
+
+def _legacy_hash(password: str) -> str:
+    return hashlib.sha256(password.encode("utf-8")).hexdigest()
+
+
+def _is_legacy(stored: str) -> bool:
+    return len(stored) == 64 and "$" not in stored
+
+
+# ======================================================
+# ХЕШ И ПРОВЕРКА
+# ======================================================
+
+def hash_password(password: str) -> str:
+    salt = os.urandom(SALT_BYTES)
+    if _algorithm == "scrypt":
+        n, r, p = _scrypt
+        digest = _scrypt_hash(password, salt, n, r, p)
+        return f"scrypt${n}${r}${p}${salt.hex()}${digest.hex()}"
+
+    digest = _pbkdf2_hash(password, salt, _iterations)
+    return f"pbkdf2_sha256${_iterations}${salt.hex()}${digest.hex()}"
+
+
+def verify_password(password: str, stored: str) -> bool:
+    """
+    Сравнение за постоянное время. Нераспознанный или пустой
+    хеш (например, у заблокированной записи без пароля) — False.
+    """
+    if not stored:
+        return False
+
+    if _is_legacy(stored):
+        return hmac.compare_digest(stored, _legacy_hash(password))
+
+    parts = stored.split("$")
+    try:
+        if parts[0] == "scrypt" and len(parts) == 6:
+            n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+            digest = _scrypt_hash(password, bytes.fromhex(parts[4]), n, r, p)
+        elif parts[0] == "pbkdf2_sha256" and len(parts) == 4:
+            digest = _pbkdf2_hash(
+                password, bytes.fromhex(parts[2]), int(parts[1])
+            )
+        else:
+            return False
+    except ValueError:
+        return False
+
+    return hmac.compare_digest(digest.hex(), parts[-1])
+
+
+def needs_rehash(stored: str) -> bool:
+    """
+    Хеш старого формата или с параметрами, отличными от текущих.
+    """
+    if not stored:
+        return False
+    if _is_legacy(stored):
+        return True
+
+    parts = stored.split("$")
+    if parts[0] != _algorithm:
+        return True
+    if _algorithm == "scrypt":
+        return tuple(parts[1:4]) != tuple(str(v) for v in _scrypt)
+    return parts[1] != str(_iterations)
+
+
+# Хеш для проверки при неизвестном пользователе: ответ занимает
+# столько же времени, и по нему нельзя узнать, есть ли такое имя
+_dummy_hash = None
+
+
+def verify_dummy(password: str):
+    global _dummy_hash
+    if _dummy_hash is None or needs_rehash(_dummy_hash):
+        _dummy_hash = hash_password("")
+    verify_password(password, _dummy_hash)
+
+
+# ======================================================
+# АСИНХРОННЫЕ ВАРИАНТЫ (пул потоков)
+# ======================================================
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=_workers, thread_name_prefix="kdf"
+            )
+        return _executor
+
+
+def shutdown():
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+async def hash_password_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_pool(), hash_password, password)
+
+
+async def verify_password_async(password: str, stored: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _pool(), verify_password, password, stored
+    )
+
+
+async def verify_dummy_async(password: str):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_pool(), verify_dummy, password)
@@ -1,5 +1,6 @@
+from ml import metrics
 from ml.checkers import check_solution
-from ml.model_service import load_model, model_exists
+from ml.model_service import load_model, current_version
 
 
 # -------------------------------------------------
@@ -7,28 +8,46 @@ from ml.model_service import load_model, model_exists
 # -------------------------------------------------
 
 _MODEL_CACHE = None
+_MODEL_VERSION = None
 
 
 def _get_model():
-    global _MODEL_CACHE
+    """
+    Возвращает модель из кэша. Если после переобучения
+    (или отката) текущая версия сменилась — перезагружает её.
+    """
+    global _MODEL_CACHE, _MODEL_VERSION
 
-    if not model_exists():
+    version = current_version()
+    if version is None:
         raise RuntimeError("Обученная модель не найдена")
 
-    if _MODEL_CACHE is None:
-        _MODEL_CACHE = load_model()
+    if _MODEL_CACHE is None or version != _MODEL_VERSION:
+        metrics.inc("model.cache_miss")
+        _MODEL_CACHE = load_model(version)
+        _MODEL_VERSION = version
 
     return _MODEL_CACHE
 
 
+def reload_model():
+    """
+    Подгружает текущую версию модели заранее
+    (вызывается по завершении обучения).
+    """
+    return _get_model()
+
+
 def _predict_task_type(task_text: str) -> str:
     model_data = _get_model()
 
     vectorizer = model_data["vectorizer"]
     model = model_data["model"]
 
-    X = vectorizer.transform([task_text])
-    return model.predict(X)[0]
+    with metrics.timer("predict.transform"):
+        X = vectorizer.transform([task_text])
+    with metrics.timer("predict.model"):
+        return model.predict(X)[0]
 
 
 # -------------------------------------------------
@@ -0,0 +1,260 @@
+import os
+import sys
+import time
+import threading
+from collections import Counter
+
+from ml import metrics
+
+# ======================================================
+# ПРОФИЛИРОВАНИЕ МЕДЛЕННЫХ ПРОВЕРОК
+# ======================================================
+#
+# Выборочный профилировщик: пока проверка выполняется, отдельный
+# поток раз в SAMPLE_INTERVAL секунд снимает стек её потока
+# (sys._current_frames). Если проверка уложилась в порог,
+# выборки отбрасываются; если нет — из них собирается трассировка
+# (самые «горячие» функции, строки и стеки), которая сохраняется
+# вместе с id решения (таблица check_profiles, ml/database.py).
+#
+# В отличие от cProfile, выборки почти не замедляют сам код,
+# поэтому режим можно держать включённым. По умолчанию выключен:
+# configure(threshold_ms=...) или переменная окружения
+# TASK_PROFILE_SLOW_MS.
+#
+#   probe = profiling.probe()
+#   with probe:
+#       check_solution(...)
+#   if probe.trace is not None:
+#       database.save_check_profile(result_id, task_type, probe.trace)
+#
+# Пока код держит GIL в одной долгой операции на C (например,
+# сортировка огромного списка), выборка откладывается до её конца.
+
+SLOW_THRESHOLD_MS = 500
+SAMPLE_INTERVAL = 0.005
+
+# Глубина стека и размер сохраняемой трассировки
+MAX_DEPTH = 64
+TOP_FUNCTIONS = 30
+TOP_LINES = 20
+TOP_STACKS = 20
+
+
+def _env_threshold():
+    value = os.environ.get("TASK_PROFILE_SLOW_MS", "")
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+_threshold_ms = _env_threshold()
+
+# id потока -> активный _Probe
+_active = {}
+_lock = threading.Lock()
+_wakeup = threading.Event()
+_sampler = None
+
+
+def configure(threshold_ms: float = None):
+    """
+    Порог в миллисекундах; None выключает профилирование.
+    """
+    global _threshold_ms
+    _threshold_ms = float(threshold_ms) if threshold_ms is not None else None
+
+
+def threshold_ms():
+    return _threshold_ms
+
+
+# ======================================================
+# СБОР ВЫБОРОК
+# ======================================================
+
+def _sampler_loop():
+    while True:
+        _wakeup.wait()
+        time.sleep(SAMPLE_INTERVAL)
+        frames = sys._current_frames()
+        with _lock:
+            if not _active:
+                _wakeup.clear()
+                continue
+            for thread_id, probe in _active.items():
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    probe._sample(frame)
+
+
+def _ensure_sampler():
+    global _sampler
+    with _lock:
+        if _sampler is None:
+            _sampler = threading.Thread(
+                target=_sampler_loop,
+                name="slow-check-sampler",
+                daemon=True
+            )
+            _sampler.start()
+
+
+def _frame_key(frame) -> tuple:
+    code = frame.f_code
+    return (code.co_filename, code.co_firstlineno, code.co_name, frame.f_lineno)
+
+
+class _Probe:
+    def __init__(self, threshold_ms: float):
+        self.threshold_ms = threshold_ms
+        self.trace = None
+        self._stacks = Counter()
+        self._registered = False
+
+    def __enter__(self):
+        _ensure_sampler()
+        self._base = sys._getframe(1)
+        self._thread_id = threading.get_ident()
+        with _lock:
+            # вложенная проверка уже профилируется внешней
+            if self._thread_id not in _active:
+                _active[self._thread_id] = self
+                self._registered = True
+                _wakeup.set()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed_ms = (time.perf_counter() - self._started) * 1000
+        if self._registered:
+            with _lock:
+                _active.pop(self._thread_id, None)
+        self._base = None
+
+        if elapsed_ms >= self.threshold_ms:
+            self.trace = _build_trace(self._stacks, elapsed_ms)
+            metrics.inc("check.slow_profiled")
+        return False
+
+    def _sample(self, frame):
+        """
+        Вызывается потоком выборки под _lock.
+        """
+        stack = []
+        while frame is not None and frame is not self._base:
+            stack.append(_frame_key(frame))
+            frame = frame.f_back
+        if stack:
+            # от внешнего вызова к внутреннему
+            self._stacks[tuple(reversed(stack[:MAX_DEPTH]))] += 1
+
+
+class _NullProbe:
+    __slots__ = ()
+    trace = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_PROBE = _NullProbe()
+
+
+def probe(threshold_ms: float = None):
+    """
+    Контекстный менеджер вокруг одной проверки. После выхода
+    probe.trace — трассировка (если вызов был дольше порога)
+    или None. threshold_ms переопределяет настройку модуля
+    (для процессов пула, где configure не вызывался).
+    """
+    if threshold_ms is None:
+        threshold_ms = _threshold_ms
+    if threshold_ms is None:
+        return _NULL_PROBE
+    return _Probe(threshold_ms)
+
+
+# ======================================================
+# ТРАССИРОВКА
+# ======================================================
+
+def _function_name(key: tuple) -> str:
+    filename, first_line, name, _ = key
+    return f"{name} ({os.path.basename(filename)}:{first_line})"
+
+
+def _line_name(key: tuple) -> str:
+    filename, _, name, line = key
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def _build_trace(stacks: Counter, elapsed_ms: float) -> dict:
+    """
+    {"elapsed_ms", "interval_ms", "samples",
+     "functions": [{"function", "self", "total"}],
+     "lines": [{"line", "count"}], "stacks": [{"stack", "count"}]}
+    """
+    self_counts = Counter()
+    total_counts = Counter()
+    lines = Counter()
+
+    for stack, count in stacks.items():
+        innermost = stack[-1]
+        self_counts[_function_name(innermost)] += count
+        lines[_line_name(innermost)] += count
+        for name in {_function_name(key) for key in stack}:
+            total_counts[name] += count
+
+    return {
+        "elapsed_ms": elapsed_ms,
+        "interval_ms": SAMPLE_INTERVAL * 1000,
+        "samples": sum(stacks.values()),
+        "functions": [
+            {"function": name, "self": self_counts[name], "total": total}
+            for name, total in total_counts.most_common(TOP_FUNCTIONS)
+        ],
+        "lines": [
+            {"line": name, "count": count}
+            for name, count in lines.most_common(TOP_LINES)
+        ],
+        "stacks": [
+            {"stack": ";".join(_function_name(key) for key in stack),
+             "count": count}
+            for stack, count in stacks.most_common(TOP_STACKS)
+        ]
+    }
+
+
+def format_trace(trace: dict, limit: int = 15) -> str:
+    """
+    Текстовый отчёт для панели администратора.
+    """
+    samples = trace["samples"]
+    lines = [
+        f"Длительность: {trace['elapsed_ms']:.1f} мс, выборок: {samples} "
+        f"(раз в {trace['interval_ms']:.0f} мс)",
+        ""
+    ]
+    if not samples:
+        lines.append("Выборок нет: вызов был короче интервала выборки "
+                     "или всё время держал GIL")
+        return "\n".join(lines)
+
+    def percent(count):
+        return f"{count / samples * 100:5.1f}%"
+
+    lines.append("Функции (всего / собственное время):")
+    for item in trace["functions"][:limit]:
+        lines.append(f"  {percent(item['total'])} {percent(item['self'])}  "
+                     f"{item['function']}")
+
+    lines += ["", "Строки:"]
+    for item in trace["lines"][:limit]:
+        lines.append(f"  {percent(item['count'])}  {item['line']}")
+
+    return "\n".join(lines)
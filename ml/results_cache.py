@@ -0,0 +1,179 @@
+import sys
+import bisect
+import threading
+from collections import OrderedDict
+
+from ml import database
+
+# ======================================================
+# КЭШ ИСТОРИИ РЕЗУЛЬТАТОВ ПО ПОЛЬЗОВАТЕЛЯМ
+# ======================================================
+#
+# История студента хранится в памяти и при повторных запросах
+# не перечитывается целиком:
+#   - save_result этого процесса дописывает новую запись в кэш;
+#   - при каждом чтении из БД догружаются только строки
+#     с id > последнего прочитанного (индекс results(username, id)),
+#     так что видны и записи других процессов.
+# Записи, дописанные локально, при догрузке не дублируются —
+# строки хранятся по id.
+#
+# Объём кэша ограничен MEMORY_BUDGET байт (оценка по размеру
+# строк); при превышении вытесняются давно не запрашиваемые
+# пользователи.
+
+MEMORY_BUDGET = 32 * 1024 * 1024
+
+# Оценка накладных расходов на одну запись (словарь, int, bool)
+ROW_OVERHEAD = 400
+
+_budget = MEMORY_BUDGET
+
+# username -> {"rows": {id: запись}, "ids": отсортированные id,
+#              "synced_id": int, "size": int};
+# порядок — от давно запрошенных к недавним
+_cache = OrderedDict()
+_size = 0
+_lock = threading.Lock()
+
+
+def configure(memory_budget: int = None):
+    global _budget
+    if memory_budget is not None:
+        _budget = int(memory_budget)
+        with _lock:
+            _evict()
+
+
+def _row_size(row: dict) -> int:
+    return ROW_OVERHEAD + sum(
+        sys.getsizeof(row[key])
+        for key in ("task_text", "task_type", "feedback", "timestamp")
+    )
+
+
+def _evict(keep: str = None):
+    """
+    Вытесняет давно не запрашиваемых пользователей, пока кэш
+    не уложится в бюджет. Вызывается под _lock.
+    """
+    global _size
+    for username in list(_cache):
+        if _size <= _budget:
+            break
+        if username == keep and len(_cache) > 1:
+            continue
+        _size -= _cache.pop(username)["size"]
+
+
+def _add_rows(entry: dict, rows):
+    global _size
+    for row in rows:
+        if row["id"] in entry["rows"]:
+            continue
+        size = _row_size(row)
+        entry["rows"][row["id"]] = row
+        # строки приходят почти всегда по возрастанию id
+        if not entry["ids"] or row["id"] > entry["ids"][-1]:
+            entry["ids"].append(row["id"])
+        else:
+            bisect.insort(entry["ids"], row["id"])
+        entry["size"] += size
+        _size += size
+
+
+# ======================================================
+# ЧТЕНИЕ
+# ======================================================
+
+def _refresh(username: str, since_id: int = 0) -> list:
+    """
+    Догружает новые строки пользователя и возвращает его
+    записи с id > since_id по возрастанию id.
+    """
+    while True:
+        with _lock:
+            entry = _cache.get(username)
+            synced_id = entry["synced_id"] if entry is not None else 0
+
+        # запрос к БД — вне блокировки
+        rows = database.get_results_since(username, synced_id)
+
+        with _lock:
+            entry = _cache.get(username)
+            if entry is None:
+                if synced_id:
+                    # запись вытеснили во время запроса —
+                    # догруженных строк недостаточно, читаем заново
+                    continue
+                entry = {"rows": {}, "ids": [], "synced_id": 0, "size": 0}
+                _cache[username] = entry
+
+            _add_rows(entry, rows)
+            if rows:
+                entry["synced_id"] = max(entry["synced_id"], rows[-1]["id"])
+
+            _cache.move_to_end(username)
+            start = bisect.bisect_right(entry["ids"], since_id)
+            result = [entry["rows"][i] for i in entry["ids"][start:]]
+            _evict(keep=username)
+            return result
+
+
+def get_results(username: str):
+    """
+    История пользователя в формате ml.database.get_results_by_user
+    (новые сверху).
+    """
+    return sorted(
+        _refresh(username),
+        key=lambda r: (r["timestamp"], r["id"]),
+        reverse=True
+    )
+
+
+def get_results_since(username: str, since_id: int = 0):
+    """
+    Записи пользователя с id > since_id (по возрастанию id):
+    клиент передаёт id последней полученной записи и получает
+    только новые.
+    """
+    return _refresh(username, since_id)
+
+
+# ======================================================
+# ЗАПИСЬ И СБРОС
+# ======================================================
+
+def add_result(username: str, row: dict):
+    """
+    Дописывает сохранённый результат. Если история пользователя
+    ещё не закэширована — ничего не делает: она будет прочитана
+    из БД при первом запросе.
+    """
+    with _lock:
+        entry = _cache.get(username)
+        if entry is None:
+            return
+        _add_rows(entry, [row])
+        _evict(keep=username)
+
+
+def invalidate(username: str = None):
+    global _size
+    with _lock:
+        if username is None:
+            _cache.clear()
+            _size = 0
+        elif username in _cache:
+            _size -= _cache.pop(username)["size"]
+
+
+def stats() -> dict:
+    with _lock:
+        return {
+            "users": len(_cache),
+            "rows": sum(len(e["rows"]) for e in _cache.values()),
+            "bytes": _size,
+            "budget": _budget
+        }
@@ -0,0 +1,334 @@
+import time
+import hashlib
+import secrets
+import threading
+
+from ml import database
+
+# ======================================================
+# СЕССИИ ПОЛЬЗОВАТЕЛЕЙ
+# ======================================================
+#
+# После входа выдаётся непрозрачный токен. Проверка токена на
+# каждом запросе — поиск в словаре в памяти, без хеширования пароля.
+# К БД проверка обращается только при промахе кэша (сессии
+# сохраняются в таблице), при сверке раз в REVALIDATE_INTERVAL
+# и при удалении истёкшей сессии.
+#
+# Отзыв:
+#   - блокировка пользователя или сброс пароля (ml/database.py)
+#     сразу удаляют его сессии из кэша этого процесса и из таблицы
+#     sessions;
+#   - если пользователя изменил другой процесс (например, админ-панель
+#     при работающем HTTP-сервисе), запись кэша не старше
+#     REVALIDATE_INTERVAL секунд: затем она сверяется с БД — активен
+#     ли пользователь и не изменился ли users.password_version.
+#     Перевод хеша пароля на новый алгоритм при входе версию
+#     не меняет и сессии не отзывает.
+#
+# Сохранение в таблице sessions (configure(persist=True)) нужно,
+# чтобы сессии переживали перезапуск процесса. В таблице хранится
+# SHA-256 токена, а не сам токен.
+#
+# HTTP-сервис использует асинхронные варианты (login_async,
+# get_session_async, revoke_session_async): чтение идёт в пуле
+# ml/async_db.py, запись — через его поток записи, так что цикл
+# событий не ждёт SQLite.
+
+# Время жизни сессии (секунды)
+SESSION_TTL = 8 * 60 * 60
+
+# Как часто запись кэша сверяется с БД (секунды)
+REVALIDATE_INTERVAL = 30
+
+TOKEN_BYTES = 32
+
+_ttl = SESSION_TTL
+_persist = False
+
+# token -> {"username", "role", "expires_at", "checked_at", "password_version"}
+_sessions = {}
+# username -> множество токенов (для отзыва всех сессий пользователя)
+_by_user = {}
+_lock = threading.Lock()
+
+
+def configure(ttl: int = None, persist: bool = None):
+    global _ttl, _persist
+    if ttl is not None:
+        _ttl = int(ttl)
+    if persist is not None:
+        _persist = bool(persist)
+
+
+def _token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+# ======================================================
+# КЭШ
+# ======================================================
+
+def _remember(token: str, entry: dict):
+    with _lock:
+        _sessions[token] = entry
+        _by_user.setdefault(entry["username"], set()).add(token)
+
+
+def _forget(token: str):
+    with _lock:
+        entry = _sessions.pop(token, None)
+        if entry is None:
+            return
+        tokens = _by_user.get(entry["username"])
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del _by_user[entry["username"]]
+
+
+def forget_user(username: str):
+    """
+    Удаляет из кэша все сессии пользователя.
+    """
+    with _lock:
+        for token in _by_user.pop(username, ()):
+            _sessions.pop(token, None)
+
+
+# ======================================================
+# ВЫДАЧА И ПРОВЕРКА
+# ======================================================
+
+def _new_session(user: dict) -> tuple:
+    """
+    (токен, запись кэша, ответ) для пользователя из ml.database.get_user.
+    """
+    token = secrets.token_urlsafe(TOKEN_BYTES)
+    now = time.time()
+    expires_at = int(now + _ttl)
+
+    entry = {
+        "username": user["username"],
+        "role": user["role"],
+        "expires_at": expires_at,
+        "checked_at": now,
+        "password_version": user["password_version"]
+    }
+    result = {
+        "token": token,
+        "username": user["username"],
+        "role": user["role"],
+        "expires_at": expires_at
+    }
+    return token, entry, result
+
+
+def create_session(user: dict) -> dict:
+    """
+    user — запись из ml.database.get_user.
+    Возвращает {"token", "username", "role", "expires_at"}.
+    """
+    token, entry, result = _new_session(user)
+    _remember(token, entry)
+
+    if _persist:
+        database.insert_session(
+            _token_hash(token), entry["username"], entry["role"],
+            entry["expires_at"]
+        )
+    return result
+
+
+async def create_session_async(user: dict) -> dict:
+    """
+    create_session для цикла событий: запись сессии в таблицу
+    идёт через поток записи ml/async_db.py.
+    """
+    from ml import async_db
+
+    token, entry, result = _new_session(user)
+    if _persist:
+        await async_db.write(
+            database.insert_session_row, _token_hash(token),
+            entry["username"], entry["role"], entry["expires_at"]
+        )
+    _remember(token, entry)
+    return result
+
+
+def login(username: str, password: str):
+    """
+    Проверяет логин и пароль активного пользователя.
+    Возвращает {"token", "username", "role", "expires_at"} или None.
+    """
+    if not username or not password:
+        return None
+
+    user = database.check_password(username, password)
+    if user is None:
+        return None
+
+    return create_session(user)
+
+
+async def login_async(username: str, password: str):
+    """
+    login для цикла событий: запросы к БД — в пуле чтения
+    ml/async_db.py, хеширование пароля — в пуле ml/passwords.py.
+    """
+    from ml import async_db
+
+    if not username or not password:
+        return None
+
+    user = await async_db.check_password(username, password)
+    if user is None:
+        return None
+
+    return await create_session_async(user)
+
+
+def _load_persisted(token: str):
+    row = database.get_session_row(_token_hash(token))
+    if row is None or not row["is_active"]:
+        return None
+
+    entry = {
+        "username": row["username"],
+        "role": row["role"],
+        "expires_at": row["expires_at"],
+        "checked_at": time.time(),
+        "password_version": row["password_version"]
+    }
+    _remember(token, entry)
+    return entry
+
+
+def _current_row(token: str, entry: dict):
+    """
+    Запись для сверки сессии с БД: строка сессии, если сессии
+    сохраняются (проверяется и то, что она не удалена), иначе
+    запись пользователя.
+    """
+    if _persist:
+        return database.get_session_row(_token_hash(token))
+    return database.get_user(entry["username"])
+
+
+def _still_valid(entry: dict, row) -> bool:
+    """
+    Пользователь мог быть заблокирован или сменить пароль
+    в другом процессе.
+    """
+    if (row is None or not row["is_active"]
+            or row["password_version"] != entry["password_version"]):
+        return False
+    entry["checked_at"] = time.time()
+    return True
+
+
+def _revalidate(token: str, entry: dict) -> bool:
+    if _still_valid(entry, _current_row(token, entry)):
+        return True
+    revoke_session(token)
+    return False
+
+
+def get_session(token: str):
+    """
+    Возвращает {"username", "role"} для действующего токена или None.
+    """
+    if not token:
+        return None
+
+    entry = _sessions.get(token)
+    if entry is None:
+        if not _persist:
+            return None
+        entry = _load_persisted(token)
+        if entry is None:
+            return None
+
+    now = time.time()
+    if entry["expires_at"] <= now:
+        revoke_session(token)
+        return None
+
+    if now - entry["checked_at"] > REVALIDATE_INTERVAL:
+        if not _revalidate(token, entry):
+            return None
+
+    return {"username": entry["username"], "role": entry["role"]}
+
+
+async def get_session_async(token: str):
+    """
+    get_session для цикла событий. Попадание в кэш без сверки
+    отвечается сразу; чтение из БД — в пуле ml/async_db.py,
+    удаление сессии — через его поток записи.
+    """
+    from ml import async_db
+
+    if not token:
+        return None
+
+    entry = _sessions.get(token)
+    if entry is None:
+        if not _persist:
+            return None
+        entry = await async_db.read(_load_persisted, token)
+        if entry is None:
+            return None
+
+    now = time.time()
+    if entry["expires_at"] <= now:
+        await revoke_session_async(token)
+        return None
+
+    if now - entry["checked_at"] > REVALIDATE_INTERVAL:
+        row = await async_db.read(_current_row, token, entry)
+        if not _still_valid(entry, row):
+            await revoke_session_async(token)
+            return None
+
+    return {"username": entry["username"], "role": entry["role"]}
+
+
+# ======================================================
+# ОТЗЫВ
+# ======================================================
+
+def revoke_session(token: str):
+    """
+    Выход: удаляет одну сессию.
+    """
+    _forget(token)
+    if _persist:
+        database.delete_session(_token_hash(token))
+
+
+async def revoke_session_async(token: str):
+    """
+    revoke_session для цикла событий (через поток записи ml/async_db.py).
+    """
+    from ml import async_db
+
+    _forget(token)
+    if _persist:
+        await async_db.write(database.delete_session_row, _token_hash(token))
+
+
+def purge_expired() -> int:
+    """
+    Удаляет истёкшие сессии; возвращает число удалённых из кэша.
+    """
+    now = time.time()
+    with _lock:
+        expired = [t for t, e in _sessions.items() if e["expires_at"] <= now]
+    for token in expired:
+        _forget(token)
+
+    if _persist:
+        database.delete_expired_sessions(now)
+    return len(expired)
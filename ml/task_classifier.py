@@ -1,19 +1,12 @@
-import os
-import joblib
-
-# ======================================================
-# ПУТИ
-# ======================================================
-
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-MODELS_DIR = os.path.join(BASE_DIR, "models")
-MODEL_PATH = os.path.join(MODELS_DIR, "model_task_classifier.pkl")
+from ml import metrics
+from ml.model_service import load_model as load_model_version, current_version
 
 # ======================================================
 # КЭШ
 # ======================================================
 
 _bundle = None
+_bundle_version = None
 
 
 # ======================================================
@@ -23,30 +16,38 @@ _bundle = None
 def load_model():
     """
     Загружает обученную ML-модель и TF-IDF векторизатор
-    из одного файла model_task_classifier.pkl.
-    Загрузка выполняется один раз (кэширование).
+    текущей версии из хранилища моделей.
+    Загрузка выполняется один раз (кэширование); при смене
+    текущей версии модель перечитывается без перезапуска.
     """
 
-    global _bundle
+    global _bundle, _bundle_version
 
-    if _bundle is not None:
+    version = current_version()
+
+    if _bundle is not None and version == _bundle_version:
         return _bundle
 
-    if not os.path.exists(MODEL_PATH):
+    metrics.inc("model.cache_miss")
+
+    if version is None:
         raise RuntimeError(
             "Файл model_task_classifier.pkl не найден.\n"
             "Необходимо выполнить обучение модели командой:\n"
             "python train_model.py"
         )
 
-    _bundle = joblib.load(MODEL_PATH)
+    bundle = load_model_version(version)
 
-    if "model" not in _bundle or "vectorizer" not in _bundle:
+    if "model" not in bundle or "vectorizer" not in bundle:
         raise RuntimeError(
             "Файл модели имеет неверную структуру. "
             "Ожидались ключи 'model' и 'vectorizer'."
         )
 
+    _bundle = bundle
+    _bundle_version = version
+
     return _bundle
 
 
@@ -75,7 +76,30 @@ def classify_task(task_text: str) -> str:
     vectorizer = bundle["vectorizer"]
     model = bundle["model"]
 
-    X = vectorizer.transform([task_text])
-    predicted_class = model.predict(X)[0]
+    with metrics.timer("predict.transform"):
+        X = vectorizer.transform([task_text])
+    with metrics.timer("predict.model"):
+        predicted_class = model.predict(X)[0]
 
     return predicted_class
+
+
+def classify_tasks(task_texts: list) -> list:
+    """
+    Классифицирует несколько текстов за один вызов модели
+    (векторизация и предсказание — одной матрицей).
+    """
+
+    if not task_texts:
+        return []
+
+    for text in task_texts:
+        if not isinstance(text, str) or not text.strip():
+            raise ValueError("Текст задания пуст или имеет неверный формат")
+
+    bundle = load_model()
+
+    with metrics.timer("predict.transform"):
+        X = bundle["vectorizer"].transform(task_texts)
+    with metrics.timer("predict.model"):
+        return list(bundle["model"].predict(X))
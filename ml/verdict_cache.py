@@ -0,0 +1,110 @@
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+from ml import database
+from ml.checkers import check_solution
+
+# ======================================================
+# КЭШ ВЕРДИКТОВ ПРОВЕРКИ
+# ======================================================
+#
+# Студенты часто отправляют один и тот же код для того же задания.
+# Результат проверки зависит только от кода и задания (тип, входные
+# данные, ожидаемый результат), поэтому вердикт запоминается по
+# ключу (хеш кода, хеш задания) и повторно код не выполняется.
+#
+# Вердикты хранятся в таблице verdicts (общей для всех процессов),
+# а недавние — ещё и в памяти (до MAX_ENTRIES).
+
+MAX_ENTRIES = 10000
+
+_memory = OrderedDict()
+_lock = threading.Lock()
+_counters = {"hits": 0, "misses": 0}
+
+
+def task_hash(task_type: str, input_data: str, expected_result) -> str:
+    payload = json.dumps(
+        [task_type, input_data, expected_result],
+        ensure_ascii=False,
+        sort_keys=True,
+        default=repr
+    )
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def verdict_key(task_type: str, user_code: str, input_data: str,
+                expected_result) -> tuple:
+    """
+    Ключ кэша: (хеш кода, хеш задания).
+    """
+    return (
+        database.code_hash(user_code),
+        task_hash(task_type, input_data, expected_result)
+    )
+
+
+# ======================================================
+# ПОИСК И СОХРАНЕНИЕ
+# ======================================================
+
+def remember(key: tuple, is_correct: bool, feedback: str):
+    with _lock:
+        _memory[key] = (bool(is_correct), feedback)
+        _memory.move_to_end(key)
+        while len(_memory) > MAX_ENTRIES:
+            _memory.popitem(last=False)
+
+
+def lookup(key: tuple, user_code: str = None):
+    """
+    Вердикт (is_correct, feedback) или None. Если передан user_code,
+    при промахе в памяти вердикт ищется и в БД.
+    """
+    with _lock:
+        verdict = _memory.get(key)
+        if verdict is not None:
+            _memory.move_to_end(key)
+            _counters["hits"] += 1
+            return verdict
+
+    if user_code is None:
+        return None
+
+    verdict = database.get_verdict(user_code, key[1])
+    with _lock:
+        _counters["hits" if verdict is not None else "misses"] += 1
+    if verdict is not None:
+        remember(key, *verdict)
+    return verdict
+
+
+def store(key: tuple, user_code: str, is_correct: bool, feedback: str):
+    remember(key, is_correct, feedback)
+    database.save_verdict(user_code, key[1], is_correct, feedback)
+
+
+def check_solution_cached(task_type: str, user_code: str, input_data: str,
+                          expected_result):
+    """
+    То же, что ml.checkers.check_solution, но одинаковое решение
+    одного и того же задания выполняется только один раз.
+    """
+    key = verdict_key(task_type, user_code, input_data, expected_result)
+
+    verdict = lookup(key, user_code)
+    if verdict is not None:
+        return verdict
+
+    is_correct, feedback = check_solution(
+        task_type, user_code, input_data, expected_result
+    )
+    store(key, user_code, is_correct, feedback)
+    return is_correct, feedback
+
+
+def stats() -> dict:
+    with _lock:
+        return dict(_counters, entries=len(_memory))
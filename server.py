@@ -0,0 +1,712 @@
+# server.py
+# HTTP-сервис генерации и проверки заданий без графического интерфейса.
+#
+# Запуск:
+#   python server.py [--host 127.0.0.1] [--port 8080] [--workers 4]
+#
+# Эндпоинты (ответы в JSON):
+#   GET  /health       — состояние сервиса
+#   GET  /generate     — ml.task_generator.generate_task()
+#   POST /predict      — {"task_text"} -> {"task_type"}
+#   POST /login        — {"username", "password"} -> {"token", "role", ...}
+#   POST /logout       — завершает сессию
+#   POST /check        — {"task_type", "user_code", "input_data",
+#                         "expected_result"} -> {"ok", "message"};
+#                         только после входа; при указанном task_text
+#                         результат сохраняется в БД (в ответе — result_id)
+#   GET  /results      — история решений вошедшего пользователя
+#                         (новые сверху); ?since=<id> — только записи
+#                         новее указанной, по возрастанию id;
+#                         ?date_from=&date_to= — за период, включая
+#                         архив (ГГГГ-ММ-ДД)
+#   GET  /statistics   — ml.database.get_students_statistics()
+#                         (только преподаватель и администратор);
+#                         тоже принимает date_from и date_to
+#   GET  /search       — полнотекстовый поиск по заданиям, коду
+#                         и отзывам (ml.database.search_results,
+#                         только преподаватель и администратор):
+#                         ?q=<запрос>[&column=code][&username=]
+#                         [&order=recent|rank][&offset=&limit=]
+#   GET  /metrics      — метрики производительности (ml/metrics.py,
+#                         только администратор); ?format=prometheus —
+#                         текстовый формат Prometheus. Сбор включается
+#                         флагом --metrics
+#
+# С флагом --profile-slow-ms N проверки дольше N мс профилируются
+# (ml/profiling.py), трассировки сохраняются в check_profiles.
+#
+# Токен сессии передаётся в заголовке «Authorization: Bearer <токен>».
+#
+# Проверка решений (выполнение кода пользователя) идёт в пуле
+# процессов, обращения к БД — через ml/async_db.py, хеширование
+# паролей при входе — в пуле потоков ml/passwords.py, остальные
+# блокирующие вызовы — в пуле потоков.
+# Число одновременно обрабатываемых запросов ограничено; сверх
+# очереди ожидающих сервис сразу отвечает 503.
+
+import os
+import sys
+import json
+import signal
+import asyncio
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import urlsplit, parse_qsl
+
+from ml import metrics
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+
+# Одновременно обрабатываемые запросы и очередь ожидающих
+MAX_CONCURRENCY = 32
+MAX_PENDING = 256
+
+# Как часто удаляются истёкшие сессии (секунды)
+SESSION_PURGE_INTERVAL = 600
+
+# Ограничение времени проверки одного решения (секунды)
+# и запас на ожидание свободного процесса пула
+CHECK_TIMEOUT = 5.0
+CHECK_WAIT_MARGIN = 5.0
+
+MAX_BODY_SIZE = 64 * 1024
+READ_TIMEOUT = 30.0
+
+# Размер страницы /search по умолчанию
+SEARCH_PAGE_SIZE = 50
+
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    401: "Unauthorized",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    408: "Request Timeout",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+    504: "Gateway Timeout"
+}
+
+CHECK_FIELDS = ("task_type", "user_code", "input_data", "expected_result")
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class PlainText(str):
+    """
+    Ответ обработчика, отдаваемый как текст, а не JSON.
+    """
+
+    content_type = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class CheckTimeout(BaseException):
+    """
+    Наследник BaseException: check_solution перехватывает Exception
+    и не должен превратить превышение времени в обычную ошибку кода.
+    """
+
+
+# ======================================================
+# СОСТОЯНИЕ СЕРВИСА
+# ======================================================
+
+_pool = None
+_workers = None
+_semaphore = None
+_max_pending = MAX_PENDING
+_pending = 0
+# порог профилирования медленных проверок (мс) или None
+_profile_ms = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn, а не fork: к этому моменту в процессе уже работают
+        # потоки, и копия их блокировок в дочернем процессе
+        # может привести к зависанию
+        _pool = ProcessPoolExecutor(
+            max_workers=_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+def _reset_pool(wait: bool = False, pool: ProcessPoolExecutor = None):
+    """
+    Останавливает пул; следующий запрос создаст новый
+    (после аварийного завершения или зависания процесса-проверяющего).
+    Если передан pool, а текущий пул уже другой (его пересоздал
+    другой запрос), ничего не делает.
+    """
+    global _pool
+    if _pool is None or (pool is not None and pool is not _pool):
+        return
+    if not wait:
+        # shutdown не прерывает выполняющиеся задачи: зависший
+        # процесс остался бы работать, поэтому завершаем процессы явно
+        for process in list((_pool._processes or {}).values()):
+            process.terminate()
+    _pool.shutdown(wait=wait, cancel_futures=True)
+    _pool = None
+
+
+# ======================================================
+# ОБРАБОТЧИКИ
+# ======================================================
+
+def _check_in_worker(task_type, user_code, input_data, expected_result,
+                     timeout: float, profile_ms: float = None):
+    """
+    Выполняется в процессе пула. Время ограничивается таймером
+    внутри процесса, поэтому зациклившееся решение прерывается,
+    а процесс остаётся в пуле.
+    Возвращает (вердикт или None при превышении времени,
+    трассировка медленной проверки или None).
+    """
+    from ml.checkers import check_solution
+    from ml import profiling
+
+    def on_timeout(signum, frame):
+        raise CheckTimeout()
+
+    limited = hasattr(signal, "setitimer")
+    if limited:
+        signal.signal(signal.SIGALRM, on_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+
+    probe = profiling.probe(profile_ms)
+    try:
+        with probe:
+            verdict = check_solution(
+                task_type, user_code, input_data, expected_result
+            )
+    except CheckTimeout:
+        verdict = None
+    finally:
+        if limited:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    return verdict, probe.trace
+
+
+def _generate_task():
+    from ml.task_generator import generate_task
+    return generate_task()
+
+
+def _predict_task_type(task_text: str) -> str:
+    from ml.predict import predict_task_type
+    return str(predict_task_type(task_text))
+
+
+def _require(body: dict, fields) -> dict:
+    if not isinstance(body, dict):
+        raise HttpError(400, "Ожидается JSON-объект")
+    missing = [f for f in fields if f not in body]
+    if missing:
+        raise HttpError(400, f"Не указаны поля: {', '.join(missing)}")
+    return body
+
+
+async def handle_health(body, session):
+    return {
+        "status": "ok",
+        "workers": _workers,
+        "pending": _pending
+    }
+
+
+async def handle_generate(body, session):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, _generate_task)
+
+
+async def handle_predict(body, session):
+    body = _require(body, ("task_text",))
+    if not isinstance(body["task_text"], str) or not body["task_text"].strip():
+        raise HttpError(400, "Текст задания пуст")
+
+    loop = asyncio.get_running_loop()
+    task_type = await loop.run_in_executor(
+        None, _predict_task_type, body["task_text"]
+    )
+    return {"task_type": task_type}
+
+
+async def _run_check(body):
+    """
+    Проверка в пуле процессов. Возвращает (ok, message, trace);
+    ok и message — None при превышении времени выполнения решения,
+    trace — трассировка медленной проверки (ml/profiling.py) или None.
+    """
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+    future = loop.run_in_executor(
+        pool,
+        _check_in_worker,
+        *(body[f] for f in CHECK_FIELDS),
+        CHECK_TIMEOUT,
+        _profile_ms
+    )
+
+    try:
+        verdict, trace = await asyncio.wait_for(
+            future, CHECK_TIMEOUT + CHECK_WAIT_MARGIN
+        )
+    except asyncio.TimeoutError:
+        # таймер внутри процесса не сработал (например, решение
+        # зависло в коде на C) или все процессы заняты дольше
+        # обычного — пул пересоздаётся, иначе зависшие процессы
+        # так и остались бы занятыми
+        _reset_pool(pool=pool)
+        raise HttpError(504, "Превышено время ожидания проверки")
+    except BrokenProcessPool:
+        _reset_pool(pool=pool)
+        raise HttpError(500, "Процесс проверки завершился аварийно")
+
+    if verdict is None:
+        return None, None, trace
+    return verdict[0], verdict[1], trace
+
+
+async def handle_check(body, session):
+    from ml import async_db, database, feedback, verdict_cache
+
+    body = _require(body, CHECK_FIELDS)
+    for field in ("task_type", "user_code", "input_data"):
+        if not isinstance(body[field], str):
+            raise HttpError(400, f"Поле {field} должно быть строкой")
+
+    # одинаковый код для того же задания уже проверялся —
+    # берём прежний вердикт (из памяти или из БД)
+    key = verdict_cache.verdict_key(*(body[f] for f in CHECK_FIELDS))
+    verdict = verdict_cache.lookup(key)
+    if verdict is None:
+        # в памяти уже искали — остаётся только таблица verdicts
+        verdict = await async_db.read(
+            database.get_verdict, body["user_code"], key[1]
+        )
+        if verdict is not None:
+            verdict_cache.remember(key, *verdict)
+
+    trace = None
+    if verdict is not None:
+        ok, message = verdict
+    else:
+        ok, message, trace = await _run_check(body)
+
+        if ok is not None:
+            verdict_cache.remember(key, ok, message)
+            await async_db.write(
+                database.insert_verdict,
+                body["user_code"], key[1], ok, message
+            )
+        else:
+            ok, message = False, feedback.TIMEOUT
+
+    response = {"ok": bool(ok), "message": message}
+
+    if body.get("task_text"):
+        response["result_id"] = await async_db.save_result(
+            session["username"],
+            body["task_text"],
+            body["task_type"],
+            body["user_code"],
+            ok,
+            message
+        )
+
+    if trace is not None:
+        await async_db.write(
+            database.insert_check_profile,
+            response.get("result_id"), body["task_type"], trace
+        )
+
+    return response
+
+
+def _period(body) -> tuple:
+    """
+    Параметры date_from / date_to (ГГГГ-ММ-ДД, включительно).
+    """
+    from ml.database import period_bounds
+
+    body = body or {}
+    date_from = body.get("date_from") or None
+    date_to = body.get("date_to") or None
+    try:
+        period_bounds(date_from, date_to)
+    except (TypeError, ValueError, OverflowError, OSError):
+        raise HttpError(400, "Дата должна быть в формате ГГГГ-ММ-ДД")
+    return date_from, date_to
+
+
+async def handle_statistics(body, session):
+    from ml import async_db
+    return await async_db.get_students_statistics(*_period(body))
+
+
+async def handle_search(body, session):
+    from ml import async_db
+
+    body = _require(body, ("q",))
+    try:
+        offset = int(body.get("offset", 0))
+        limit = int(body.get("limit", SEARCH_PAGE_SIZE))
+    except (TypeError, ValueError):
+        raise HttpError(400, "Параметры offset и limit должны быть числами")
+    if offset < 0 or limit <= 0:
+        raise HttpError(400, "Параметры offset и limit должны быть положительными")
+
+    try:
+        return await async_db.search_results(
+            str(body["q"]), offset, limit,
+            body.get("column") or None,
+            body.get("username") or None,
+            body.get("order") or "recent"
+        )
+    except ValueError as e:
+        raise HttpError(400, str(e))
+
+
+async def handle_metrics(body, session):
+    from ml import metrics
+
+    if (body or {}).get("format") == "prometheus":
+        return PlainText(metrics.to_prometheus())
+    return metrics.snapshot()
+
+
+async def handle_results(body, session):
+    from ml import async_db
+
+    body = body or {}
+    if "since" not in body:
+        return await async_db.get_results_by_user(
+            session["username"], *_period(body)
+        )
+
+    try:
+        since_id = int(body["since"])
+    except (TypeError, ValueError):
+        raise HttpError(400, "Параметр since должен быть числом")
+    return await async_db.get_results_since(session["username"], since_id)
+
+
+async def handle_login(body, session):
+    from ml import sessions
+
+    body = _require(body, ("username", "password"))
+    result = await sessions.login_async(
+        str(body["username"]), str(body["password"])
+    )
+    if result is None:
+        raise HttpError(401, "Неверный логин или пароль")
+    return result
+
+
+async def handle_logout(body, session):
+    from ml import sessions
+
+    await sessions.revoke_session_async(session["token"])
+    return {"status": "ok"}
+
+
+# адрес -> (метод, обработчик, допустимые роли; None — без входа)
+ROUTES = {
+    "/health": ("GET", handle_health, None),
+    "/login": ("POST", handle_login, None),
+    "/logout": ("POST", handle_logout, ("student", "teacher", "admin")),
+    "/generate": ("GET", handle_generate, None),
+    "/predict": ("POST", handle_predict, None),
+    "/check": ("POST", handle_check, ("student", "teacher", "admin")),
+    "/results": ("GET", handle_results, ("student", "teacher", "admin")),
+    "/statistics": ("GET", handle_statistics, ("teacher", "admin")),
+    "/search": ("GET", handle_search, ("teacher", "admin")),
+    "/metrics": ("GET", handle_metrics, ("admin",))
+}
+
+
+# ======================================================
+# HTTP
+# ======================================================
+
+async def _read_request(reader):
+    """
+    Возвращает (method, path, query, headers, body) или None,
+    если клиент закрыл соединение.
+    """
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+
+    try:
+        method, target, _ = request_line.decode("latin-1").split()
+    except ValueError:
+        raise HttpError(400, "Некорректная строка запроса")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HttpError(400, "Некорректный Content-Length")
+    if length > MAX_BODY_SIZE:
+        raise HttpError(413, "Слишком большой запрос")
+
+    body = await reader.readexactly(length) if length else b""
+    url = urlsplit(target)
+    return method.upper(), url.path, url.query, headers, body
+
+
+def _response(status: int, payload, keep_alive: bool) -> bytes:
+    if isinstance(payload, PlainText):
+        content_type = PlainText.content_type
+        data = payload.encode("utf-8")
+    else:
+        content_type = "application/json; charset=utf-8"
+        data = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+    head = [
+        f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}",
+        f"Content-Type: {content_type}",
+        f"Content-Length: {len(data)}",
+        "Connection: " + ("keep-alive" if keep_alive else "close")
+    ]
+    if status == 503:
+        head.append("Retry-After: 1")
+    return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + data
+
+
+def _bearer_token(headers: dict):
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token.strip():
+        return None
+    return token.strip()
+
+
+async def _authorize(headers: dict, roles):
+    """
+    Возвращает сессию ({"username", "role", "token"}) или None.
+    Проверка токена — поиск в кэше сессий; обращения к БД
+    (промах кэша, периодическая сверка, удаление истёкшей
+    сессии) идут через ml/async_db.py.
+    """
+    from ml.sessions import get_session_async
+
+    token = _bearer_token(headers)
+    session = await get_session_async(token) if token else None
+
+    if token and session is None:
+        raise HttpError(401, "Сессия недействительна, войдите заново")
+    if session is not None:
+        session["token"] = token
+    if roles is not None:
+        if session is None:
+            raise HttpError(401, "Требуется вход")
+        if session["role"] not in roles:
+            raise HttpError(403, "Недостаточно прав")
+    return session
+
+
+async def _dispatch(method: str, path: str, query: str, headers: dict,
+                    raw_body: bytes):
+    global _pending
+
+    if path not in ROUTES:
+        raise HttpError(404, "Неизвестный адрес")
+    allowed, handler, roles = ROUTES[path]
+    if method != allowed:
+        raise HttpError(405, f"Допустимый метод: {allowed}")
+
+    session = await _authorize(headers, roles)
+
+    body = None
+    if raw_body:
+        try:
+            body = json.loads(raw_body)
+        except ValueError:
+            raise HttpError(400, "Тело запроса не является JSON")
+    elif query:
+        body = dict(parse_qsl(query))
+
+    # перегрузка: не ставим запрос в очередь, а сразу отказываем
+    if _pending >= _max_pending:
+        raise HttpError(503, "Сервис перегружен, повторите запрос позже")
+
+    _pending += 1
+    try:
+        async with _semaphore:
+            with metrics.timer("http" + path):
+                return await handler(body, session)
+    finally:
+        _pending -= 1
+
+
+async def handle_connection(reader, writer):
+    try:
+        while True:
+            keep_alive = False
+            try:
+                request = await asyncio.wait_for(
+                    _read_request(reader), READ_TIMEOUT
+                )
+                if request is None:
+                    break
+
+                method, path, query, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+
+                status, payload = 200, await _dispatch(
+                    method, path, query, headers, body
+                )
+            except HttpError as e:
+                status, payload = e.status, {"error": str(e)}
+            except asyncio.TimeoutError:
+                status, payload = 408, {"error": "Истекло время ожидания запроса"}
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+            except Exception as e:
+                status, payload = 500, {"error": str(e)}
+
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+# ======================================================
+# ЗАПУСК
+# ======================================================
+
+async def _purge_sessions():
+    from ml.sessions import purge_expired
+
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(SESSION_PURGE_INTERVAL)
+        try:
+            await loop.run_in_executor(None, purge_expired)
+        except Exception as e:
+            print(f"Ошибка очистки сессий: {e}", file=sys.stderr)
+
+
+def _warm_up():
+    """
+    Модель загружается заранее, чтобы первый запрос
+    не ждал чтения её с диска.
+    """
+    try:
+        from ml.predict import reload_model
+        reload_model()
+    except Exception as e:
+        print(f"Модель не загружена: {e}", file=sys.stderr)
+
+
+async def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                workers: int = None, max_concurrency: int = MAX_CONCURRENCY,
+                max_pending: int = MAX_PENDING,
+                persist_sessions: bool = False,
+                collect_metrics: bool = False,
+                profile_slow_ms: float = None):
+    global _workers, _semaphore, _max_pending, _profile_ms
+
+    from ml.auth import init_system
+    from ml import async_db, passwords
+
+    from ml import sessions
+
+    _workers = workers or os.cpu_count() or 1
+    _semaphore = asyncio.Semaphore(max_concurrency)
+    _max_pending = max_pending
+    sessions.configure(persist=persist_sessions)
+    if collect_metrics:
+        metrics.enable()
+    _profile_ms = profile_slow_ms
+
+    init_system()
+    await async_db.start()
+
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, _warm_up)
+    _get_pool()
+
+    # по SIGINT/SIGTERM сервис останавливается вместе
+    # с процессами проверки
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass  # Windows: остаётся KeyboardInterrupt
+
+    server = await asyncio.start_server(handle_connection, host, port)
+    print(f"Сервис запущен: http://{host}:{port} "
+          f"(процессов проверки: {_workers})", flush=True)
+
+    purge_task = asyncio.create_task(_purge_sessions())
+
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        purge_task.cancel()
+        _reset_pool(wait=True)
+        await async_db.stop()
+        await loop.run_in_executor(None, passwords.shutdown)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP-сервис проверки заданий")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="процессов проверки (по умолчанию — число ядер)")
+    parser.add_argument("--max-concurrency", type=int, default=MAX_CONCURRENCY)
+    parser.add_argument("--max-pending", type=int, default=MAX_PENDING)
+    parser.add_argument("--persist-sessions", action="store_true",
+                        help="хранить сессии в БД (переживают перезапуск)")
+    parser.add_argument("--metrics", action="store_true",
+                        help="собирать метрики производительности (/metrics)")
+    parser.add_argument("--profile-slow-ms", type=float, default=None,
+                        help="сохранять трассировку проверок дольше "
+                             "указанного времени (мс)")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(
+            args.host,
+            args.port,
+            args.workers,
+            args.max_concurrency,
+            args.max_pending,
+            args.persist_sessions,
+            args.metrics,
+            args.profile_slow_ms
+        ))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
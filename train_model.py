@@ -2,8 +2,9 @@
 # Автор: Федотова Анастасия Алексеевна
 
 import os
-import sys
+import time
 import json
+import argparse
 import pandas as pd
 
 from sklearn.feature_extraction.text import TfidfVectorizer
@@ -12,6 +13,9 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
 
 from ml.model_service import save_model
+from ml import incremental_training
+from ml import dataset_ingest
+from ml import feature_cache
 
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -23,6 +27,9 @@ METRICS_PATH = os.path.join(MODEL_DIR, "metrics.json")
 
 REQUIRED_COLUMNS = {"task_text", "task_type"}
 
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+
 os.makedirs(DATA_DIR, exist_ok=True)
 os.makedirs(MODEL_DIR, exist_ok=True)
 
@@ -35,53 +42,129 @@ def validate_dataset(df: pd.DataFrame):
         )
 
 
-def load_dataset(path: str) -> pd.DataFrame:
+def load_dataset(path: str):
+    """
+    Возвращает (DataFrame, content_sha256) — данные и хеш
+    их содержимого (ключ кэша признаков).
+    """
     if not os.path.exists(path):
         raise FileNotFoundError(
             f"Не найден обучающий датасет: {path}"
         )
 
-    df = pd.read_csv(path)
+    # Данные читаются из колоночного кэша, подготовленного
+    # при загрузке датасета (ml/dataset_ingest.py)
+    dataset_ingest.check_schema(path)
+    df, content_sha256 = dataset_ingest.load_dataset(path)
     validate_dataset(df)
-    return df
+    return df, content_sha256
 
 
-def main():
-    # Получение пути до датасета из аргумента или по умолчанию
-    data_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DATA_PATH
+def build_vectorizer() -> TfidfVectorizer:
+    return TfidfVectorizer(
+        ngram_range=(1, 2),
+        max_features=3000
+    )
 
-    print(f"Загрузка обучающего датасета: {data_path}")
-    df = load_dataset(data_path)
 
-    X = df["task_text"]
-    y = df["task_type"]
+def build_model() -> MLPClassifier:
+    return MLPClassifier(
+        hidden_layer_sizes=(128, 64),
+        activation="relu",
+        solver="adam",
+        max_iter=500,
+        random_state=42
+    )
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X,
-        y,
-        test_size=0.2,
-        random_state=42,
+
+def write_metrics(metrics: dict):
+    with open(METRICS_PATH, "w", encoding="utf-8") as f:
+        json.dump(
+            metrics,
+            f,
+            indent=4,
+            ensure_ascii=False
+        )
+
+
+# -------------------------------------------------
+# ПРИЗНАКИ (С КЭШЕМ)
+# -------------------------------------------------
+
+def extract_features(df: pd.DataFrame, content_sha256: str):
+    """
+    Разбивает датасет и строит TF-IDF признаки.
+    Если для того же содержимого датасета и тех же параметров
+    векторизатора признаки уже строились — берёт их из кэша.
+    """
+    vectorizer = build_vectorizer()
+    key = feature_cache.cache_key(
+        content_sha256,
+        vectorizer.get_params(),
+        {"test_size": TEST_SIZE, "random_state": RANDOM_STATE}
     )
 
-    print("Векторизация текста...")
-    vectorizer = TfidfVectorizer(
-        ngram_range=(1, 2),
-        max_features=3000
+    started = time.perf_counter()
+    cached = feature_cache.load_features(key)
+
+    if cached is not None:
+        load_seconds = time.perf_counter() - started
+        saved = max(cached["seconds"] - load_seconds, 0.0)
+        print(f"Кэш признаков: попадание ({key[:12]}), "
+              f"сэкономлено {saved:.2f} с")
+        return (
+            cached["vectorizer"],
+            cached["X_train"],
+            cached["X_test"],
+            cached["y_train"],
+            cached["y_test"],
+            {"hit": True, "key": key, "saved_seconds": saved}
+        )
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        df["task_text"],
+        df["task_type"],
+        test_size=TEST_SIZE,
+        random_state=RANDOM_STATE,
     )
 
     X_train_vec = vectorizer.fit_transform(X_train)
     X_test_vec = vectorizer.transform(X_test)
+    seconds = time.perf_counter() - started
 
-    print("Обучение нейросетевой модели MLPClassifier...")
+    feature_cache.save_features(
+        key, vectorizer, X_train_vec, X_test_vec,
+        y_train, y_test, seconds
+    )
+    print(f"Кэш признаков: промах ({key[:12]}), "
+          f"векторизация заняла {seconds:.2f} с")
 
-    model = MLPClassifier(
-        hidden_layer_sizes=(128, 64),
-        activation="relu",
-        solver="adam",
-        max_iter=500,
-        random_state=42
+    return (
+        vectorizer,
+        X_train_vec,
+        X_test_vec,
+        y_train.to_numpy(dtype=str),
+        y_test.to_numpy(dtype=str),
+        {"hit": False, "key": key, "saved_seconds": 0.0}
     )
 
+
+# -------------------------------------------------
+# ПОЛНОЕ ОБУЧЕНИЕ
+# -------------------------------------------------
+
+def train_full(data_path: str):
+    print(f"[1/4] Загрузка обучающего датасета: {data_path}")
+    df, content_sha256 = load_dataset(data_path)
+
+    print("[2/4] Векторизация текста...")
+    vectorizer, X_train_vec, X_test_vec, y_train, y_test, cache_info = \
+        extract_features(df, content_sha256)
+
+    print("[3/4] Обучение нейросетевой модели MLPClassifier...")
+
+    model = build_model()
+
     model.fit(X_train_vec, y_train)
 
     y_pred = model.predict(X_test_vec)
@@ -89,26 +172,173 @@ def main():
 
     print(f"MLPClassifier accuracy: {accuracy:.4f}")
 
-    with open(METRICS_PATH, "w", encoding="utf-8") as f:
-        json.dump(
-            {
-                "MLPClassifier": {
-                    "accuracy": accuracy
-                }
-            },
-            f,
-            indent=4,
-            ensure_ascii=False
+    metrics = {
+        "MLPClassifier": {
+            "accuracy": accuracy
+        },
+        "feature_cache": cache_info
+    }
+
+    write_metrics(metrics)
+
+    print("[4/4] Сохранение модели...")
+    version = save_model(
+        {
+            "vectorizer": vectorizer,
+            "model": model,
+            "model_name": "MLPClassifier",
+            "accuracy": accuracy
+        },
+        scores=metrics
+    )
+
+    print(f"ГОТОВО. Нейросетевая модель обучена и сохранена (версия {version}).")
+
+
+# -------------------------------------------------
+# ИНКРЕМЕНТАЛЬНОЕ ДООБУЧЕНИЕ
+# -------------------------------------------------
+
+def train_incremental(data_path: str):
+    if not os.path.exists(data_path):
+        raise FileNotFoundError(
+            f"Не найден обучающий датасет: {data_path}"
         )
 
-    save_model({
-        "vectorizer": vectorizer,
-        "model": model,
-        "model_name": "MLPClassifier",
-        "accuracy": accuracy
-    })
+    print(f"[1/2] Дообучение на новых строках датасета: {data_path}")
+    run = incremental_training.train_incremental(data_path)
+
+    if run["mode"] == "unchanged":
+        print("Новых строк нет — модель не изменилась.")
+        return
+
+    if run["mode"] == "scratch":
+        print(f"Контрольной точки нет или датасет изменён — "
+              f"модель построена заново ({run['rows']} строк).")
+    else:
+        print(f"Добавлено строк: {run['rows']}")
+
+    print(f"{incremental_training.MODEL_NAME} accuracy: {run['accuracy']:.4f}")
+    print(f"Время: {run['seconds']:.2f} с")
+
+    metrics = {
+        incremental_training.MODEL_NAME: {
+            "accuracy": run["accuracy"],
+            "mode": run["mode"],
+            "rows": run["rows"],
+            "seconds": run["seconds"]
+        }
+    }
+
+    # models/metrics.json — метрики полного обучения; метрики
+    # дообучения сохраняются только вместе с версией модели
+    print("[2/2] Сохранение модели...")
+    version = save_model(
+        {
+            "vectorizer": run["vectorizer"],
+            "model": run["model"],
+            "model_name": incremental_training.MODEL_NAME,
+            "accuracy": run["accuracy"]
+        },
+        scores=metrics
+    )
+
+    print(f"ГОТОВО. Модель дообучена и сохранена (версия {version}).")
+
+
+# -------------------------------------------------
+# СРАВНЕНИЕ РЕЖИМОВ
+# -------------------------------------------------
+
+def compare(data_path: str, new_share: float = 0.2):
+    """
+    Сравнивает полное переобучение (TF-IDF + MLP) с дообучением
+    (hashing + SGD). Последняя доля new_share обучающей выборки
+    играет роль «новых строк»: полное обучение обрабатывает всю
+    выборку, инкрементальное — только эти строки.
+    Модели не сохраняются.
+    """
+    df, _ = load_dataset(data_path)
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        df["task_text"],
+        df["task_type"],
+        test_size=TEST_SIZE,
+        random_state=RANDOM_STATE,
+    )
+
+    split = int(len(X_train) * (1 - new_share))
+    X_old, X_new = X_train[:split], X_train[split:]
+    y_old, y_new = y_train[:split], y_train[split:]
+
+    # Полное переобучение на всей выборке
+    started = time.perf_counter()
+    vectorizer = build_vectorizer()
+    model = build_model()
+    model.fit(vectorizer.fit_transform(X_train), y_train)
+    full_seconds = time.perf_counter() - started
+    full_accuracy = accuracy_score(y_test, model.predict(vectorizer.transform(X_test)))
+
+    # Инкрементальная модель: начальное обучение на «старых» строках...
+    inc_vectorizer = incremental_training.build_vectorizer()
+    inc_model = incremental_training.build_model()
+    incremental_training.fit_epochs(
+        inc_model, inc_vectorizer, X_old, y_old,
+        incremental_training.INITIAL_EPOCHS,
+        classes=sorted(df["task_type"].unique())
+    )
+
+    # ...и замер только дообучения на новых
+    started = time.perf_counter()
+    incremental_training.fit_epochs(
+        inc_model, inc_vectorizer, X_new, y_new,
+        incremental_training.UPDATE_EPOCHS
+    )
+    inc_seconds = time.perf_counter() - started
+    inc_accuracy = accuracy_score(
+        y_test, inc_model.predict(inc_vectorizer.transform(X_test))
+    )
+
+    print(f"Строк для обучения: {len(X_train)}, из них новых: {len(X_new)}")
+    print(f"{'Режим':<32}{'accuracy':>10}{'время, с':>12}")
+    print(f"{'Полное переобучение (MLP)':<32}{full_accuracy:>10.4f}{full_seconds:>12.3f}")
+    print(f"{'Дообучение (SGD)':<32}{inc_accuracy:>10.4f}{inc_seconds:>12.3f}")
+
+    return {
+        "full": {"accuracy": full_accuracy, "seconds": full_seconds},
+        "incremental": {"accuracy": inc_accuracy, "seconds": inc_seconds}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Обучение модели классификации заданий"
+    )
+    parser.add_argument(
+        "data_path",
+        nargs="?",
+        default=DEFAULT_DATA_PATH,
+        help="путь к CSV-датасету (по умолчанию data/train_data.csv)"
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--incremental",
+        action="store_true",
+        help="дообучить модель только на новых строках датасета"
+    )
+    mode.add_argument(
+        "--compare",
+        action="store_true",
+        help="сравнить точность и время полного и инкрементального обучения"
+    )
+    args = parser.parse_args()
 
-    print("ГОТОВО. Нейросетевая модель обучена и сохранена.")
+    if args.compare:
+        compare(args.data_path)
+    elif args.incremental:
+        train_incremental(args.data_path)
+    else:
+        train_full(args.data_path)
 
 
 if __name__ == "__main__":
@@ -1,33 +1,47 @@
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QLabel, QTableWidget,
-    QTableWidgetItem, QHBoxLayout, QLineEdit,
+    QWidget, QVBoxLayout, QLabel, QTableView,
+    QAbstractItemView, QHBoxLayout, QLineEdit,
     QPushButton, QMessageBox, QComboBox,
-    QFileDialog, QInputDialog
+    QFileDialog, QInputDialog, QPlainTextEdit, QProgressBar
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QProcess, QProcessEnvironment
 
 import os
-import shutil
-import subprocess
-import pandas as pd
+import re
+import sys
 
 from ml.database import (
-    get_all_users,
+    get_users_page,
     add_user,
     update_user_password,
     set_user_active,
     log_admin_action,
-    get_admin_logs
+    get_admin_logs_page,
+    create_training_job,
+    finish_training_job,
+    archive_results,
+    ARCHIVE_AGE_DAYS
 )
+from ml.model_service import rollback_model, current_version
+from ml.predict import reload_model
+from ml.dataset_ingest import (
+    DATASET_PATH,
+    check_schema,
+    ingest_dataset,
+    known_task_types,
+    describe_report
+)
+from ui.workers import run_in_background
+from ui.table_models import PagedTableModel
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.abspath(os.path.join(BASE_DIR, ".."))
 
 DATA_DIR = os.path.join(PROJECT_ROOT, "data")
-DATASET_PATH = os.path.join(DATA_DIR, "train_data.csv")
 TRAIN_SCRIPT = os.path.join(PROJECT_ROOT, "train_model.py")
 
-REQUIRED_COLUMNS = {"task_text", "task_type"}
+# Строки вида "[2/4] ..." в выводе train_model.py — этапы обучения
+PROGRESS_RE = re.compile(r"^\[(\d+)/(\d+)\]")
 
 os.makedirs(DATA_DIR, exist_ok=True)
 
@@ -37,6 +51,10 @@ class AdminPanel(QWidget):
         super().__init__()
 
         self.admin_username = admin_username
+        self.train_process = None
+        self.train_job_id = None
+        self.train_buffer = b""
+        self.train_cancelled = False
 
         self.setWindowTitle("Панель администратора")
         self.resize(900, 600)
@@ -48,12 +66,24 @@ class AdminPanel(QWidget):
         main_layout.addWidget(title)
 
         # ---------- Пользователи ----------
-        self.users_table = QTableWidget()
-        self.users_table.setColumnCount(3)
-        self.users_table.setHorizontalHeaderLabels(
-            ["Пользователь", "Роль", "Статус"]
+        self.users_search = QLineEdit()
+        self.users_search.setPlaceholderText("Поиск пользователя")
+        main_layout.addWidget(self.users_search)
+
+        self.users_model = PagedTableModel(
+            get_users_page,
+            [
+                ("username", "Пользователь"),
+                ("role", "Роль"),
+                ("is_active", "Статус",
+                 lambda v: "Активен" if v else "Заблокирован"),
+            ],
+            order_by="username",
+            parent=self
         )
-        self.users_table.horizontalHeader().setStretchLastSection(True)
+        self.users_table = self._create_table_view(self.users_model)
+        self.users_table.sortByColumn(0, Qt.AscendingOrder)
+        self.users_search.textChanged.connect(self.users_model.set_search)
         main_layout.addWidget(self.users_table)
 
         add_layout = QHBoxLayout()
@@ -100,43 +130,89 @@ class AdminPanel(QWidget):
         self.btn_train_model.clicked.connect(self.train_model)
         dataset_layout.addWidget(self.btn_train_model)
 
+        self.btn_train_incremental = QPushButton("Дообучить на новых данных")
+        self.btn_train_incremental.clicked.connect(self.train_model_incremental)
+        dataset_layout.addWidget(self.btn_train_incremental)
+
+        self.btn_cancel_training = QPushButton("Остановить обучение")
+        self.btn_cancel_training.clicked.connect(self.cancel_training)
+        self.btn_cancel_training.setEnabled(False)
+        dataset_layout.addWidget(self.btn_cancel_training)
+
+        self.btn_rollback_model = QPushButton("Откатить модель")
+        self.btn_rollback_model.clicked.connect(self.rollback_model)
+        dataset_layout.addWidget(self.btn_rollback_model)
+
         main_layout.addLayout(dataset_layout)
 
         self.dataset_label = QLabel("Обучающий датасет не загружен")
         self.dataset_label.setStyleSheet("font-style: italic;")
         main_layout.addWidget(self.dataset_label)
 
+        self.train_progress = QProgressBar()
+        self.train_progress.setVisible(False)
+        main_layout.addWidget(self.train_progress)
+
+        self.train_output = QPlainTextEdit()
+        self.train_output.setReadOnly(True)
+        self.train_output.setMaximumHeight(120)
+        self.train_output.setVisible(False)
+        main_layout.addWidget(self.train_output)
+
+        # ---------- Архив результатов ----------
+        archive_layout = QHBoxLayout()
+        self.btn_archive = QPushButton("Архивировать старые результаты")
+        self.btn_archive.clicked.connect(self.archive_old_results)
+        archive_layout.addWidget(self.btn_archive)
+        archive_layout.addStretch()
+        main_layout.addLayout(archive_layout)
+
         # ---------- Журнал действий ----------
         log_title = QLabel("Журнал действий администратора")
         log_title.setStyleSheet("font-weight: bold;")
         main_layout.addWidget(log_title)
 
-        self.log_table = QTableWidget()
-        self.log_table.setColumnCount(3)
-        self.log_table.setHorizontalHeaderLabels(
-            ["Дата", "Администратор", "Действие"]
+        self.log_search = QLineEdit()
+        self.log_search.setPlaceholderText("Поиск в журнале")
+        main_layout.addWidget(self.log_search)
+
+        self.log_model = PagedTableModel(
+            get_admin_logs_page,
+            [
+                ("timestamp", "Дата"),
+                ("admin", "Администратор"),
+                ("action", "Действие"),
+            ],
+            order_by="timestamp",
+            descending=True,
+            parent=self
         )
-        self.log_table.horizontalHeader().setStretchLastSection(True)
+        self.log_table = self._create_table_view(self.log_model)
+        self.log_table.sortByColumn(0, Qt.DescendingOrder)
+        self.log_search.textChanged.connect(self.log_model.set_search)
         main_layout.addWidget(self.log_table)
 
         self.setLayout(main_layout)
 
-        self.load_users()
-        self.load_logs()
         self.update_dataset_status()
 
+    def _create_table_view(self, model):
+        # sortByColumn вызывает model.sort — первая страница
+        # загружается при установке сортировки
+        view = QTableView()
+        view.setModel(model)
+        view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        view.setSelectionMode(QAbstractItemView.SingleSelection)
+        view.setSortingEnabled(True)
+        view.horizontalHeader().setStretchLastSection(True)
+        return view
+
     # =================================================
     # Пользователи
     # =================================================
 
     def load_users(self):
-        users = get_all_users()
-        self.users_table.setRowCount(len(users))
-        for row, u in enumerate(users):
-            self.users_table.setItem(row, 0, QTableWidgetItem(u["username"]))
-            self.users_table.setItem(row, 1, QTableWidgetItem(u["role"]))
-            status = "Активен" if u["is_active"] else "Заблокирован"
-            self.users_table.setItem(row, 2, QTableWidgetItem(status))
+        self.users_model.reload()
 
     def add_user(self):
         username = self.username_input.text().strip()
@@ -147,24 +223,38 @@ class AdminPanel(QWidget):
             QMessageBox.warning(self, "Ошибка", "Введите имя и пароль")
             return
 
-        try:
-            add_user(username, password, role)
-            log_admin_action(
-                self.admin_username,
-                f"Добавлен пользователь {username}"
-            )
-            self.username_input.clear()
-            self.password_input.clear()
-            self.load_users()
-            self.load_logs()
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", str(e))
+        # хеширование пароля занимает десятки миллисекунд
+        # (ml/passwords.py) — выполняется в фоне, как и при входе
+        self.btn_add_user.setEnabled(False)
+        run_in_background(
+            add_user,
+            username,
+            password,
+            role,
+            on_done=lambda _: self.on_user_added(username, role),
+            on_error=self.on_user_failed
+        )
+
+    def on_user_added(self, username, role):
+        self.btn_add_user.setEnabled(True)
+        self.log_action(f"Добавлен пользователь {username}")
+        self.username_input.clear()
+        self.password_input.clear()
+        self.users_model.insert_row({
+            "username": username,
+            "role": role,
+            "is_active": True
+        })
+
+    def on_user_failed(self, message: str):
+        self.btn_add_user.setEnabled(True)
+        QMessageBox.critical(self, "Ошибка", message)
 
     def get_selected_user(self):
-        row = self.users_table.currentRow()
-        if row == -1:
+        index = self.users_table.currentIndex()
+        if not index.isValid():
             return None
-        return self.users_table.item(row, 0).text()
+        return self.users_model.row(index.row())["username"]
 
     def reset_password(self):
         username = self.get_selected_user()
@@ -181,27 +271,35 @@ class AdminPanel(QWidget):
         if not ok or not new_password.strip():
             return
 
-        update_user_password(username, new_password)
-        log_admin_action(
-            self.admin_username,
-            f"Сброшен пароль пользователя {username}"
+        self.btn_reset_password.setEnabled(False)
+        run_in_background(
+            update_user_password,
+            username,
+            new_password,
+            on_done=lambda _: self.on_password_reset(username),
+            on_error=self.on_password_reset_failed
         )
-        self.load_logs()
+
+    def on_password_reset(self, username):
+        self.btn_reset_password.setEnabled(True)
+        self.log_action(f"Сброшен пароль пользователя {username}")
         QMessageBox.information(self, "Готово", "Пароль обновлён")
 
+    def on_password_reset_failed(self, message: str):
+        self.btn_reset_password.setEnabled(True)
+        QMessageBox.critical(self, "Ошибка", message)
+
     def toggle_active(self):
         username = self.get_selected_user()
         if not username:
             QMessageBox.warning(self, "Ошибка", "Выберите пользователя")
             return
 
-        set_user_active(username)
-        log_admin_action(
-            self.admin_username,
-            f"Изменён статус пользователя {username}"
+        is_active = set_user_active(username)
+        self.log_action(f"Изменён статус пользователя {username}")
+        self.users_model.update_row(
+            "username", username, {"is_active": is_active}
         )
-        self.load_users()
-        self.load_logs()
 
     # =================================================
     # Датасет и обучение
@@ -217,23 +315,55 @@ class AdminPanel(QWidget):
         if not file_path:
             return
 
-        df = pd.read_csv(file_path)
-        if not REQUIRED_COLUMNS.issubset(df.columns):
+        # Структура проверяется по заголовку, без чтения всего файла
+        try:
+            check_schema(file_path)
+        except Exception as e:
             QMessageBox.critical(
                 self,
                 "Ошибка",
-                "Некорректная структура датасета"
+                f"Некорректная структура датасета:\n{e}"
             )
             return
 
-        shutil.copy(file_path, DATASET_PATH)
-        log_admin_action(
-            self.admin_username,
-            "Загружен обучающий датасет"
+        self.btn_upload_dataset.setEnabled(False)
+        self.dataset_label.setText("Загрузка датасета...")
+
+        run_in_background(
+            self._ingest,
+            file_path,
+            on_done=self.on_dataset_ingested,
+            on_error=self.on_dataset_failed,
+            on_progress=lambda rows: self.dataset_label.setText(
+                f"Загрузка датасета... обработано строк: {rows}"
+            )
+        )
+
+    @staticmethod
+    def _ingest(file_path, progress=None):
+        # типы заданий — известные системе (шаблоны и текущий датасет)
+        return ingest_dataset(
+            file_path,
+            allowed_types=known_task_types(),
+            progress=progress
+        )
+
+    def on_dataset_ingested(self, report: dict):
+        self.btn_upload_dataset.setEnabled(True)
+        self.log_action(
+            f"Загружен обучающий датасет ({report['rows_valid']} строк)"
+        )
+        self.update_dataset_status()
+        QMessageBox.information(
+            self,
+            "Готово",
+            "Датасет загружен\n\n" + describe_report(report)
         )
+
+    def on_dataset_failed(self, message: str):
+        self.btn_upload_dataset.setEnabled(True)
         self.update_dataset_status()
-        self.load_logs()
-        QMessageBox.information(self, "Готово", "Датасет загружен")
+        QMessageBox.critical(self, "Ошибка загрузки датасета", message)
 
     def update_dataset_status(self):
         if os.path.exists(DATASET_PATH):
@@ -244,29 +374,196 @@ class AdminPanel(QWidget):
             self.dataset_label.setText("Обучающий датасет не загружен")
 
     def train_model(self):
+        self._start_training([], "Запущено обучение модели")
+
+    def train_model_incremental(self):
+        self._start_training(
+            ["--incremental"],
+            "Запущено дообучение модели на новых данных"
+        )
+
+    def _start_training(self, extra_args: list, log_message: str):
+        """
+        Запускает train_model.py отдельным процессом (QProcess):
+        интерфейс не блокируется, вывод обучения показывается
+        по мере поступления.
+        """
+        if self.train_process is not None:
+            QMessageBox.warning(self, "Ошибка", "Обучение уже выполняется")
+            return
+
         try:
-            subprocess.run(["python", TRAIN_SCRIPT], check=True)
-            log_admin_action(
-                self.admin_username,
-                "Запущено обучение модели"
+            self.train_job_id = create_training_job(self.admin_username)
+            self.log_action(log_message)
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", str(e))
+            return
+
+        self.train_cancelled = False
+        self.train_buffer = b""
+        self.train_output.clear()
+        self.train_output.setVisible(True)
+        self.train_progress.setRange(0, 0)
+        self.train_progress.setVisible(True)
+        self.btn_train_model.setEnabled(False)
+        self.btn_train_incremental.setEnabled(False)
+        self.btn_cancel_training.setEnabled(True)
+
+        env = QProcessEnvironment.systemEnvironment()
+        env.insert("PYTHONIOENCODING", "utf-8")
+
+        process = QProcess(self)
+        process.setProcessEnvironment(env)
+        process.setWorkingDirectory(PROJECT_ROOT)
+        process.setProcessChannelMode(QProcess.MergedChannels)
+        process.readyReadStandardOutput.connect(self.on_training_output)
+        process.finished.connect(self.on_training_finished)
+        process.errorOccurred.connect(self.on_training_error)
+
+        self.train_process = process
+        process.start(sys.executable, ["-u", TRAIN_SCRIPT] + extra_args)
+
+    def cancel_training(self):
+        if self.train_process is None:
+            return
+        self.train_cancelled = True
+        self.train_process.kill()
+
+    def on_training_output(self):
+        data = self.train_process.readAllStandardOutput()
+        self.train_buffer += bytes(data)
+
+        # последняя строка может прийти не целиком
+        *lines, self.train_buffer = self.train_buffer.split(b"\n")
+
+        for raw in lines:
+            line = raw.decode("utf-8", errors="replace").rstrip("\r")
+            self.train_output.appendPlainText(line)
+            match = PROGRESS_RE.match(line)
+            if match:
+                step, total = int(match.group(1)), int(match.group(2))
+                self.train_progress.setRange(0, total)
+                self.train_progress.setValue(step - 1)
+
+    def on_training_error(self, error):
+        # Процесс не удалось запустить — finished в этом случае не придёт
+        if error == QProcess.FailedToStart:
+            self._finish_training(
+                "failed",
+                self.train_process.errorString()
+            )
+
+    def on_training_finished(self, exit_code, exit_status):
+        if self.train_cancelled:
+            self._finish_training("cancelled", "Обучение остановлено")
+        elif exit_status == QProcess.NormalExit and exit_code == 0:
+            self._finish_training("done", "Процесс обучения модели завершён")
+        else:
+            self._finish_training(
+                "failed",
+                f"Обучение завершилось с ошибкой (код {exit_code})"
             )
-            self.load_logs()
+
+    def _finish_training(self, status: str, message: str):
+        if self.train_process is None:
+            return
+
+        self.train_process.deleteLater()
+        self.train_process = None
+
+        self.btn_train_model.setEnabled(True)
+        self.btn_train_incremental.setEnabled(True)
+        self.btn_cancel_training.setEnabled(False)
+        self.train_progress.setRange(0, 1)
+        self.train_progress.setValue(1 if status == "done" else 0)
+
+        version = None
+        if status == "done":
+            # Подменяем классификатор в работающем приложении
+            try:
+                version = current_version()
+                reload_model()
+            except Exception as e:
+                message = f"{message}\nНе удалось загрузить модель: {e}"
+
+        try:
+            finish_training_job(self.train_job_id, status, version, message)
+        except Exception as e:
+            message = f"{message}\n{e}"
+        self.train_job_id = None
+
+        if status == "done":
+            QMessageBox.information(self, "Готово", message)
+        elif status == "failed":
+            QMessageBox.critical(self, "Ошибка", message)
+
+    def rollback_model(self):
+        try:
+            version = rollback_model()
+            self.log_action(f"Модель откатена к версии {version}")
             QMessageBox.information(
                 self,
                 "Готово",
-                "Процесс обучения модели завершён"
+                f"Текущая версия модели: {version}"
             )
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", str(e))
 
+    # =================================================
+    # Архив результатов
+    # =================================================
+
+    def archive_old_results(self):
+        days, ok = QInputDialog.getInt(
+            self,
+            "Архивация результатов",
+            "Перенести в архив решения старше (дней):",
+            ARCHIVE_AGE_DAYS,
+            0,
+            36500
+        )
+        if not ok:
+            return
+
+        self.btn_archive.setEnabled(False)
+        run_in_background(
+            archive_results,
+            days,
+            on_done=lambda moved: self.on_results_archived(days, moved),
+            on_error=self.on_archive_failed
+        )
+
+    def on_results_archived(self, days: int, moved: dict):
+        self.btn_archive.setEnabled(True)
+        if not moved:
+            QMessageBox.information(
+                self, "Готово", f"Решений старше {days} дн. нет"
+            )
+            return
+
+        total = sum(moved.values())
+        self.log_action(
+            f"Архивированы результаты старше {days} дн. ({total} строк)"
+        )
+        QMessageBox.information(
+            self,
+            "Готово",
+            f"Перенесено в архив: {total}\n" + "\n".join(
+                f"семестр {term}: {rows}" for term, rows in moved.items()
+            )
+        )
+
+    def on_archive_failed(self, message: str):
+        self.btn_archive.setEnabled(True)
+        QMessageBox.critical(self, "Ошибка архивации", message)
+
     # =================================================
     # Логи
     # =================================================
 
+    def log_action(self, action: str):
+        entry = log_admin_action(self.admin_username, action)
+        self.log_model.insert_row(entry)
+
     def load_logs(self):
-        logs = get_admin_logs()
-        self.log_table.setRowCount(len(logs))
-        for row, log in enumerate(logs):
-            self.log_table.setItem(row, 0, QTableWidgetItem(log["timestamp"]))
-            self.log_table.setItem(row, 1, QTableWidgetItem(log["admin"]))
-            self.log_table.setItem(row, 2, QTableWidgetItem(log["action"]))
+        self.log_model.reload()
@@ -0,0 +1,178 @@
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+    QComboBox, QTableWidget, QTableWidgetItem, QAbstractItemView,
+    QHeaderView
+)
+from PyQt5.QtCore import Qt
+
+from ml import analytics
+from ui.workers import run_in_background
+
+# Колонки показателей (ml/analytics.py) после первой колонки
+COLUMNS = [
+    ("attempts", "Попыток"),
+    ("pass_rate", "Верных, %"),
+    ("tasks", "Заданий"),
+    ("first_attempt_rate", "С первой попытки, %"),
+    ("solved", "Решено"),
+    ("avg_solve_seconds", "Время решения"),
+]
+
+BUCKETS = [("day", "По дням"), ("week", "По неделям")]
+
+
+def _format(key: str, value) -> str:
+    if value is None:
+        return ""
+    if key.endswith("_rate"):
+        return f"{value * 100:.1f}"
+    if key == "avg_solve_seconds":
+        minutes, seconds = divmod(int(value), 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return str(value)
+
+
+class AnalyticsPanel(QWidget):
+    """
+    Показатели по типам заданий и по дням / неделям.
+    Данные считаются в фоне (ml/analytics.py); period() возвращает
+    (date_from, date_to) фильтра панели преподавателя.
+    """
+
+    def __init__(self, period):
+        super().__init__()
+
+        self.period = period
+        self._loading = False
+        # параметры изменились во время расчёта — пересчитать после
+        self._pending = False
+
+        layout = QVBoxLayout()
+
+        controls = QHBoxLayout()
+        self.bucket = QComboBox()
+        for key, title in BUCKETS:
+            self.bucket.addItem(title, key)
+        self.bucket.currentIndexChanged.connect(self.refresh)
+        controls.addWidget(self.bucket)
+
+        self.task_type = QComboBox()
+        self.task_type.addItem("Все типы заданий", None)
+        self.task_type.currentIndexChanged.connect(self.refresh)
+        controls.addWidget(self.task_type)
+
+        controls.addStretch()
+        self.btn_refresh = QPushButton("Обновить")
+        self.btn_refresh.clicked.connect(self.refresh)
+        controls.addWidget(self.btn_refresh)
+
+        self.types_table = self._create_table("Тип задания")
+        self.periods_table = self._create_table("Период")
+
+        self.status_label = QLabel("")
+
+        types_title = QLabel("По типам заданий")
+        types_title.setStyleSheet("font-weight: bold;")
+        periods_title = QLabel("По периодам")
+        periods_title.setStyleSheet("font-weight: bold;")
+
+        layout.addWidget(types_title)
+        layout.addWidget(self.types_table)
+        layout.addWidget(periods_title)
+        layout.addLayout(controls)
+        layout.addWidget(self.periods_table)
+        layout.addWidget(self.status_label)
+
+        self.setLayout(layout)
+
+    def _create_table(self, first_title: str) -> QTableWidget:
+        table = QTableWidget(0, len(COLUMNS) + 1)
+        table.setHorizontalHeaderLabels(
+            [first_title] + [title for _, title in COLUMNS]
+        )
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        return table
+
+    # Данные загружаются при первом показе и по кнопке
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self.types_table.rowCount():
+            self.refresh()
+
+    def period_changed(self, *_):
+        # скрытая вкладка пересчитается при показе
+        if self.isVisible():
+            self.refresh()
+        else:
+            self.types_table.setRowCount(0)
+
+    # -------------------------------------------------
+
+    def refresh(self, *_):
+        if self._loading:
+            self._pending = True
+            return
+        self._loading = True
+        self._pending = False
+        self.btn_refresh.setEnabled(False)
+        self.status_label.setText("Расчёт показателей...")
+
+        date_from, date_to = self.period()
+        run_in_background(
+            self._load,
+            date_from,
+            date_to,
+            self.bucket.currentData(),
+            self.task_type.currentData(),
+            on_done=self.on_loaded,
+            on_error=self.on_failed
+        )
+
+    @staticmethod
+    def _load(date_from, date_to, bucket, task_type):
+        return (
+            analytics.task_type_stats(date_from, date_to),
+            analytics.period_stats(bucket, date_from, date_to, task_type)
+        )
+
+    def on_loaded(self, result):
+        self._loading = False
+        self.btn_refresh.setEnabled(True)
+        self.status_label.setText("")
+
+        by_type, by_period = result
+        self._fill(self.types_table, by_type, "task_type")
+        self._fill(self.periods_table, by_period, "period")
+
+        # список типов пополняется без сброса выбора
+        known = {self.task_type.itemData(i)
+                 for i in range(self.task_type.count())}
+        self.task_type.blockSignals(True)
+        for row in by_type:
+            if row["task_type"] not in known:
+                self.task_type.addItem(row["task_type"], row["task_type"])
+        self.task_type.blockSignals(False)
+
+        if self._pending:
+            self.refresh()
+
+    def on_failed(self, message: str):
+        self._loading = False
+        self.btn_refresh.setEnabled(True)
+        self.status_label.setText(f"Ошибка: {message}")
+        if self._pending:
+            self.refresh()
+
+    def _fill(self, table: QTableWidget, rows: list, first_key: str):
+        table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            table.setItem(row, 0, QTableWidgetItem(str(values[first_key])))
+            for col, (key, _) in enumerate(COLUMNS, start=1):
+                item = QTableWidgetItem(_format(key, values[key]))
+                item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                table.setItem(row, col, item)
@@ -4,7 +4,8 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt
 
-from ml.auth import login, init_system
+from ml.auth import login
+from ui.workers import run_in_background
 
 
 class LoginWindow(QWidget):
@@ -16,9 +17,6 @@ class LoginWindow(QWidget):
         self.setWindowTitle("Вход в систему")
         self.setFixedSize(420, 340)
 
-        # Инициализация БД
-        init_system()
-
         self.label_title = QLabel("Интеллектуальный сервис")
         self.label_title.setAlignment(Qt.AlignCenter)
         self.label_title.setStyleSheet("font-size: 18px; font-weight: bold;")
@@ -76,7 +74,19 @@ class LoginWindow(QWidget):
             QMessageBox.warning(self, "Ошибка", "Введите логин и пароль")
             return
 
-        user = login(username, password)
+        # проверка пароля занимает десятки миллисекунд (ml/passwords.py) —
+        # выполняется в фоне, чтобы окно не замирало
+        self.btn_login.setEnabled(False)
+        run_in_background(
+            login,
+            username,
+            password,
+            on_done=self.on_login_checked,
+            on_error=self.on_login_failed
+        )
+
+    def on_login_checked(self, user):
+        self.btn_login.setEnabled(True)
 
         if not user:
             QMessageBox.critical(self, "Ошибка входа", "Неверный логин или пароль")
@@ -90,3 +100,7 @@ class LoginWindow(QWidget):
 
         self.on_login_success(user)
         self.close()
+
+    def on_login_failed(self, message: str):
+        self.btn_login.setEnabled(True)
+        QMessageBox.critical(self, "Ошибка входа", message)
@@ -4,14 +4,48 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt
 
-from ml.task_generator import generate_task
-from ml.checkers import check_solution
-from ml.database import save_result
-from ml.predict import predict_task_type
-
-from ui.teacher_panel import TeacherPanel
-from ui.admin_panel import AdminPanel
 from ui.settings_window import SettingsWindow
+from ui.workers import run_in_background
+
+# Модули ML (joblib/sklearn) и панели (pandas) импортируются
+# при первом использовании, а не при запуске приложения
+
+
+def _generate_task():
+    from ml.task_generator import generate_task
+    from ml.predict import predict_task_type
+
+    task = generate_task()
+    task["task_type"] = predict_task_type(task["task_text"])
+    return task
+
+
+def _grade_and_save(username: str, task: dict, user_code: str):
+    from ml.verdict_cache import check_solution_cached
+    from ml.database import save_result, save_check_profile
+    from ml import profiling
+
+    # повторная отправка того же кода не выполняется заново;
+    # медленная проверка профилируется, если это включено
+    probe = profiling.probe()
+    with probe:
+        is_correct, feedback = check_solution_cached(
+            task_type=task["task_type"],
+            user_code=user_code,
+            input_data=task["input_data"],
+            expected_result=task["expected_result"]
+        )
+    result_id = save_result(
+        username=username,
+        task_text=task["task_text"],
+        task_type=task["task_type"],
+        user_code=user_code,
+        is_correct=is_correct,
+        feedback=feedback
+    )
+    if probe.trace is not None:
+        save_check_profile(result_id, task["task_type"], probe.trace)
+    return is_correct, feedback
 
 
 class MainWindow(QMainWindow):
@@ -21,6 +55,7 @@ class MainWindow(QMainWindow):
         self.on_logout = on_logout
         self.task = None
         self.settings_window = None
+        self._lazy_tabs = {}
         self.setWindowTitle(
             f"Интеллектуальный сервис | {user['username']} ({user['role']})"
         )
@@ -82,33 +117,87 @@ class MainWindow(QMainWindow):
         task_tab.setLayout(task_layout)
         self.tabs.addTab(task_tab, "Задания")
         if self.user["role"] == "teacher":
-            self.tabs.addTab(
-                TeacherPanel(),
+            self._add_lazy_tab(
+                self._create_teacher_panel,
                 "Статистика студентов"
             )
         if self.user["role"] == "admin":
-            self.tabs.addTab(
-                AdminPanel(),
+            self._add_lazy_tab(
+                self._create_admin_panel,
                 "Пользователи"
             )
+            self._add_lazy_tab(
+                self._create_performance_panel,
+                "Производительность"
+            )
+        self.tabs.currentChanged.connect(self._on_tab_changed)
         main_layout.addWidget(self.tabs)
         central.setLayout(main_layout)
         self.setCentralWidget(central)
 
+    # Генерация, проверка и сохранение выполняются в фоне;
+    # на время работы кнопки блокируются
+
+    def _set_busy(self, message: str = ""):
+        busy = bool(message)
+        self.btn_generate.setEnabled(not busy)
+        self.btn_check.setEnabled(not busy)
+        if busy:
+            self.statusBar().showMessage(message)
+        else:
+            self.statusBar().clearMessage()
+
+    # -------------------------------------------------
+    # Панели создаются при первом открытии вкладки
+    # -------------------------------------------------
+
+    def _add_lazy_tab(self, factory, title: str):
+        container = QWidget()
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        container.setLayout(layout)
+        index = self.tabs.addTab(container, title)
+        self._lazy_tabs[index] = factory
+
+    def _on_tab_changed(self, index: int):
+        factory = self._lazy_tabs.pop(index, None)
+        if factory is None:
+            return
+        self.tabs.widget(index).layout().addWidget(factory())
+
+    def _create_teacher_panel(self):
+        from ui.teacher_panel import TeacherPanel
+        return TeacherPanel()
+
+    def _create_admin_panel(self):
+        from ui.admin_panel import AdminPanel
+        return AdminPanel(admin_username=self.user["username"])
+
+    def _create_performance_panel(self):
+        from ui.performance_panel import PerformancePanel
+        return PerformancePanel()
+
     def generate_task(self):
-        try:
-            task = generate_task()
-            predicted_type = predict_task_type(task["task_text"])
-            task["task_type"] = predicted_type
-            self.task = task
-            self._show_task()
-            self.text_solution.clear()
-        except Exception as e:
-            QMessageBox.critical(
-                self,
-                "Ошибка",
-                f"Не удалось сгенерировать задание:\n{str(e)}"
-            )
+        self._set_busy("Генерация задания...")
+        run_in_background(
+            _generate_task,
+            on_done=self._on_task_generated,
+            on_error=self._on_generate_failed
+        )
+
+    def _on_task_generated(self, task: dict):
+        self._set_busy()
+        self.task = task
+        self._show_task()
+        self.text_solution.clear()
+
+    def _on_generate_failed(self, message: str):
+        self._set_busy()
+        QMessageBox.critical(
+            self,
+            "Ошибка",
+            f"Не удалось сгенерировать задание:\n{message}"
+        )
 
     def _show_task(self):
         task_text = self.task["task_text"]
@@ -135,26 +224,33 @@ class MainWindow(QMainWindow):
                 "Введите решение"
             )
             return
-        is_correct, feedback = check_solution(
-            task_type=self.task["task_type"],
-            user_code=user_code,
-            input_data=self.task["input_data"],
-            expected_result=self.task["expected_result"]
-        )
-        save_result(
-            username=self.user["username"],
-            task_text=self.task["task_text"],
-            task_type=self.task["task_type"],
-            user_code=user_code,
-            is_correct=is_correct,
-            feedback=feedback
+        self._set_busy("Проверка решения...")
+        run_in_background(
+            _grade_and_save,
+            self.user["username"],
+            dict(self.task),
+            user_code,
+            on_done=self._on_solution_checked,
+            on_error=self._on_check_failed
         )
+
+    def _on_solution_checked(self, outcome):
+        self._set_busy()
+        _, feedback = outcome
         QMessageBox.information(
             self,
             "Результат проверки",
             feedback
         )
 
+    def _on_check_failed(self, message: str):
+        self._set_busy()
+        QMessageBox.critical(
+            self,
+            "Ошибка",
+            f"Не удалось проверить решение:\n{message}"
+        )
+
     def open_settings(self):
         if self.settings_window is None:
             self.settings_window = SettingsWindow()
@@ -0,0 +1,251 @@
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+    QCheckBox, QTableWidget, QTableWidgetItem, QAbstractItemView,
+    QHeaderView, QFileDialog, QMessageBox, QSpinBox, QPlainTextEdit
+)
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QFont
+
+from ml import metrics, profiling
+from ml.database import get_check_profiles, get_check_profile
+
+# Период обновления таблицы, пока вкладка открыта (мс)
+REFRESH_INTERVAL = 2000
+
+COLUMNS = [
+    ("count", "Вызовов"),
+    ("mean_ms", "Среднее, мс"),
+    ("p50_ms", "p50, мс"),
+    ("p95_ms", "p95, мс"),
+    ("max_ms", "Макс., мс"),
+    ("total_ms", "Всего, мс"),
+]
+
+PROFILE_COLUMNS = [
+    ("id", "№"),
+    ("timestamp", "Время"),
+    ("username", "Пользователь"),
+    ("task_type", "Тип задания"),
+    ("elapsed_ms", "Длительность, мс"),
+]
+
+
+class PerformancePanel(QWidget):
+    """
+    Метрики производительности этого процесса (ml/metrics.py):
+    загрузка модели, предсказание, проверка решений, запросы к БД;
+    трассировки медленных проверок (ml/profiling.py).
+    """
+
+    def __init__(self):
+        super().__init__()
+
+        layout = QVBoxLayout()
+
+        title = QLabel("Производительность")
+        title.setStyleSheet("font-size: 16px; font-weight: bold;")
+        layout.addWidget(title)
+
+        self.chk_enabled = QCheckBox("Собирать метрики")
+        self.chk_enabled.setChecked(metrics.is_enabled())
+        self.chk_enabled.toggled.connect(self.toggle_collection)
+        layout.addWidget(self.chk_enabled)
+
+        self.table = QTableWidget(0, len(COLUMNS) + 1)
+        self.table.setHorizontalHeaderLabels(
+            ["Операция"] + [title for _, title in COLUMNS]
+        )
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(
+            0, QHeaderView.Stretch
+        )
+        layout.addWidget(self.table)
+
+        self.counters_label = QLabel()
+        self.counters_label.setWordWrap(True)
+        layout.addWidget(self.counters_label)
+
+        btn_layout = QHBoxLayout()
+        btn_refresh = QPushButton("Обновить")
+        btn_refresh.clicked.connect(self.refresh)
+        btn_reset = QPushButton("Сбросить")
+        btn_reset.clicked.connect(self.reset)
+        btn_json = QPushButton("Экспорт JSON")
+        btn_json.clicked.connect(self.export_json)
+        btn_prometheus = QPushButton("Экспорт Prometheus")
+        btn_prometheus.clicked.connect(self.export_prometheus)
+        for btn in (btn_refresh, btn_reset, btn_json, btn_prometheus):
+            btn_layout.addWidget(btn)
+        layout.addLayout(btn_layout)
+
+        # ---------- Медленные проверки ----------
+        profile_title = QLabel("Медленные проверки")
+        profile_title.setStyleSheet("font-weight: bold;")
+        layout.addWidget(profile_title)
+
+        profile_layout = QHBoxLayout()
+        self.chk_profile = QCheckBox("Профилировать проверки дольше, мс:")
+        self.spin_threshold = QSpinBox()
+        self.spin_threshold.setRange(10, 60000)
+        self.spin_threshold.setValue(int(
+            profiling.threshold_ms() or profiling.SLOW_THRESHOLD_MS
+        ))
+        self.chk_profile.setChecked(profiling.threshold_ms() is not None)
+        self.chk_profile.toggled.connect(self.toggle_profiling)
+        self.spin_threshold.valueChanged.connect(self.toggle_profiling)
+        btn_profiles = QPushButton("Обновить список")
+        btn_profiles.clicked.connect(self.load_profiles)
+        profile_layout.addWidget(self.chk_profile)
+        profile_layout.addWidget(self.spin_threshold)
+        profile_layout.addStretch()
+        profile_layout.addWidget(btn_profiles)
+        layout.addLayout(profile_layout)
+
+        self.profiles_table = QTableWidget(0, len(PROFILE_COLUMNS))
+        self.profiles_table.setHorizontalHeaderLabels(
+            [title for _, title in PROFILE_COLUMNS]
+        )
+        self.profiles_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.profiles_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.profiles_table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.profiles_table.verticalHeader().setVisible(False)
+        self.profiles_table.horizontalHeader().setStretchLastSection(True)
+        self.profiles_table.itemSelectionChanged.connect(self.show_profile)
+        layout.addWidget(self.profiles_table)
+
+        self.profile_text = QPlainTextEdit()
+        self.profile_text.setReadOnly(True)
+        self.profile_text.setFont(QFont("Monospace"))
+        self.profile_text.setPlaceholderText(
+            "Выберите проверку, чтобы увидеть самые долгие функции"
+        )
+        layout.addWidget(self.profile_text)
+
+        self.setLayout(layout)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(REFRESH_INTERVAL)
+        self.timer.timeout.connect(self.refresh)
+
+        self.refresh()
+        self.load_profiles()
+
+    # Таблица обновляется по таймеру, только пока вкладка видна
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.timer.start()
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    # -------------------------------------------------
+
+    def toggle_collection(self, checked: bool):
+        metrics.enable(checked)
+        self.refresh()
+
+    def refresh(self):
+        data = metrics.snapshot()
+        timers = data["timers"]
+
+        self.table.setRowCount(len(timers))
+        for row, (name, values) in enumerate(timers.items()):
+            self.table.setItem(row, 0, QTableWidgetItem(name))
+            for col, (key, _) in enumerate(COLUMNS, start=1):
+                value = values[key]
+                text = str(value) if key == "count" else f"{value:.3f}"
+                item = QTableWidgetItem(text)
+                item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, col, item)
+
+        if data["counters"]:
+            self.counters_label.setText("Счётчики: " + ", ".join(
+                f"{name} = {value}" for name, value in data["counters"].items()
+            ))
+        elif not data["enabled"]:
+            self.counters_label.setText("Сбор метрик выключен")
+        else:
+            self.counters_label.setText("")
+
+    def reset(self):
+        metrics.reset()
+        self.refresh()
+
+    # -------------------------------------------------
+    # Медленные проверки
+    # -------------------------------------------------
+
+    def toggle_profiling(self, *_):
+        profiling.configure(
+            self.spin_threshold.value() if self.chk_profile.isChecked()
+            else None
+        )
+
+    def load_profiles(self):
+        try:
+            profiles = get_check_profiles()
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", str(e))
+            return
+
+        self.profiles_table.setRowCount(len(profiles))
+        for row, profile in enumerate(profiles):
+            for col, (key, _) in enumerate(PROFILE_COLUMNS):
+                value = profile[key]
+                if key == "elapsed_ms":
+                    text = f"{value:.1f}"
+                else:
+                    text = "" if value is None else str(value)
+                item = QTableWidgetItem(text)
+                if key == "id":
+                    item.setData(Qt.UserRole, profile["id"])
+                self.profiles_table.setItem(row, col, item)
+        self.profile_text.clear()
+
+    def show_profile(self):
+        row = self.profiles_table.currentRow()
+        if row < 0:
+            return
+        profile_id = self.profiles_table.item(row, 0).data(Qt.UserRole)
+        trace = get_check_profile(profile_id)
+        self.profile_text.setPlainText(
+            profiling.format_trace(trace) if trace else ""
+        )
+
+    # -------------------------------------------------
+    # Экспорт
+    # -------------------------------------------------
+
+    def _save(self, caption: str, default_name: str, file_filter: str,
+              content: str):
+        path, _ = QFileDialog.getSaveFileName(
+            self, caption, default_name, file_filter
+        )
+        if not path:
+            return
+
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content)
+        except OSError as e:
+            QMessageBox.critical(self, "Ошибка", str(e))
+            return
+
+        QMessageBox.information(self, "Готово", "Файл успешно сохранён")
+
+    def export_json(self):
+        self._save(
+            "Сохранить метрики", "metrics.json",
+            "JSON (*.json)", metrics.to_json()
+        )
+
+    def export_prometheus(self):
+        self._save(
+            "Сохранить метрики", "metrics.prom",
+            "Prometheus (*.prom *.txt)", metrics.to_prometheus()
+        )
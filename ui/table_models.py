@@ -0,0 +1,153 @@
+from bisect import bisect_left, bisect_right
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+# ======================================================
+# ТАБЛИЧНАЯ МОДЕЛЬ С ПОСТРАНИЧНОЙ ЗАГРУЗКОЙ ИЗ БД
+# ======================================================
+#
+# Строки подгружаются страницами по мере прокрутки
+# (canFetchMore / fetchMore); сортировка и поиск выполняются
+# в SQL. После действий пользователя таблица обновляется
+# точечно (update_row / insert_row), без полной перезагрузки.
+
+
+class PagedTableModel(QAbstractTableModel):
+    def __init__(self, fetch_page, columns, order_by,
+                 descending=False, page_size=200, parent=None):
+        """
+        fetch_page(offset, limit, order_by, descending, search) -> list[dict]
+        columns — список кортежей (ключ, заголовок) или
+        (ключ, заголовок, форматтер значения).
+        """
+        super().__init__(parent)
+        self._fetch_page = fetch_page
+        self._columns = [tuple(c) + (None,) * (3 - len(c)) for c in columns]
+        self._order_by = order_by
+        self._descending = descending
+        self._page_size = page_size
+        self._search = None
+        self._rows = []
+        self._has_more = True
+
+    # -------------------------------------------------
+    # Интерфейс QAbstractTableModel
+    # -------------------------------------------------
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+
+        key, _, formatter = self._columns[index.column()]
+        value = self._rows[index.row()].get(key)
+
+        if formatter is not None:
+            return formatter(value)
+        return "" if value is None else str(value)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self._columns[section][1]
+        return str(section + 1)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._has_more
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or not self._has_more:
+            return
+
+        rows = self._fetch_page(
+            len(self._rows),
+            self._page_size,
+            self._order_by,
+            self._descending,
+            self._search
+        )
+        self._has_more = len(rows) == self._page_size
+
+        if rows:
+            first = len(self._rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            self._rows.extend(rows)
+            self.endInsertRows()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self._order_by = self._columns[column][0]
+        self._descending = order == Qt.DescendingOrder
+        self.reload()
+
+    # -------------------------------------------------
+    # Поиск и обновление
+    # -------------------------------------------------
+
+    def set_search(self, text: str):
+        self._search = text.strip() or None
+        self.reload()
+
+    def reload(self):
+        self.beginResetModel()
+        self._rows = []
+        self._has_more = True
+        self.endResetModel()
+        self.fetchMore()
+
+    def row(self, position: int) -> dict:
+        return self._rows[position]
+
+    def find_row(self, key: str, value) -> int:
+        for position, row in enumerate(self._rows):
+            if row.get(key) == value:
+                return position
+        return -1
+
+    def update_row(self, key: str, value, changes: dict):
+        """
+        Обновляет уже загруженную строку (например, статус пользователя).
+        """
+        position = self.find_row(key, value)
+        if position == -1:
+            return
+        self._rows[position].update(changes)
+        self.dataChanged.emit(
+            self.index(position, 0),
+            self.index(position, len(self._columns) - 1)
+        )
+
+    def insert_row(self, row: dict):
+        """
+        Вставляет новую строку на место согласно текущей сортировке.
+        Если строка попадает за пределы загруженных страниц, она
+        придёт со следующей страницей. При активном поиске таблица
+        перезагружается — фильтр применяется в SQL.
+        """
+        if self._search:
+            self.reload()
+            return
+
+        keys = [r.get(self._order_by) for r in self._rows]
+        value = row.get(self._order_by)
+
+        try:
+            if self._descending:
+                keys.reverse()
+                position = len(keys) - bisect_right(keys, value)
+            else:
+                position = bisect_left(keys, value)
+        except TypeError:
+            position = 0
+
+        if position == len(self._rows) and self._has_more:
+            return
+
+        self.beginInsertRows(QModelIndex(), position, position)
+        self._rows.insert(position, row)
+        self.endInsertRows()
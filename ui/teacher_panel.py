@@ -1,25 +1,25 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QLabel,
     QPushButton, QFileDialog, QMessageBox,
-    QTableWidget, QTableWidgetItem, QHBoxLayout
+    QTableView, QAbstractItemView, QHBoxLayout, QLineEdit,
+    QCheckBox, QDateEdit, QTabWidget
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QDate
 
 import os
-import shutil
-import pandas as pd
 
-from ml.database import get_students_statistics
-
-# ======================================================
-# ПУТИ
-# ======================================================
-
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATA_DIR = os.path.join(BASE_DIR, "data")
-DATASET_PATH = os.path.join(DATA_DIR, "train_data.csv")
-
-os.makedirs(DATA_DIR, exist_ok=True)
+from ml.database import get_students_statistics_page
+from ml.export import export_statistics, export_results
+from ml.dataset_ingest import (
+    DATASET_PATH,
+    check_schema,
+    ingest_dataset,
+    known_task_types,
+    describe_report
+)
+from ui.workers import run_in_background
+from ui.table_models import PagedTableModel
+from ui.analytics_panel import AnalyticsPanel
 
 # ======================================================
 # ПАНЕЛЬ ПРЕПОДАВАТЕЛЯ
@@ -39,33 +39,92 @@ class TeacherPanel(QWidget):
         title.setStyleSheet("font-size: 16px; font-weight: bold;")
 
         # ---------- Таблица статистики ----------
-        self.table = QTableWidget()
-        self.table.setColumnCount(4)
-        self.table.setHorizontalHeaderLabels([
-            "Студент",
-            "Попыток",
-            "Верных решений",
-            "Последняя попытка"
-        ])
+        self.search = QLineEdit()
+        self.search.setPlaceholderText("Поиск студента")
+
+        self.model = PagedTableModel(
+            get_students_statistics_page,
+            [
+                ("username", "Студент"),
+                ("attempts", "Попыток"),
+                ("correct", "Верных решений"),
+                ("last_attempt", "Последняя попытка"),
+            ],
+            order_by="username",
+            parent=self
+        )
+        self.search.textChanged.connect(self.model.set_search)
+
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSortingEnabled(True)
         self.table.horizontalHeader().setStretchLastSection(True)
 
+        # ---------- Вкладки: студенты и аналитика ----------
+        students_tab = QWidget()
+        students_layout = QVBoxLayout()
+        students_layout.setContentsMargins(0, 0, 0, 0)
+        students_layout.addWidget(self.search)
+        students_layout.addWidget(self.table)
+        students_tab.setLayout(students_layout)
+
+        self.analytics = AnalyticsPanel(self.period)
+
+        self.tabs = QTabWidget()
+        self.tabs.addTab(students_tab, "Студенты")
+        self.tabs.addTab(self.analytics, "Аналитика")
+
+        # ---------- Фильтры экспорта и аналитики ----------
+        filters_layout = QHBoxLayout()
+
+        self.chk_period = QCheckBox("Период с")
+        filters_layout.addWidget(self.chk_period)
+
+        self.date_from = QDateEdit(QDate.currentDate().addMonths(-1))
+        self.date_from.setCalendarPopup(True)
+        filters_layout.addWidget(self.date_from)
+
+        filters_layout.addWidget(QLabel("по"))
+
+        self.date_to = QDateEdit(QDate.currentDate())
+        self.date_to.setCalendarPopup(True)
+        filters_layout.addWidget(self.date_to)
+
+        self.chk_period.toggled.connect(self.analytics.period_changed)
+        self.date_from.dateChanged.connect(self.analytics.period_changed)
+        self.date_to.dateChanged.connect(self.analytics.period_changed)
+
+        self.export_student = QLineEdit()
+        self.export_student.setPlaceholderText("Студент (все)")
+        filters_layout.addWidget(self.export_student)
+
         # ---------- Кнопки ----------
         buttons_layout = QHBoxLayout()
 
-        self.btn_export = QPushButton("Экспорт статистики в Excel")
+        self.btn_export = QPushButton("Экспорт статистики")
         self.btn_export.clicked.connect(self.export_to_excel)
         buttons_layout.addWidget(self.btn_export)
 
+        self.btn_export_results = QPushButton("Экспорт всех решений")
+        self.btn_export_results.clicked.connect(self.export_results)
+        buttons_layout.addWidget(self.btn_export_results)
+
         self.btn_upload_dataset = QPushButton("Загрузить датасет для обучения модели")
         self.btn_upload_dataset.clicked.connect(self.upload_dataset)
         buttons_layout.addWidget(self.btn_upload_dataset)
 
+        self.export_label = QLabel("")
+        self.export_label.setAlignment(Qt.AlignLeft)
+
         self.dataset_label = QLabel("")
         self.dataset_label.setAlignment(Qt.AlignLeft)
 
         layout.addWidget(title)
-        layout.addWidget(self.table)
+        layout.addWidget(self.tabs)
+        layout.addLayout(filters_layout)
         layout.addLayout(buttons_layout)
+        layout.addWidget(self.export_label)
         layout.addWidget(self.dataset_label)
 
         self.setLayout(layout)
@@ -78,49 +137,84 @@ class TeacherPanel(QWidget):
     # -------------------------------------------------
 
     def load_data(self):
-        stats = get_students_statistics()
-        self.table.setRowCount(len(stats))
+        # строки подгружаются страницами при прокрутке
+        self.table.sortByColumn(0, Qt.AscendingOrder)
 
-        for row, s in enumerate(stats):
-            self.table.setItem(row, 0, QTableWidgetItem(s["username"]))
-            self.table.setItem(row, 1, QTableWidgetItem(str(s["attempts"])))
-            self.table.setItem(row, 2, QTableWidgetItem(str(s["correct"])))
-            self.table.setItem(row, 3, QTableWidgetItem(str(s["last_attempt"])))
+    def period(self):
+        """
+        (date_from, date_to) фильтра или (None, None), если период не задан.
+        """
+        if not self.chk_period.isChecked():
+            return None, None
+        return self.date_from.date().toPyDate(), self.date_to.date().toPyDate()
 
     # -------------------------------------------------
     # ЭКСПОРТ СТАТИСТИКИ
     # -------------------------------------------------
 
     def export_to_excel(self):
-        stats = get_students_statistics()
+        self._export(
+            export_statistics,
+            "students_statistics.xlsx"
+        )
 
-        if not stats:
-            QMessageBox.warning(self, "Ошибка", "Нет данных для экспорта")
-            return
+    def export_results(self):
+        self._export(
+            export_results,
+            "students_results.xlsx"
+        )
 
+    def _export(self, export_fn, default_name: str):
+        """
+        Выгрузка идёт в фоне построчно из БД; формат выбирается
+        по расширению файла (.xlsx или .csv).
+        """
         path, _ = QFileDialog.getSaveFileName(
             self,
             "Сохранить файл",
-            "students_statistics.xlsx",
-            "Excel Files (*.xlsx)"
+            default_name,
+            "Excel Files (*.xlsx);;CSV (*.csv)"
         )
 
         if not path:
             return
 
-        df = pd.DataFrame(stats)
-        df.columns = [
-            "Студент",
-            "Количество попыток",
-            "Верных решений",
-            "Последняя попытка"
-        ]
+        date_from, date_to = self.period()
+
+        self._set_export_enabled(False)
+        self.export_label.setText("Экспорт...")
+
+        run_in_background(
+            export_fn,
+            path,
+            date_from=date_from,
+            date_to=date_to,
+            username=self.export_student.text().strip() or None,
+            on_done=self.on_export_finished,
+            on_error=self.on_export_failed,
+            on_progress=lambda rows: self.export_label.setText(
+                f"Экспорт... выгружено строк: {rows}"
+            )
+        )
+
+    def _set_export_enabled(self, enabled: bool):
+        self.btn_export.setEnabled(enabled)
+        self.btn_export_results.setEnabled(enabled)
 
-        try:
-            df.to_excel(path, index=False)
-            QMessageBox.information(self, "Готово", "Файл успешно сохранён")
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", str(e))
+    def on_export_finished(self, rows: int):
+        self._set_export_enabled(True)
+        self.export_label.setText(f"Выгружено строк: {rows}")
+
+        if not rows:
+            QMessageBox.warning(self, "Ошибка", "Нет данных для экспорта")
+            return
+
+        QMessageBox.information(self, "Готово", "Файл успешно сохранён")
+
+    def on_export_failed(self, message: str):
+        self._set_export_enabled(True)
+        self.export_label.setText("")
+        QMessageBox.critical(self, "Ошибка", message)
 
     # -------------------------------------------------
     # ДАТАСЕТ ДЛЯ ОБУЧЕНИЯ (ОПЦИОНАЛЬНО)
@@ -148,18 +242,45 @@ class TeacherPanel(QWidget):
             return
 
         try:
-            # Проверяем, что это CSV, без жёсткой привязки к структуре
-            pd.read_csv(file_path)
+            # Структура проверяется по заголовку, без чтения всего файла
+            check_schema(file_path)
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка загрузки датасета", str(e))
+            return
 
-            shutil.copy(file_path, DATASET_PATH)
+        self.btn_upload_dataset.setEnabled(False)
+        self.dataset_label.setText("Загрузка датасета...")
 
-            QMessageBox.information(
-                self,
-                "Успешно",
-                "Датасет загружен и может быть использован при обучении модели."
+        run_in_background(
+            self._ingest,
+            file_path,
+            on_done=self.on_dataset_ingested,
+            on_error=self.on_dataset_failed,
+            on_progress=lambda rows: self.dataset_label.setText(
+                f"Загрузка датасета... обработано строк: {rows}"
             )
+        )
 
-            self.update_dataset_status()
+    @staticmethod
+    def _ingest(file_path, progress=None):
+        # типы заданий — известные системе (шаблоны и текущий датасет)
+        return ingest_dataset(
+            file_path,
+            allowed_types=known_task_types(),
+            progress=progress
+        )
 
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка загрузки датасета", str(e))
+    def on_dataset_ingested(self, report: dict):
+        self.btn_upload_dataset.setEnabled(True)
+        self.update_dataset_status()
+        QMessageBox.information(
+            self,
+            "Успешно",
+            "Датасет загружен и может быть использован при обучении модели.\n\n"
+            + describe_report(report)
+        )
+
+    def on_dataset_failed(self, message: str):
+        self.btn_upload_dataset.setEnabled(True)
+        self.update_dataset_status()
+        QMessageBox.critical(self, "Ошибка загрузки датасета", message)
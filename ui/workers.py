@@ -0,0 +1,62 @@
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+# ======================================================
+# ФОНОВОЕ ВЫПОЛНЕНИЕ ЗАДАЧ
+# ======================================================
+#
+# Долгие операции (загрузка датасета и т.п.) выполняются в пуле
+# потоков Qt, а результат возвращается в GUI-поток сигналом.
+
+
+class WorkerSignals(QObject):
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    progress = pyqtSignal(int)
+
+
+class Worker(QRunnable):
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(result)
+
+
+# Ссылки на запущенные задачи, чтобы объекты сигналов
+# не были удалены до доставки результата в GUI-поток
+_active = set()
+
+
+def run_in_background(fn, *args, on_done=None, on_error=None,
+                      on_progress=None, **kwargs) -> Worker:
+    """
+    Выполняет fn(*args, **kwargs) в пуле потоков.
+    on_done(result), on_error(message) и on_progress(value)
+    вызываются в GUI-потоке. Если передан on_progress, функция
+    получает аргумент progress — вызываемый объект для отчёта.
+    """
+    worker = Worker(fn, *args, **kwargs)
+
+    if on_progress is not None:
+        worker.kwargs["progress"] = worker.signals.progress.emit
+        worker.signals.progress.connect(on_progress)
+    if on_done is not None:
+        worker.signals.finished.connect(on_done)
+    if on_error is not None:
+        worker.signals.failed.connect(on_error)
+
+    worker.signals.finished.connect(lambda _: _active.discard(worker))
+    worker.signals.failed.connect(lambda _: _active.discard(worker))
+
+    _active.add(worker)
+    QThreadPool.globalInstance().start(worker)
+    return worker